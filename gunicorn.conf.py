@@ -0,0 +1,15 @@
+"""
+gunicorn の設定（起動時のカレントディレクトリにあるこのファイルを gunicorn が読み込む）。
+
+PROMETHEUS_MULTIPROC_DIR を使う場合、終了したワーカーのメトリクスのファイルを片付ける
+（カウンタ・ヒストグラムの値は残したまま、ワーカーごとの値を持つゲージだけを除く）。
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,170 @@
+"""
+設備・駐車場の絞り込み用のプロセス内ビットマップインデックス。
+
+授乳室・おむつ交換台などの設備の有無と駐車場の区分は値の種類が少ないため、
+(フィールド, 値) ごとに「その値を持つ施設IDのビットを立てた整数」を保持し、
+絞り込み条件の組み合わせをビット演算の AND で求める。
+
+インデックスはプロセスごとに保持し、playground 名前空間のバージョン（myapp.caching）と
+組にして管理する。同じプロセスでの施設の保存・削除は myapp.signals から apply で差分を反映し、
+他のプロセスの更新でバージョンが変わっていた場合や、INDEX_MAX_AGE 秒を過ぎた場合
+（bulk_create などシグナルを経由しない更新に備える）は、次の検索時に作り直す。
+バージョンの確認は検索のたびではなく VERSION_CHECK_INTERVAL 秒に1回にする。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from myapp import caching
+from myapp.models import Playground
+from mysite.db_router import replica_reads
+
+FLAG_FIELDS = (
+    "nursing_room_available",
+    "diaper_changing_station_available",
+    "stroller_accessible",
+    "lunch_allowed",
+    "indoor_play_area",
+    "kids_toilet_available",
+)
+VALUE_FIELDS = ("parking_info",)
+INDEX_FIELDS = FLAG_FIELDS + VALUE_FIELDS
+INDEX_MAX_AGE = 60 * 10
+# 他のプロセスの更新を確認する（キャッシュから playground 名前空間のバージョンを読む）間隔（秒）
+VERSION_CHECK_INTERVAL = 1.0
+
+# 1バイトの値 → 立っているビットの位置
+_BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+BitmapKey = tuple[str, Any]
+
+
+def bits_to_ids(bits: int) -> list[int]:
+    """立っているビットの位置（施設ID）を昇順のリストで返す"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    ids: list[int] = []
+    for index, byte in enumerate(data):
+        if byte:
+            base = index << 3
+            ids.extend(base + bit for bit in _BYTE_BITS[byte])
+    return ids
+
+
+def _build_bitmaps(rows: list[tuple[Any, ...]]) -> Dict[BitmapKey, int]:
+    """(id, フィールドの値...) の行から、(フィールド, 値) ごとのビットマップを作る"""
+    size = (max(row[0] for row in rows) >> 3) + 1 if rows else 0
+    buffers: Dict[BitmapKey, bytearray] = defaultdict(lambda: bytearray(size))
+    all_ids = buffers[("id", None)]
+    for pk, *values in rows:
+        index, bit = pk >> 3, 1 << (pk & 7)
+        all_ids[index] |= bit
+        for key in zip(INDEX_FIELDS, values):
+            buffers[key][index] |= bit
+    return {key: int.from_bytes(buffer, "little") for key, buffer in buffers.items()}
+
+
+def _keys(values: tuple[Any, ...]) -> set[BitmapKey]:
+    """施設のフィールドの値から、その施設のビットを立てるキー"""
+    return {("id", None), *zip(INDEX_FIELDS, values)}
+
+
+class AmenityBitmapIndex:
+    """設備・駐車場の値ごとに施設IDのビットマップを保持するインデックス"""
+
+    def __init__(self, version_check_interval: float = VERSION_CHECK_INTERVAL) -> None:
+        self._lock = threading.Lock()
+        self._bitmaps: Dict[BitmapKey, int] = {}
+        # 施設IDごとのフィールドの値（保存時に、変わったキーのビットだけを書き換えるため）
+        self._values: Dict[int, tuple[Any, ...]] = {}
+        self._version: Optional[int] = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self.version_check_interval = version_check_interval
+
+    def build(self, version: Optional[int] = None) -> None:
+        """全施設を読み込んでインデックスを作り直す（レプリカの古い値で作らないようプライマリから読む）"""
+        with replica_reads(False):
+            rows = list(Playground.objects.order_by().values_list("id", *INDEX_FIELDS))
+        bitmaps = _build_bitmaps(rows)
+        values = {pk: tuple(row) for pk, *row in rows}
+        now = time.monotonic()
+        with self._lock:
+            self._bitmaps = bitmaps
+            self._values = values
+            self._version = version
+            self._built_at = self._checked_at = now
+
+    def reset(self) -> None:
+        """インデックスを捨て、次の検索時に作り直す"""
+        with self._lock:
+            self._bitmaps, self._values, self._version = {}, {}, None
+
+    def ensure_current(self) -> None:
+        """
+        他のプロセスで施設が更新されていれば（または古くなっていれば）作り直す。
+        キャッシュのバージョンの確認は version_check_interval 秒に1回だけ行う
+        （同じプロセスでの更新は apply で反映済みのため、遅れるのは他のプロセスの更新だけ）
+        """
+        now = time.monotonic()
+        if (
+            self._version is not None
+            and now - self._checked_at < self.version_check_interval
+        ):
+            return
+        version = caching.get_namespace_version(caching.PLAYGROUND)
+        self._checked_at = now
+        if version != self._version or now - self._built_at > INDEX_MAX_AGE:
+            self.build(version)
+
+    def query(self, conditions: Dict[str, Any]) -> list[int]:
+        """
+        {フィールド名: 値} のすべての条件に一致する施設IDを昇順で返す。
+        条件には FLAG_FIELDS（値は True）と VALUE_FIELDS のフィールドを指定できる。
+        """
+        for field in conditions:
+            if field not in INDEX_FIELDS:
+                raise ValueError(f"{field} はビットマップインデックスの対象外です")
+        self.ensure_current()
+        keys = [("id", None), *conditions.items()]
+        # apply がビットマップを書き換えている途中の値を使わないよう、ロックを取って読む
+        with self._lock:
+            bitmaps = [self._bitmaps.get(key, 0) for key in keys]
+        bits = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            bits &= bitmap
+        return bits_to_ids(bits)
+
+    def apply(
+        self, pk: int, playground: Optional[Playground], new_version: int
+    ) -> None:
+        """
+        施設1件の保存（playground が None の場合は削除）をインデックスに反映する。
+        値が変わったキーのビットマップだけを書き換える。
+        インデックスが new_version の直前のバージョンでなければ（未作成や他のプロセスの更新がある）
+        反映せず、次の検索時に作り直す。
+        """
+        with self._lock:
+            if self._version is None or self._version != new_version - 1:
+                return
+            mask = 1 << pk
+            old_values = self._values.pop(pk, None)
+            old_keys = _keys(old_values) if old_values is not None else set()
+            new_keys: set[BitmapKey] = set()
+            if playground is not None:
+                new_values = tuple(getattr(playground, field) for field in INDEX_FIELDS)
+                self._values[pk] = new_values
+                new_keys = _keys(new_values)
+            for key in old_keys - new_keys:
+                self._bitmaps[key] &= ~mask
+            for key in new_keys - old_keys:
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | mask
+            self._version = new_version
+
+
+amenity_index = AmenityBitmapIndex()
@@ -0,0 +1,204 @@
+"""
+アプリケーションのデータをキャッシュする際のキーの名前空間とヒット率の記録。
+
+キャッシュのキーは "名前空間:v<バージョン>:..." の形にする。データが更新されたときは
+bump_namespace で名前空間のバージョンを上げるだけで、その名前空間の古いキーは参照されなくなる
+（古いキーは有効期限が切れるか、キャッシュの容量が足りなくなったときに削除される）。
+キーを1つずつ削除する必要がないため、Redis・memcached・ファイルなど、どのバックエンドでも同じように動く。
+
+名前空間の中をさらに「スコープ」（地図のタイル・施設ごとのページなど）に分け、スコープごとのバージョンを
+キーに含めておくと、bump_scopes で一部のキーだけを無効にできる（施設データの取り込みで使う）。
+
+名前空間ごとのヒット・ミスの回数は Prometheus のメトリクス (myapp.metrics) としてプロセス内で数え、
+/metrics と cache_stats コマンドで確認できる（読み取りのたびにキャッシュへ書き込まないため）。
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import time
+from typing import Any, Callable, Dict, Iterable
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections, router
+from myapp import metrics
+from mysite.db_router import replica_reads
+
+PLAYGROUND = (
+    "playground"  # 施設の総数・地図のクラスタなど、施設の追加・更新・削除で変わるもの
+)
+REVIEW = "review"  # 口コミの追加・更新・削除で変わるもの
+RANKING = "ranking"  # ランキング（口コミと施設の削除で変わる）
+PAGE = "page"  # 匿名ユーザー向けのページ全体（施設・口コミのどちらの更新でも変わる）
+TILE = "tile"  # 地図のタイルごとのクラスタ（施設の追加・更新・削除で変わる）
+NAMESPACES = (PLAYGROUND, REVIEW, RANKING, PAGE, TILE)
+
+HITS = "hits"
+MISSES = "misses"
+
+_VERSION_KEY = "ns:{namespace}:version"
+_SCOPE_VERSION_KEY = "ns:{namespace}:scope:{scope}:version"
+_STATS_BASELINE_KEY = "ns:{namespace}:stats:baseline"
+_MISSING = object()
+
+
+def _cache():
+    return caches["default"]
+
+
+def get_namespace_version(namespace: str) -> int:
+    """
+    名前空間の現在のバージョンを返す。
+    バージョンが失われていた場合に過去のバージョンと重ならないよう、初期値は現在時刻にする。
+    """
+    return _cache().get_or_set(
+        _VERSION_KEY.format(namespace=namespace), time.time_ns, None
+    )
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    """名前空間と現在のバージョンを含むキャッシュのキーを返す"""
+    version = get_namespace_version(namespace)
+    return ":".join([namespace, f"v{version}", *(str(part) for part in parts)])
+
+
+def bump_namespace(namespace: str) -> int:
+    """
+    名前空間のバージョンを上げ、その名前空間のキャッシュをすべて無効にする。
+    新しいバージョンを返す（他のプロセスと同時に上げていなければ、上げる前のバージョン + 1）。
+    """
+    key = _VERSION_KEY.format(namespace=namespace)
+    try:
+        return _cache().incr(key)
+    except ValueError:
+        version = time.time_ns()
+        _cache().set(key, version, None)
+        return version
+
+
+def get_scope_version(namespace: str, scope: str) -> int:
+    """名前空間の中のスコープの現在のバージョンを返す。キャッシュのキーの一部に含めて使う"""
+    return _cache().get_or_set(
+        _SCOPE_VERSION_KEY.format(namespace=namespace, scope=scope), time.time_ns, None
+    )
+
+
+def bump_scopes(namespace: str, scopes: Iterable[str]) -> None:
+    """
+    名前空間の中の複数のスコープのバージョンをまとめて上げ、それらのスコープのキャッシュだけを無効にする。
+    読み込み1回・書き込み1回で済むよう、incr ではなく現在時刻（以前の値以下なら以前の値 + 1）を設定する。
+    """
+    keys = [
+        _SCOPE_VERSION_KEY.format(namespace=namespace, scope=scope) for scope in scopes
+    ]
+    if not keys:
+        return
+    current = _cache().get_many(keys)
+    now = time.time_ns()
+    _cache().set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, None)
+
+
+def get_value(namespace: str, parts: tuple[Any, ...], default: Any = None) -> Any:
+    """名前空間のキャッシュから値を返す。なければ default を返す。ヒット・ミスの回数を記録する"""
+    value = _cache().get(make_key(namespace, *parts), _MISSING)
+    if value is _MISSING:
+        record_event(namespace, MISSES)
+        return default
+    record_event(namespace, HITS)
+    return value
+
+
+def set_value(
+    namespace: str, parts: tuple[Any, ...], value: Any, timeout: int | None
+) -> None:
+    """名前空間の現在のバージョンのキーに値をキャッシュする"""
+    _cache().set(make_key(namespace, *parts), value, timeout)
+
+
+def get_or_set(
+    namespace: str,
+    parts: tuple[Any, ...],
+    default: Callable[[], Any],
+    timeout: int | None,
+) -> Any:
+    """
+    名前空間のキャッシュから値を返す。なければ default() の値をキャッシュして返す。
+    ヒット・ミスの回数を名前空間ごとに記録する。
+    default() の読み取りは、書き込みが反映されていないレプリカの値をキャッシュしないようプライマリから行う。
+    """
+    value = get_value(namespace, parts, _MISSING)
+    if value is _MISSING:
+        with replica_reads(False):
+            value = default()
+        set_value(namespace, parts, value, timeout)
+    return value
+
+
+def record_event(namespace: str, event: str) -> None:
+    """名前空間のヒット・ミスの回数を1つ増やす（プロセス内のカウンタで、キャッシュには書き込まない）"""
+    metrics.CACHE_REQUESTS.labels(namespace, event).inc()
+
+
+def get_stats(namespace: str) -> Dict[str, Any]:
+    """
+    名前空間のヒット・ミスの回数（reset_stats 以降）とヒット率、キーの件数を返す。
+    回数は PROMETHEUS_MULTIPROC_DIR があれば全ワーカーの合計、なければこのプロセスの値
+    """
+    counts = metrics.cache_request_counts(namespace)
+    baseline = _cache().get(_STATS_BASELINE_KEY.format(namespace=namespace), {})
+    # ワーカーの再起動でカウンタが戻っていれば、基準を使わない
+    if any(counts.get(event, 0) < value for event, value in baseline.items()):
+        baseline = {}
+    hits = int(counts.get(HITS, 0) - baseline.get(HITS, 0))
+    misses = int(counts.get(MISSES, 0) - baseline.get(MISSES, 0))
+    total = hits + misses
+    version = get_namespace_version(namespace)
+    return {
+        "namespace": namespace,
+        "version": version,
+        HITS: hits,
+        MISSES: misses,
+        "hit_rate": hits / total if total else None,
+        "keys": count_keys(f"{namespace}:v{version}:*"),
+        "all_versions_keys": count_keys(f"{namespace}:v*"),
+    }
+
+
+def reset_stats(namespace: str) -> None:
+    """ヒット・ミスの回数を0に戻す（Prometheus のカウンタは減らせないため、現在の値を基準として保存する）"""
+    _cache().set(
+        _STATS_BASELINE_KEY.format(namespace=namespace),
+        metrics.cache_request_counts(namespace),
+        None,
+    )
+
+
+def count_keys(pattern: str) -> int | None:
+    """
+    パターン（* を含むキー）に一致するキャッシュのキーの件数を返す。
+    キーを列挙できないバックエンド（memcached・ファイルなど）の場合は None を返す。
+    """
+    backend = _cache()
+    full_pattern = backend.make_key(pattern)
+    if isinstance(backend, RedisCache):
+        client = backend._cache.get_client(write=False)
+        return sum(1 for _ in client.scan_iter(match=full_pattern, count=1000))
+    if isinstance(backend, LocMemCache):
+        return sum(
+            1 for key in list(backend._cache) if fnmatch.fnmatchcase(key, full_pattern)
+        )
+    if isinstance(backend, DatabaseCache):
+        db = router.db_for_read(backend.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(backend._table)
+        like = full_pattern.replace("%", r"\%").replace("_", r"\_").replace("*", "%")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE cache_key LIKE %s ESCAPE '\\'",
+                [like],
+            )
+            return cursor.fetchone()[0]
+    return None
@@ -0,0 +1,137 @@
+"""
+地図のマーカーのサーバー側クラスタリング。
+
+地図をWebメルカトル図法のタイル（ズームレベル z、列 x、行 y）単位で扱い、タイルを
+TILE_GRID_SIZE × TILE_GRID_SIZE のセルに分けて、セルごとに施設をまとめる。
+集約はセル番号で GROUP BY する1クエリで行い、施設が1件だけのセルはその施設の情報を返す。
+
+タイルの結果は絞り込み条件ごとに tile 名前空間にキャッシュし、施設が追加・更新・削除されたときは
+myapp.signals で名前空間のバージョンを上げて無効にする（myapp.caching を参照）。
+キーにはタイルごとのスコープのバージョンも含めており、施設データの取り込み (myapp.importing) では
+変更のあった施設を含むタイル (tiles_containing) だけを無効にする。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict
+
+from django.db.models import Avg, Count, F, Min, QuerySet, Value
+from django.db.models.functions import Floor
+from myapp import caching
+from myapp.geo import BoundingBox, covering_cells, geohash_prefix_q
+from myapp.models import Playground
+from myapp.serializers import serialize_playground_for_map
+
+MAX_ZOOM = 20
+TILE_GRID_SIZE = 4  # 256pxのタイルを64px四方のセルに分ける
+
+CLUSTER_CACHE_TIMEOUT = 60 * 60
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def tile_bounds(z: int, x: int, y: int) -> BoundingBox:
+    """タイルの範囲を緯度・経度で返す"""
+    n = 2**z
+
+    def tile_latitude(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return BoundingBox(
+        south=tile_latitude(y + 1),
+        west=x / n * 360.0 - 180.0,
+        north=tile_latitude(y),
+        east=(x + 1) / n * 360.0 - 180.0,
+    )
+
+
+def tile_scope(z: int, x: int, y: int) -> str:
+    return f"{z}/{x}/{y}"
+
+
+def tiles_containing(latitude: float, longitude: float) -> list[tuple[int, int, int]]:
+    """位置を含む各ズームレベルのタイル (z, x, y) を返す"""
+    latitude = max(min(latitude, 85.05112878), -85.05112878)
+    sin_lat = math.sin(math.radians(latitude))
+    # メルカトル図法での位置を 0〜1 に正規化する（北端・西端が 0）
+    fx = (longitude + 180.0) / 360.0
+    fy = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    tiles = []
+    for z in range(MAX_ZOOM + 1):
+        n = 2**z
+        tiles.append(
+            (z, min(max(int(fx * n), 0), n - 1), min(max(int(fy * n), 0), n - 1))
+        )
+    return tiles
+
+
+def build_tile_clusters(
+    queryset: QuerySet[Playground], z: int, x: int, y: int
+) -> Dict[str, Any]:
+    """
+    タイル内の施設をセルごとに集約する。
+    戻り値の clusters は2件以上の施設をまとめたクラスタ（重心と件数）、
+    playgrounds はセル内に1件だけの施設の情報。
+    セルは緯度方向に等分するため、タイル内の緯度の歪みは無視する。
+    """
+    bounds = tile_bounds(z, x, y)
+    cell_height = (bounds.north - bounds.south) / TILE_GRID_SIZE
+    cell_width = (bounds.east - bounds.west) / TILE_GRID_SIZE
+
+    # タイルの境界上の施設が隣のタイルと重複しないよう、北端・東端は含めない
+    in_tile = queryset.order_by().filter(
+        geohash_prefix_q(covering_cells(bounds)),
+        latitude__gte=bounds.south,
+        latitude__lt=bounds.north,
+        longitude__gte=bounds.west,
+        longitude__lt=bounds.east,
+    )
+    cells = (
+        in_tile.annotate(
+            cell_x=Floor((F("longitude") - Value(bounds.west)) / Value(cell_width)),
+            cell_y=Floor((Value(bounds.north) - F("latitude")) / Value(cell_height)),
+        )
+        .values("cell_x", "cell_y")
+        .annotate(
+            count=Count("id"),
+            center_latitude=Avg("latitude"),
+            center_longitude=Avg("longitude"),
+            first_id=Min("id"),
+        )
+        .order_by("cell_y", "cell_x")
+    )
+
+    clusters = []
+    single_ids = []
+    for cell in cells:
+        if cell["count"] == 1:
+            single_ids.append(cell["first_id"])
+        else:
+            clusters.append(
+                {
+                    "latitude": cell["center_latitude"],
+                    "longitude": cell["center_longitude"],
+                    "count": cell["count"],
+                }
+            )
+    playgrounds = [
+        serialize_playground_for_map(playground)
+        for playground in Playground.objects.filter(pk__in=single_ids).order_by("id")
+    ]
+    return {"clusters": clusters, "playgrounds": playgrounds}
+
+
+def get_tile_clusters(
+    queryset: QuerySet[Playground], z: int, x: int, y: int, filter_key: str
+) -> Dict[str, Any]:
+    """タイルのクラスタを返す。キャッシュになければ集約してキャッシュする"""
+    scope_version = caching.get_scope_version(caching.TILE, tile_scope(z, x, y))
+    return caching.get_or_set(
+        caching.TILE,
+        ("clusters", z, x, y, f"s{scope_version}", filter_key),
+        lambda: build_tile_clusters(queryset, z, x, y),
+        CLUSTER_CACHE_TIMEOUT,
+    )
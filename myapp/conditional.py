@@ -0,0 +1,99 @@
+"""
+施設ページの条件付きGET (ETag / Last-Modified) に使うバージョン情報。
+
+施設詳細と口コミ一覧の内容は、施設の更新日時と口コミの追加・削除・評価の変更、口コミの投稿者名の変更で決まる。
+施設の更新日時・最新の口コミの投稿日時・口コミ件数・評価合計・投稿者名の最新の変更日時を1クエリで取得し、
+ETag と Last-Modified を計算する。django.views.decorators.http.condition に渡して使い、
+変更がなければビューを実行せず（口コミの取得やテンプレートのレンダリングをせず）304 を返す。
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from django.db.models import Max
+from django.http import HttpRequest
+from myapp.models import Playground
+
+
+@dataclass(frozen=True)
+class PlaygroundVersion:
+    updated_at: datetime.datetime
+    latest_review_at: Optional[datetime.datetime]
+    review_count: int
+    rating_sum: int
+    latest_author_change_at: Optional[datetime.datetime] = None
+
+    @property
+    def last_modified(self) -> datetime.datetime:
+        """施設の更新日時・最新の口コミの投稿日時・投稿者名の最新の変更日時のうち、最も新しいもの"""
+        return max(
+            value
+            for value in (
+                self.updated_at,
+                self.latest_review_at,
+                self.latest_author_change_at,
+            )
+            if value is not None
+        )
+
+
+def get_playground_version(
+    request: HttpRequest, playground_id: int
+) -> Optional[PlaygroundVersion]:
+    """
+    施設のバージョン情報を返す。施設がなければ None を返す。
+    ETag と Last-Modified の両方で使うため、リクエストごとに1回だけ取得する。
+    """
+    versions = request.__dict__.setdefault("_playground_versions", {})
+    if playground_id not in versions:
+        row = (
+            Playground.objects.filter(pk=playground_id)
+            .annotate(
+                latest_review_at=Max("reviews__created_at"),
+                latest_author_change_at=Max("reviews__user__account_name_changed_at"),
+            )
+            .values_list(
+                "updated_at",
+                "latest_review_at",
+                "review_count",
+                "rating_sum",
+                "latest_author_change_at",
+            )
+            .first()
+        )
+        versions[playground_id] = PlaygroundVersion(*row) if row else None
+    return versions[playground_id]
+
+
+def _playground_id(kwargs: dict[str, Any]) -> int:
+    # 施設詳細は pk、口コミ一覧は playground_id で施設を受け取る
+    return int(kwargs["pk"] if "pk" in kwargs else kwargs["playground_id"])
+
+
+def playground_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> Optional[str]:
+    """
+    施設ページの ETag を返す。
+    ログイン状態でヘッダーやボタンが変わるため、ユーザーごとに異なる値にする。
+    """
+    version = get_playground_version(request, _playground_id(kwargs))
+    if version is None:
+        return None
+    viewer = request.user.pk if request.user.is_authenticated else "anon"
+    source = (
+        f"{version.updated_at.isoformat()}:{version.latest_review_at}:"
+        f"{version.review_count}:{version.rating_sum}:"
+        f"{version.latest_author_change_at}:{viewer}"
+    )
+    return hashlib.md5(source.encode(), usedforsecurity=False).hexdigest()
+
+
+def playground_last_modified(
+    request: HttpRequest, *args: Any, **kwargs: Any
+) -> Optional[datetime.datetime]:
+    """施設ページの Last-Modified を返す"""
+    version = get_playground_version(request, _playground_id(kwargs))
+    return version.last_modified if version else None
@@ -0,0 +1,18 @@
+from myapp import caching
+from myapp.models import Playground
+
+# bulk_create など、シグナルを経由しない更新があっても一定時間で正しい値に戻るようにする
+TOTAL_PLAYGROUND_COUNT_TIMEOUT = 60 * 10
+
+
+def get_total_playground_count() -> int:
+    """
+    施設の総数を返す。
+    playground 名前空間にキャッシュし、施設の追加・更新・削除時に名前空間ごと無効にする。
+    """
+    return caching.get_or_set(
+        caching.PLAYGROUND,
+        ("total_count",),
+        Playground.objects.count,
+        TOTAL_PLAYGROUND_COUNT_TIMEOUT,
+    )
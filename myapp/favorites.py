@@ -0,0 +1,23 @@
+from django.http import HttpRequest
+from myapp.models import Favorite
+
+# お気に入りIDの集合をリクエストオブジェクトに保持する際の属性名
+FAVORITE_IDS_ATTR = "_favorite_playground_ids"
+
+
+def get_favorite_ids(request: HttpRequest) -> frozenset[int]:
+    """
+    ログインユーザーのお気に入り施設IDの集合を返す。
+    1リクエストにつき1回だけデータベースから読み込み、以降はリクエストに保持した値を使う。
+    """
+    if not request.user.is_authenticated:
+        return frozenset()
+    favorite_ids = getattr(request, FAVORITE_IDS_ATTR, None)
+    if favorite_ids is None:
+        favorite_ids = frozenset(
+            Favorite.objects.filter(user=request.user).values_list(
+                "playground_id", flat=True
+            )
+        )
+        setattr(request, FAVORITE_IDS_ATTR, favorite_ids)
+    return favorite_ids
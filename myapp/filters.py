@@ -1,9 +1,149 @@
-from django.db.models import Q
 from django.db.models.query import QuerySet
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+from myapp import caching
+from myapp.bitmap_index import amenity_index
 from myapp.models import Playground
+from myapp.search import search_playgrounds
 from django.http import HttpRequest
 import decimal
+import hashlib
+
+# 施設の絞り込みに使うGETパラメータ
+FILTER_PARAMS = (
+    "q",
+    "city",
+    "nursing_room",
+    "diaper_changing_station",
+    "stroller_accessible",
+    "lunch_allowed",
+    "indoor_play_area",
+    "kids_toilet",
+    "target_age_min",
+    "target_age_max",
+    "fee_min",
+    "fee_max",
+    "parking_info",
+)
+
+# チェックボックスのパラメータと、絞り込むフィールド
+BOOLEAN_FILTERS = {
+    "nursing_room": "nursing_room_available",
+    "diaper_changing_station": "diaper_changing_station_available",
+    "stroller_accessible": "stroller_accessible",
+    "lunch_allowed": "lunch_allowed",
+    "indoor_play_area": "indoor_play_area",
+    "kids_toilet": "kids_toilet_available",
+}
+PARKING_VALUES = {value for value, _ in Playground.PARKING_CHOICES}
+# ビットマップインデックス (myapp.bitmap_index) で絞り込める条件
+BITMAP_FILTERS = {**BOOLEAN_FILTERS, "parking_info": "parking_info"}
+
+# 絞り込み結果の施設IDのキャッシュ。件数が多い条件は IN 句が大きくなるため、キャッシュせず毎回絞り込む
+FILTER_IDS_TIMEOUT = 60 * 10
+MAX_CACHED_FILTER_IDS = 5000
+
+
+def normalize_filter_params(params) -> Dict[str, Any]:
+    """
+    GETパラメータを検証・正規化した絞り込み条件を返す。
+    空の値・既定値（駐車場の「指定なし」）・不正な値は絞り込みに使わないため含めない。
+    """
+    criteria: Dict[str, Any] = {}
+    for name in ("q", "city"):
+        value = (params.get(name) or "").strip()
+        if value:
+            criteria[name] = value
+    for name in BOOLEAN_FILTERS:
+        if params.get(name) == "on":
+            criteria[name] = True
+    for name in ("target_age_min", "target_age_max"):
+        try:
+            criteria[name] = int(params.get(name) or "")
+        except ValueError:
+            pass
+    for name in ("fee_min", "fee_max"):
+        try:
+            fee = decimal.Decimal(params.get(name) or "")
+        except decimal.InvalidOperation:
+            continue
+        if fee.is_finite():
+            criteria[name] = fee
+    parking_info = params.get("parking_info")
+    if parking_info in PARKING_VALUES:
+        criteria["parking_info"] = parking_info
+    return criteria
+
+
+def filter_criteria_key(criteria: Dict[str, Any]) -> str:
+    """
+    絞り込み条件を表すキャッシュキー用の文字列を返す。
+    同じ条件であれば、パラメータの順序や表記（"0100" と "100" など）によらず同じ値になる。
+    """
+    if not criteria:
+        return "all"
+    canonical = "&".join(
+        f"{name}={_canonical_value(value)}" for name, value in sorted(criteria.items())
+    )
+    return hashlib.md5(canonical.encode(), usedforsecurity=False).hexdigest()
+
+
+def _canonical_value(value: Any) -> str:
+    if value is True:
+        return "1"
+    if isinstance(value, decimal.Decimal):
+        return format(value.normalize(), "f")
+    return str(value)
+
+
+def apply_filter_criteria(
+    queryset: QuerySet[Playground], criteria: Dict[str, Any]
+) -> QuerySet[Playground]:
+    """キーワード以外の絞り込み条件を QuerySet に適用する"""
+    if "city" in criteria:
+        queryset = queryset.filter(address__icontains=criteria["city"])
+    for name, field in BOOLEAN_FILTERS.items():
+        if name in criteria:
+            queryset = queryset.filter(**{field: True})
+    if "target_age_min" in criteria:
+        queryset = queryset.filter(target_age_start__gte=criteria["target_age_min"])
+    if "target_age_max" in criteria:
+        queryset = queryset.filter(target_age_end__lte=criteria["target_age_max"])
+    if "fee_min" in criteria:
+        queryset = queryset.filter(fee_decimal__gte=criteria["fee_min"])
+    if "fee_max" in criteria:
+        queryset = queryset.filter(fee_decimal__lte=criteria["fee_max"])
+    if "parking_info" in criteria:
+        queryset = queryset.filter(parking_info=criteria["parking_info"])
+    return queryset
+
+
+def get_filtered_ids(criteria: Dict[str, Any]) -> Optional[list[int]]:
+    """
+    キーワード以外の絞り込み条件に一致する施設IDを返す。
+    設備・駐車場だけの条件はビットマップインデックスで求め、それ以外は正規化した条件ごとに
+    キャッシュする（施設の追加・更新・削除で playground 名前空間ごと無効になる）。
+    一致する施設が MAX_CACHED_FILTER_IDS 件を超える場合は None を返す。
+    """
+    if criteria.keys() <= BITMAP_FILTERS.keys():
+        ids = amenity_index.query(
+            {BITMAP_FILTERS[name]: value for name, value in criteria.items()}
+        )
+        return ids if len(ids) <= MAX_CACHED_FILTER_IDS else None
+
+    def build() -> Optional[list[int]]:
+        ids = list(
+            apply_filter_criteria(Playground.objects.all(), criteria)
+            .order_by("id")
+            .values_list("id", flat=True)[: MAX_CACHED_FILTER_IDS + 1]
+        )
+        return ids if len(ids) <= MAX_CACHED_FILTER_IDS else None
+
+    return caching.get_or_set(
+        caching.PLAYGROUND,
+        ("filter_ids", filter_criteria_key(criteria)),
+        build,
+        FILTER_IDS_TIMEOUT,
+    )
 
 
 class PlaygroundFilterMixin:
@@ -36,64 +176,41 @@ class PlaygroundFilterMixin:
         self.fee_max = self.request.GET.get("fee_max")
         self.parking_info = self.request.GET.get("parking_info")
 
+    def get_filter_criteria(self) -> Dict[str, Any]:
+        """GETリクエストのパラメータを正規化した絞り込み条件を返す"""
+        if not hasattr(self, "_filter_criteria"):
+            self._filter_criteria = normalize_filter_params(self.request.GET)
+        return self._filter_criteria
+
     def get_queryset(self) -> QuerySet[Playground]:
         """
         クエリセットを取得し、フィルタリングパラメータに基づいてフィルタリングします。
+        キーワード以外の条件に一致する施設IDはキャッシュし、主キーでの取得に置き換えます。
         """
         # 親クラスのget_querysetを呼び出す。ListViewを継承していることが前提。
         queryset = super().get_queryset()  # type: ignore
         self._get_filter_params()
+        criteria = self.get_filter_criteria()
 
-        if self.search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=self.search_query)
-                | Q(address__icontains=self.search_query)
-                | Q(description__icontains=self.search_query)
+        if "q" in criteria:
+            # n-gram検索用文書で絞り込み、関連度の高い順に並べる
+            queryset = search_playgrounds(queryset, criteria["q"]).order_by(
+                "-search_rank", "id"
             )
-        if self.selected_city:
-            queryset = queryset.filter(address__icontains=self.selected_city)
-        if self.nursing_room:
-            queryset = queryset.filter(nursing_room_available=True)
-        if self.diaper_changing_station:
-            queryset = queryset.filter(diaper_changing_station_available=True)
-        if self.stroller_accessible:
-            queryset = queryset.filter(stroller_accessible=True)
-
-        if self.lunch_allowed:
-            queryset = queryset.filter(lunch_allowed=True)
-        if self.indoor_play_area:
-            queryset = queryset.filter(indoor_play_area=True)
-        if self.kids_toilet:
-            queryset = queryset.filter(kids_toilet_available=True)
-
-        if self.target_age_min:
-            try:
-                target_age_min_int = int(self.target_age_min)
-                queryset = queryset.filter(target_age_start__gte=target_age_min_int)
-            except (ValueError, TypeError):
-                pass
-        if self.target_age_max:
-            try:
-                target_age_max_int = int(self.target_age_max)
-                queryset = queryset.filter(target_age_end__lte=target_age_max_int)
-            except (ValueError, TypeError):
-                pass
-        if self.fee_min:
-            try:
-                fee_min_decimal = decimal.Decimal(self.fee_min)
-                queryset = queryset.filter(fee_decimal__gte=fee_min_decimal)
-            except (decimal.InvalidOperation, TypeError):
-                pass
-        if self.fee_max:
-            try:
-                fee_max_decimal = decimal.Decimal(self.fee_max)
-                queryset = queryset.filter(fee_decimal__lte=fee_max_decimal)
-            except (decimal.InvalidOperation, TypeError):
-                pass
-
-        if self.parking_info and self.parking_info != "all":
-            queryset = queryset.filter(parking_info=self.parking_info)
-        return queryset
+        conditions = {name: value for name, value in criteria.items() if name != "q"}
+        if not conditions:
+            return queryset
+        ids = get_filtered_ids(conditions)
+        if ids is None:
+            return apply_filter_criteria(queryset, conditions)
+        return queryset.filter(pk__in=ids)
+
+    def get_filter_cache_key(self) -> str:
+        """
+        絞り込み条件を表すキャッシュキー用の文字列を返す。
+        パラメータの順序や表記、絞り込みに関係しないパラメータの有無によらず同じ値になる。
+        """
+        return filter_criteria_key(self.get_filter_criteria())
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """
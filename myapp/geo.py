@@ -0,0 +1,180 @@
+"""
+施設の位置情報による検索。
+
+PostGIS を使わずに範囲検索をインデックスで絞り込むため、施設の緯度・経度を geohash
+（地表を格子状に分割したセルを base32 の文字列で表したもの）に変換して
+Playground.geohash に保存しておく。geohash は前方一致するほど近いセルを表すため、
+検索範囲を覆うセルの geohash で前方一致検索し、最後に緯度・経度で正確に絞り込む。
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.db.models import Q
+
+GEOHASH_PRECISION = 9  # 約5m四方のセル
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+EARTH_RADIUS_KM = 6371.0088
+
+# 1回の範囲検索で前方一致に使うセル数の上限。これ以下になる最も細かい精度を選ぶ
+MAX_COVERING_CELLS = 16
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    """緯度・経度で表した矩形の範囲"""
+
+    south: float
+    west: float
+    north: float
+    east: float
+
+    @property
+    def center(self) -> tuple[float, float]:
+        return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        return (
+            self.south <= latitude <= self.north and self.west <= longitude <= self.east
+        )
+
+
+def encode_geohash(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    """緯度・経度を指定した桁数の geohash に変換する"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # 偶数番目のビットは経度、奇数番目のビットは緯度を二分する
+    while len(chars) < precision:
+        value_range, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """指定した桁数の geohash セル1つ分の (緯度方向, 経度方向) の大きさを度で返す"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(bbox: BoundingBox, max_cells: int = MAX_COVERING_CELLS) -> list[str]:
+    """
+    範囲を覆う geohash セルの一覧を返す。
+    セル数が max_cells 以下になる範囲で、できるだけ細かい精度のセルを使う。
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        rows = math.floor(bbox.north / lat_step) - math.floor(bbox.south / lat_step) + 1
+        cols = math.floor(bbox.east / lng_step) - math.floor(bbox.west / lng_step) + 1
+        if rows * cols <= max_cells or precision == 1:
+            break
+
+    cells: dict[str, None] = {}
+    lat = bbox.south
+    while True:
+        lng = bbox.west
+        while True:
+            cells[encode_geohash(lat, lng, precision)] = None
+            if lng >= bbox.east:
+                break
+            lng = min(lng + lng_step, bbox.east)
+        if lat >= bbox.north:
+            break
+        lat = min(lat + lat_step, bbox.north)
+    return list(cells)
+
+
+def geohash_prefix_q(cells: Iterable[str], field_name: str = "geohash") -> Q:
+    """いずれかのセルに前方一致する条件を組み立てる"""
+    condition = Q()
+    for cell in cells:
+        condition |= Q(**{f"{field_name}__startswith": cell})
+    return condition
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """2地点間の大円距離をkmで返す"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bbox_around(latitude: float, longitude: float, radius_km: float) -> BoundingBox:
+    """中心から半径 radius_km の円を含む矩形を返す"""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return BoundingBox(
+        south=max(latitude - lat_delta, -90.0),
+        west=max(longitude - lng_delta, -180.0),
+        north=min(latitude + lat_delta, 90.0),
+        east=min(longitude + lng_delta, 180.0),
+    )
+
+
+def _parse_floats(value: str) -> list[float]:
+    """カンマ区切りの数値を有限の float のリストに変換する"""
+    try:
+        parts = [float(part) for part in value.split(",")]
+    except ValueError:
+        raise ValueError(f"数値として解釈できない値が含まれています: {value}")
+    if not all(math.isfinite(part) for part in parts):
+        raise ValueError(f"数値として解釈できない値が含まれています: {value}")
+    return parts
+
+
+def parse_bbox(value: str) -> BoundingBox:
+    """
+    "西端の経度,南端の緯度,東端の経度,北端の緯度" 形式（Leaflet の toBBoxString と同じ順序）の
+    文字列を BoundingBox に変換する。不正な値の場合は ValueError を送出する。
+    """
+    parts = _parse_floats(value)
+    if len(parts) != 4:
+        raise ValueError("bbox は west,south,east,north の4つの数値で指定してください")
+    west, south, east, north = parts
+    if south > north or west > east:
+        raise ValueError("bbox の範囲が不正です")
+    return BoundingBox(
+        south=max(south, -90.0),
+        west=max(west, -180.0),
+        north=min(north, 90.0),
+        east=min(east, 180.0),
+    )
+
+
+def parse_point(value: str) -> tuple[float, float]:
+    """緯度,経度 形式の文字列を (緯度, 経度) に変換する。不正な値の場合は ValueError を送出する"""
+    parts = _parse_floats(value)
+    if len(parts) != 2:
+        raise ValueError("near は 緯度,経度 の形式で指定してください")
+    latitude, longitude = parts
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        raise ValueError("near の緯度・経度が範囲外です")
+    return latitude, longitude
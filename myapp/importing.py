@@ -0,0 +1,592 @@
+"""
+施設データの一括取り込み（fetch_playgrounds コマンド）。
+
+CSV・JSON・JSON Lines のファイルから施設の行を1行ずつ読み込み、検証・正規化（myapp.normalization）
+したうえで、batch_size 行ごとに既存の施設（取り込み元の識別子 source_key で照合）と比較して、
+新しい施設は bulk_create、内容が変わった施設は bulk_update でまとめて書き込む。
+各施設には最後に取り込んだ内容のハッシュ (content_hash) を保存しておき、ハッシュが同じ行は
+施設を読み込まずに読み飛ばす。取り込み後に管理画面などで施設を編集しても、取り込み元の内容が
+変わらない限り上書きしない。
+
+bulk_create・bulk_update はシグナルを経由しないため、最後に変更のあった施設に関わるキャッシュだけを
+無効にする。詳細ページ・地図のタイルは施設ごと・タイルごとのスコープ (myapp.caching.bump_scopes) で、
+施設数や絞り込み結果 (playground 名前空間) は施設の追加か、絞り込みに使うフィールドが変わった場合だけ無効にする。
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import hashlib
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+from myapp import caching, clustering, normalization
+from myapp.middleware import LISTING_SCOPE, playground_page_scope
+from myapp.models import Playground
+
+TEXT_FIELDS = (
+    "prefecture",
+    "name",
+    "address",
+    "phone",
+    "description",
+    "website",
+    "google_map_url",
+)
+REQUIRED_FIELDS = ("name", "address")
+FLAG_FIELDS = (
+    "nursing_room_available",
+    "diaper_changing_station_available",
+    "stroller_accessible",
+    "lunch_allowed",
+    "indoor_play_area",
+    "kids_toilet_available",
+)
+# 取り込みで設定する施設のフィールド
+IMPORT_FIELDS = (
+    *TEXT_FIELDS,
+    "latitude",
+    "longitude",
+    *FLAG_FIELDS,
+    "opening_time",
+    "closing_time",
+    "target_age_start",
+    "target_age_end",
+    "fee_decimal",
+    "parking_info",
+    # 取り込み元の表記（正規化の規則を変えたときに renormalize コマンドで変換し直す）
+    "source_values",
+)
+# 変更されたときに作り直すもの・無効にするキャッシュを判定するためのフィールド
+SEARCH_FIELDS = {"name", "address", "description"}
+LOCATION_FIELDS = {"latitude", "longitude"}
+# 施設の絞り込み (myapp.filters) に使うフィールド
+FILTER_FIELDS = {
+    "address",
+    *FLAG_FIELDS,
+    "target_age_start",
+    "target_age_end",
+    "fee_decimal",
+    "parking_info",
+}
+DEFAULT_PREFECTURE = "鹿児島県"
+SOURCE_KEY_MAX_LENGTH = 64
+MAX_REPORTED_ERRORS = 20
+# 変更のあったタイル・ページがこれより多い場合は、名前空間ごと無効にする
+MAX_SCOPED_INVALIDATIONS = 2000
+
+
+class ImportRowError(ValueError):
+    """取り込めない（必須項目がない・値が不正な）行"""
+
+
+@dataclass
+class ImportResult:
+    """取り込みの件数と所要時間"""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def rows(self) -> int:
+        return (
+            self.inserted
+            + self.updated
+            + self.unchanged
+            + self.invalid
+            + self.duplicates
+        )
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def read_rows(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    ファイルから行を1行ずつ読み込む。拡張子で形式を判定する。
+    .csv はヘッダー付きCSV、.jsonl / .ndjson は1行1オブジェクト、.json はオブジェクトの配列。
+    """
+    suffix = path.suffix.lower()
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif suffix in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif suffix == ".json":
+            data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError(f"{path}: JSON はオブジェクトの配列にしてください")
+            yield from data
+        else:
+            raise ValueError(f"{path}: 対応していない形式です（.csv / .json / .jsonl）")
+
+
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    """列の値を前後の空白を除いた文字列で返す。列がない・値がない場合は空文字"""
+    if name not in frame:
+        return pd.Series("", index=frame.index, dtype=object)
+    return normalization.text_column(frame[name]).str.strip()
+
+
+def _optional(values: pd.Series, present: pd.Series) -> pd.Series:
+    """present が偽の要素を None にする"""
+    return values.astype(object).where(present, None)
+
+
+class _Errors:
+    """行ごとの最初のエラーメッセージ"""
+
+    def __init__(self, index: pd.Index):
+        self.messages = pd.Series(None, index=index, dtype=object)
+
+    def add(self, mask: pd.Series, message: "str | pd.Series") -> None:
+        mask = mask & self.messages.isna()
+        if isinstance(message, pd.Series):
+            message = message.reindex(self.messages.index)
+        self.messages = self.messages.mask(mask, message)
+
+
+def _numeric(
+    frame: pd.DataFrame, name: str, low: float, high: float, errors: _Errors
+) -> pd.Series:
+    text = _column(frame, name)
+    present = text != ""
+    value = pd.to_numeric(text.where(present), errors="coerce")
+    errors.add(
+        present & value.isna(), f"{name} は数値で指定してください: '" + text + "'"
+    )
+    errors.add(
+        value.notna() & ~value.between(low, high),
+        f"{name} が範囲外です: " + value.astype(str),
+    )
+    return _optional(value, value.notna())
+
+
+def _integer(
+    frame: pd.DataFrame, name: str, used: pd.Series, errors: _Errors
+) -> pd.Series:
+    text = _column(frame, name)
+    present = used & (text != "")
+    valid = text.str.fullmatch(r"[+-]?\d+")
+    errors.add(present & ~valid, f"{name} は整数で指定してください: '" + text + "'")
+    return _optional(text.where(valid, "0").map(int), present & valid)
+
+
+def normalize_rows(
+    raws: list[dict[str, Any]],
+) -> list["dict[str, Any] | ImportRowError"]:
+    """
+    読み込んだ行をまとめて IMPORT_FIELDS と source_key の値に変換する。
+    検証・変換は pandas の列単位で行う（myapp.normalization）。取り込めない行は ImportRowError を返す。
+
+    - source_key は取り込み元の施設の識別子で、列がない場合は施設名と住所から作る。
+    - 開館時間・対象年齢・料金・駐車場は、opening_hours・target_age・fee・parking の表記でも、
+      フィールドごとの値 (opening_time など) でも指定できる。表記は source_values に保存し、
+      正規化の規則を変えたときに renormalize コマンドで変換し直す。
+    """
+    frame = normalization.records_frame(raws)
+    errors = _Errors(frame.index)
+    columns: dict[str, pd.Series] = {}
+
+    for name in TEXT_FIELDS:
+        text = _column(frame, name)
+        if name in REQUIRED_FIELDS:
+            errors.add(text == "", f"{name} がありません")
+        columns[name] = _optional(text, text != "")
+    columns["prefecture"] = columns["prefecture"].fillna(DEFAULT_PREFECTURE)
+    columns["website"] = columns["website"].fillna("")
+    columns["description"] = columns["description"].fillna("")
+    columns["latitude"] = _numeric(frame, "latitude", -90, 90, errors)
+    columns["longitude"] = _numeric(frame, "longitude", -180, 180, errors)
+    for name in FLAG_FIELDS:
+        if name not in frame:
+            columns[name] = pd.Series(False, index=frame.index, dtype=object)
+            continue
+        columns[name], invalid = normalization.normalize_bool(frame[name])
+        errors.add(
+            invalid,
+            frame[name][invalid].map(
+                lambda v: f"{name}: 真偽値として解釈できません: {v!r}"
+            ),
+        )
+
+    source = {name: _column(frame, name) for name in normalization.SOURCE_COLUMNS}
+    normalized = normalization.normalize_frame(pd.DataFrame(source))
+    has_hours = source["opening_hours"] != ""
+    for name in ("opening_time", "closing_time"):
+        columns[name] = normalized[name].where(
+            has_hours, normalization.normalize_time(_column(frame, name))
+        )
+    has_age = source["target_age"] != ""
+    for name in ("target_age_start", "target_age_end"):
+        columns[name] = normalized[name].where(
+            has_age, _integer(frame, name, ~has_age, errors)
+        )
+
+    fee_decimal = _column(frame, "fee_decimal")
+    has_fee_decimal = fee_decimal != ""
+    valid_fee = fee_decimal.str.fullmatch(r"[+-]?(\d+(\.\d*)?|\.\d+)")
+    errors.add(
+        has_fee_decimal & ~valid_fee,
+        "fee_decimal は数値で指定してください: '" + fee_decimal + "'",
+    )
+    columns["fee_decimal"] = normalized["fee_decimal"].where(
+        ~has_fee_decimal,
+        _optional(fee_decimal.where(valid_fee, "0").map(Decimal), valid_fee),
+    )
+    parking_info = _column(frame, "parking_info")
+    columns["parking_info"] = normalization.normalize_unique(
+        parking_info.where(parking_info != "", source["parking"]),
+        normalization.normalize_parking,
+    )
+
+    # 値を直接指定した項目は、表記を保存しない（renormalize で上書きしないようにする）
+    source["fee"] = source["fee"].where(~has_fee_decimal, "")
+    source["parking"] = source["parking"].where(parking_info == "", "")
+
+    source_key = _column(frame, "source_key")
+    errors.add(
+        source_key.str.len() > SOURCE_KEY_MAX_LENGTH,
+        f"source_key は{SOURCE_KEY_MAX_LENGTH}文字以内で指定してください",
+    )
+
+    # DataFrame.to_dict("records") は遅いため、列のリストから行の辞書を作る
+    names = [name for name in IMPORT_FIELDS if name != "source_values"]
+    records = zip(*(columns[name].tolist() for name in names))
+    source_names = list(source)
+    source_records = zip(*(source[name].tolist() for name in source_names))
+    results: list[dict[str, Any] | ImportRowError] = []
+    for values, source_values, key, error in zip(
+        records, source_records, source_key.tolist(), errors.messages.tolist()
+    ):
+        if isinstance(error, str):
+            results.append(ImportRowError(error))
+            continue
+        row = dict(zip(names, values))
+        row["source_values"] = {
+            name: text for name, text in zip(source_names, source_values) if text
+        }
+        row["source_key"] = key or derive_source_key(row["name"], row["address"])
+        results.append(row)
+    return results
+
+
+def _batched(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    batch: list[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def derive_source_key(name: str, address: str) -> str:
+    """取り込み元に識別子がない場合の source_key（施設名と住所から作る）"""
+    digest = hashlib.sha1(f"{name}\n{address}".encode(), usedforsecurity=False)
+    return f"auto:{digest.hexdigest()}"
+
+
+def _hash_value(value: Any) -> str:
+    if value is None:
+        return "\x00"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return str(value)
+
+
+def content_hash(row: dict[str, Any]) -> str:
+    """正規化した行の IMPORT_FIELDS の値のハッシュ"""
+    canonical = "\x1f".join(_hash_value(row[name]) for name in IMPORT_FIELDS)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _changed_fields(playground: Playground, row: dict[str, Any]) -> list[str]:
+    return [name for name in IMPORT_FIELDS if getattr(playground, name) != row[name]]
+
+
+class _DryRunRollback(Exception):
+    """--dry-run で結果を破棄するためにトランザクションを中断する例外"""
+
+
+@contextmanager
+def atomic_or_dry_run(dry_run: bool) -> Iterator[None]:
+    """
+    ブロックを1つのトランザクションで実行する。dry_run が真なら最後にロールバックする
+    （fetch_playgrounds・renormalize の --dry-run。コミット後に行うキャッシュの無効化も行わない）
+    """
+    try:
+        with transaction.atomic():
+            yield
+            if dry_run:
+                raise _DryRunRollback
+    except _DryRunRollback:
+        pass
+
+
+@dataclass
+class CacheInvalidation:
+    """取り込み・正規化のし直しで無効にするキャッシュ（バッチをまたいで集め、最後にまとめて無効にする）"""
+
+    playgrounds: bool = False
+    tiles: set[str] = field(default_factory=set)
+    pages: set[str] = field(default_factory=set)
+
+    def add_location(self, latitude: Optional[float], longitude: Optional[float]):
+        if latitude is not None and longitude is not None:
+            self.tiles.update(
+                clustering.tile_scope(*tile)
+                for tile in clustering.tiles_containing(latitude, longitude)
+            )
+
+    def apply(self) -> None:
+        if self.playgrounds:
+            caching.bump_namespace(caching.PLAYGROUND)
+        if len(self.pages) > MAX_SCOPED_INVALIDATIONS:
+            caching.bump_namespace(caching.PAGE)
+        else:
+            caching.bump_scopes(caching.PAGE, self.pages)
+        if len(self.tiles) > MAX_SCOPED_INVALIDATIONS:
+            caching.bump_namespace(caching.TILE)
+        else:
+            caching.bump_scopes(caching.TILE, self.tiles)
+
+
+def _find_existing(rows: list[dict[str, Any]]) -> dict[str, tuple[int, str]]:
+    """
+    行の source_key に対応する既存の施設の (ID, 内容のハッシュ) を返す。
+    source_key のない施設（手動で登録した施設や、source_key の導入前に取り込んだ施設）は
+    施設名と住所で照合する（同じ施設名・住所の施設が複数ある場合は最も古いもの）。
+    """
+    existing = {
+        key: (pk, digest)
+        for pk, key, digest in Playground.objects.filter(
+            source_key__in=[row["source_key"] for row in rows]
+        ).values_list("id", "source_key", "content_hash")
+    }
+    unmatched = {
+        (row["name"], row["address"]): row["source_key"]
+        for row in rows
+        if row["source_key"] not in existing
+    }
+    if unmatched:
+        legacy = (
+            Playground.objects.filter(
+                source_key__isnull=True, name__in={name for name, _ in unmatched}
+            )
+            .order_by("-id")
+            .values_list("id", "name", "address")
+        )
+        for pk, name, address in legacy:
+            key = unmatched.get((name, address))
+            if key is not None:
+                existing[key] = (pk, "")
+    return existing
+
+
+def apply_batch(
+    rows: list[dict[str, Any]], result: ImportResult, invalidation: CacheInvalidation
+) -> None:
+    """
+    正規化した行を既存の施設と比較し、追加・更新をまとめて書き込む。
+
+    - 内容のハッシュが前回の取り込みと同じ行は、施設を読み込まずに変更なしとする。
+    - 更新は変更のあったフィールドだけを書き込む（変更したフィールドの組み合わせごとに bulk_update）。
+      検索用文書・geohash は、施設名・住所・説明や位置が変わった場合だけ作り直す。
+    - バッチ内に同じ施設 (source_key) の行が複数ある場合は最後の行を使い、残りは重複として数える。
+    """
+    unique = {row["source_key"]: row for row in rows}
+    result.duplicates += len(rows) - len(unique)
+    rows = list(unique.values())
+    existing = _find_existing(rows)
+
+    to_create: list[Playground] = []
+    to_compare: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        digest = content_hash(row)
+        match = existing.get(row["source_key"])
+        if match is None:
+            playground = Playground(**row, content_hash=digest)
+            playground.refresh_search_document()
+            playground.refresh_geohash()
+            to_create.append(playground)
+        elif match[1] == digest:
+            result.unchanged += 1
+        else:
+            to_compare[match[0]] = {**row, "content_hash": digest}
+
+    # 変更したフィールドの組み合わせ → 施設
+    updates: dict[frozenset[str], list[Playground]] = defaultdict(list)
+    now = timezone.now()
+    for pk, playground in Playground.objects.in_bulk(list(to_compare)).items():
+        row = to_compare[pk]
+        changed = _changed_fields(playground, row)
+        fields = {"source_key", "content_hash", *changed}
+        playground.source_key = row["source_key"]
+        playground.content_hash = row["content_hash"]
+        if not changed:
+            # 内容は同じで、source_key・ハッシュだけを記録する
+            result.unchanged += 1
+            updates[frozenset(fields)].append(playground)
+            continue
+        old_location = (playground.latitude, playground.longitude)
+        for name in changed:
+            setattr(playground, name, row[name])
+        result.updated += 1
+        if changed == ["source_values"]:
+            # 表記だけが変わり、正規化した値は同じ
+            updates[frozenset(fields)].append(playground)
+            continue
+        if SEARCH_FIELDS.intersection(changed):
+            playground.refresh_search_document()
+            fields.add("search_document")
+        if LOCATION_FIELDS.intersection(changed):
+            playground.refresh_geohash()
+            fields.add("geohash")
+        playground.updated_at = now
+        fields.add("updated_at")
+        updates[frozenset(fields)].append(playground)
+
+        invalidation.playgrounds |= bool(FILTER_FIELDS.intersection(changed))
+        invalidation.pages.update((LISTING_SCOPE, playground_page_scope(playground.pk)))
+        invalidation.add_location(*old_location)
+        invalidation.add_location(playground.latitude, playground.longitude)
+
+    if to_create or updates:
+        with transaction.atomic():
+            if to_create:
+                Playground.objects.bulk_create(to_create)
+            for fields, playgrounds in updates.items():
+                Playground.objects.bulk_update(playgrounds, sorted(fields))
+    result.inserted += len(to_create)
+    if to_create:
+        invalidation.playgrounds = True
+        invalidation.pages.add(LISTING_SCOPE)
+        for playground in to_create:
+            invalidation.add_location(playground.latitude, playground.longitude)
+
+
+def import_playgrounds(
+    sources: Iterable[Path],
+    batch_size: int = 1000,
+    progress=None,
+) -> ImportResult:
+    """
+    ファイルから施設を取り込み、件数と所要時間を返す。
+    progress を指定すると、バッチごとに途中の ImportResult を渡して呼び出す。
+    """
+    result = ImportResult()
+    invalidation = CacheInvalidation()
+    started = time.perf_counter()
+
+    def numbered_rows() -> Iterator[tuple[str, dict[str, Any]]]:
+        for path in sources:
+            for line, raw in enumerate(read_rows(Path(path)), start=1):
+                yield f"{path}:{line}", raw
+
+    for batch in _batched(numbered_rows(), batch_size):
+        rows = []
+        for (location, _), row in zip(batch, normalize_rows([raw for _, raw in batch])):
+            if isinstance(row, ImportRowError):
+                result.invalid += 1
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append(f"{location}: {row}")
+            else:
+                rows.append(row)
+        if rows:
+            apply_batch(rows, result, invalidation)
+        result.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(result)
+
+    # コミット前に無効にすると、その間に読み込んだ取り込み前の施設が新しいバージョンのキャッシュに入る。
+    # ロールバックした場合 (--dry-run) は無効にしない
+    transaction.on_commit(invalidation.apply)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def renormalize_playgrounds(batch_size: int = 5000, progress=None) -> ImportResult:
+    """
+    取り込み時に保存した表記 (source_values) から、開館時間・対象年齢・料金・駐車場を変換し直す。
+    batch_size 件ずつ列単位でまとめて変換し、値が変わった施設のそのフィールドだけを書き込む。
+    """
+    result = ImportResult()
+    invalidation = CacheInvalidation()
+    started = time.perf_counter()
+    fields = [name for names in normalization.SOURCE_COLUMNS.values() for name in names]
+    queryset = Playground.objects.exclude(source_values={}).order_by("id")
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).values(
+                "id", "source_values", "latitude", "longitude", *fields
+            )[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        normalized = normalization.normalize_frame(
+            normalization.records_frame([row["source_values"] for row in rows])
+        ).to_dict("records")
+
+        updates: dict[frozenset[str], list[Playground]] = defaultdict(list)
+        now = timezone.now()
+        for row, values in zip(rows, normalized):
+            # 行ごとに、表記を保存している項目のフィールドだけを比較する
+            changed = {
+                name: values[name]
+                for column in row["source_values"]
+                for name in normalization.SOURCE_COLUMNS.get(column, ())
+                if row[name] != values[name]
+            }
+            if not changed:
+                result.unchanged += 1
+                continue
+            result.updated += 1
+            updates[frozenset([*changed, "updated_at"])].append(
+                Playground(pk=row["id"], updated_at=now, **changed)
+            )
+            invalidation.playgrounds |= bool(FILTER_FIELDS.intersection(changed))
+            invalidation.pages.update((LISTING_SCOPE, playground_page_scope(row["id"])))
+            invalidation.add_location(row["latitude"], row["longitude"])
+
+        if updates:
+            with transaction.atomic():
+                for names, playgrounds in updates.items():
+                    Playground.objects.bulk_update(playgrounds, sorted(names))
+        result.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(result)
+
+    # 取り込みと同じく、コミット後に無効にする
+    transaction.on_commit(invalidation.apply)
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from myapp.bitmap_index import FLAG_FIELDS, AmenityBitmapIndex
+from myapp.models import Playground
+
+PARKING_VALUES = [value for value, _ in Playground.PARKING_CHOICES]
+
+
+class _Rollback(Exception):
+    """ベンチマーク用のデータを破棄するためにトランザクションを中断する例外"""
+
+
+class Command(BaseCommand):
+    """
+    設備・駐車場の絞り込みのベンチマークを行うコマンド。
+    指定した件数のダミー施設をトランザクション内で作成し、従来の ORM での絞り込み
+    （.filter() の連鎖）とビットマップインデックス (myapp.bitmap_index) で一致する施設IDを
+    求める時間を比較する。作成したデータは最後にロールバックする。
+    """
+
+    help = "Benchmarks amenity filters: chained ORM filters vs the bitmap index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000],
+            help="ベンチマークする施設数（複数指定可）",
+        )
+        parser.add_argument(
+            "--combinations", type=int, default=20, help="計測する条件の組み合わせの数"
+        )
+        parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.stdout.write(
+            f"{'size':>8} {'engine':>8} {'median(ms)':>11} {'p95(ms)':>9} {'hits':>8}"
+        )
+        for size in options["sizes"]:
+            conditions = [
+                self._random_condition(rng) for _ in range(options["combinations"])
+            ]
+            try:
+                with transaction.atomic():
+                    self._seed(size, rng)
+                    index = AmenityBitmapIndex()
+                    started = time.perf_counter()
+                    index.build()
+                    build_ms = (time.perf_counter() - started) * 1000
+                    self._report(size, "orm", self._query_orm, conditions)
+                    self._report(size, "bitmap", index.query, conditions)
+                    self.stdout.write(f"{size:>8} {'build':>8} {build_ms:>11.2f}")
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _seed(self, size: int, rng: random.Random) -> None:
+        playgrounds = [
+            Playground(
+                prefecture="鹿児島県",
+                name=f"施設 {i}",
+                parking_info=rng.choice(PARKING_VALUES),
+                **{field: rng.random() < 0.5 for field in FLAG_FIELDS},
+            )
+            for i in range(size)
+        ]
+        Playground.objects.bulk_create(playgrounds, batch_size=5000)
+
+    @staticmethod
+    def _random_condition(rng: random.Random) -> dict:
+        fields = rng.sample(FLAG_FIELDS, rng.randint(1, 4))
+        condition = {field: True for field in fields}
+        if rng.random() < 0.5:
+            condition["parking_info"] = rng.choice(PARKING_VALUES)
+        return condition
+
+    @staticmethod
+    def _query_orm(condition: dict) -> list[int]:
+        queryset = Playground.objects.all()
+        for field, value in condition.items():
+            queryset = queryset.filter(**{field: value})
+        return list(queryset.order_by("id").values_list("id", flat=True))
+
+    def _report(self, size, engine, query, conditions) -> None:
+        timings = []
+        hits = 0
+        for condition in conditions:
+            started = time.perf_counter()
+            result = query(condition)
+            timings.append((time.perf_counter() - started) * 1000)
+            hits += len(result)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f"{size:>8} {engine:>8} {statistics.median(timings):>11.2f} "
+            f"{p95:>9.2f} {hits:>8}"
+        )
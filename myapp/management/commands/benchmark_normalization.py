@@ -0,0 +1,95 @@
+import random
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from myapp import normalization
+
+HOURS = (
+    "{h}:00〜{c}:00",
+    "{h}:30-{c}:30",
+    "{h}時〜{c}時",
+    "{h}時30分~{c}時",
+    "{h}:00",
+    "終日",
+    "",
+)
+AGES = ("{a}歳〜{b}歳", "{a}歳から", "どなたでも", "小学生({a}-{b}歳)", "")
+FEES = ("無料", "大人 {fee}円", "{fee},000円", "入場無料 駐車場{fee}円", "有料", "")
+PARKINGS = ("あり", "なし", "有料", "あり（有料）", "FREE", "")
+
+
+class Command(BaseCommand):
+    """
+    開館時間・対象年齢・料金・駐車場の正規化のベンチマークを行うコマンド。
+    マイグレーション 0009 と同じ1行ずつの変換 (parse_*) と、pandas の列単位の変換
+    (normalize_frame) の処理時間を比較し、両者の結果が一致することを確認する。
+    列単位の変換は変換後の列を作るまでを計測し、データベースへの書き込みは含まない。
+    """
+
+    help = "Benchmarks per-row vs pandas vectorized normalization of facility source values."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="正規化する行数")
+        parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+
+    def handle(self, *args, **options):
+        rows = self._generate(options["rows"], random.Random(options["seed"]))
+
+        started = time.perf_counter()
+        expected = [self._normalize_row(row) for row in rows]
+        per_row = time.perf_counter() - started
+
+        started = time.perf_counter()
+        frame = pd.DataFrame.from_records(rows)
+        normalized = normalization.normalize_frame(frame)
+        vectorized = time.perf_counter() - started
+
+        actual = normalized.to_dict("records")
+        mismatches = sum(1 for a, b in zip(actual, expected) if a != b)
+        count = len(rows)
+        self.stdout.write(f"{'engine':>12} {'seconds':>9} {'rows/s':>12}")
+        for engine, seconds in (("per-row", per_row), ("vectorized", vectorized)):
+            self.stdout.write(
+                f"{engine:>12} {seconds:>9.3f} {count / seconds if seconds else 0:>12,.0f}"
+            )
+        self.stdout.write(f"speedup: {per_row / vectorized:.1f}x")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{mismatches} rows differ"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Results are identical."))
+
+    @staticmethod
+    def _generate(count: int, rng: random.Random) -> list[dict]:
+        rows = []
+        for _ in range(count):
+            opening = rng.randint(6, 11)
+            age = rng.randint(0, 6)
+            rows.append(
+                {
+                    "opening_hours": rng.choice(HOURS).format(
+                        h=opening, c=opening + rng.randint(4, 10)
+                    ),
+                    "target_age": rng.choice(AGES).format(
+                        a=age, b=age + rng.randint(2, 9)
+                    ),
+                    "fee": rng.choice(FEES).format(fee=rng.randint(1, 9) * 100),
+                    "parking": rng.choice(PARKINGS),
+                }
+            )
+        return rows
+
+    @staticmethod
+    def _normalize_row(row: dict) -> dict:
+        opening_time, closing_time = normalization.parse_opening_hours(
+            row["opening_hours"]
+        )
+        age_start, age_end = normalization.parse_target_age(row["target_age"])
+        return {
+            "opening_time": opening_time,
+            "closing_time": closing_time,
+            "target_age_start": age_start,
+            "target_age_end": age_end,
+            "fee_decimal": normalization.parse_fee(row["fee"]),
+            "parking_info": normalization.parse_parking(row["parking"]),
+        }
@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from myapp.models import Playground
+from myapp.search import build_search_document, search_playgrounds
+
+CITIES = ["鹿児島市", "霧島市", "鹿屋市", "薩摩川内市", "姶良市", "指宿市", "奄美市"]
+KINDS = [
+    "公園",
+    "児童館",
+    "子育て支援センター",
+    "ふれあい広場",
+    "キッズランド",
+    "図書館",
+]
+WORDS = ["こども", "ひまわり", "さくら", "森の", "みなと", "たんぽぽ", "緑の", "中央"]
+QUERIES = ["公園", "ひまわり", "鹿児島", "子育て支援", "キッズ", "森の広場"]
+
+
+class _Rollback(Exception):
+    """ベンチマーク用のデータを破棄するためにトランザクションを中断する例外"""
+
+
+class Command(BaseCommand):
+    """
+    キーワード検索のベンチマークを行うコマンド。
+    指定した件数のダミー施設をトランザクション内で作成し、従来の icontains 検索と
+    n-gram検索 (myapp.search) の応答時間を比較する。作成したデータは最後にロールバックする。
+    """
+
+    help = "Benchmarks keyword search latency against synthetic playgrounds."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000],
+            help="ベンチマークする施設数（複数指定可）",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="1つの検索語あたりの計測回数"
+        )
+        parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        self.stdout.write(
+            f"{'size':>8} {'engine':>10} {'median(ms)':>11} {'p95(ms)':>9} {'hits':>7}"
+        )
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    self._seed(size, rng)
+                    for engine, search in (
+                        ("icontains", self._search_icontains),
+                        ("ngram", self._search_ngram),
+                    ):
+                        self._report(size, engine, search, options["repeat"])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _seed(self, size: int, rng: random.Random) -> None:
+        playgrounds = []
+        for i in range(size):
+            name = f"{rng.choice(WORDS)}{rng.choice(KINDS)} {i}"
+            address = f"鹿児島県{rng.choice(CITIES)}{rng.randint(1, 30)}丁目"
+            description = f"{rng.choice(WORDS)}{rng.choice(KINDS)}で遊べる施設です。"
+            playgrounds.append(
+                Playground(
+                    prefecture="鹿児島県",
+                    name=name,
+                    address=address,
+                    description=description,
+                    search_document=build_search_document(name, address, description),
+                )
+            )
+        Playground.objects.bulk_create(playgrounds, batch_size=5000)
+
+    @staticmethod
+    def _search_icontains(query: str) -> list[int]:
+        queryset = Playground.objects.filter(
+            Q(name__icontains=query)
+            | Q(address__icontains=query)
+            | Q(description__icontains=query)
+        )
+        return list(queryset.order_by("id").values_list("id", flat=True)[:24])
+
+    @staticmethod
+    def _search_ngram(query: str) -> list[int]:
+        queryset = search_playgrounds(Playground.objects.all(), query)
+        return list(
+            queryset.order_by("-search_rank", "id").values_list("id", flat=True)[:24]
+        )
+
+    def _report(self, size, engine, search, repeat) -> None:
+        timings = []
+        hits = 0
+        for query in QUERIES:
+            for attempt in range(repeat):
+                started = time.perf_counter()
+                result = search(query)
+                timings.append((time.perf_counter() - started) * 1000)
+                if attempt == 0:
+                    hits += len(result)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f"{size:>8} {engine:>10} {statistics.median(timings):>11.2f} "
+            f"{p95:>9.2f} {hits:>7}"
+        )
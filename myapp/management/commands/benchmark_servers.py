@@ -0,0 +1,246 @@
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.middleware.csrf import CSRF_SECRET_LENGTH
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from myapp.models import Playground
+
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+# gunicorn の起動方法（scripts/start.sh と同じ）
+SERVERS = {
+    "wsgi": ["mysite.wsgi:application"],
+    "asgi": [
+        "--worker-class",
+        "uvicorn_worker.UvicornWorker",
+        "mysite.asgi:application",
+    ],
+}
+# 操作の種類と割合（お気に入り追加・お気に入り削除・口コミ投稿）
+OPERATIONS = (("add_favorite", 5), ("remove_favorite", 3), ("add_review", 2))
+
+
+class Command(BaseCommand):
+    """
+    WSGI と ASGI のサーバーの負荷試験を行うコマンド。
+    ベンチマーク用のユーザーを作成してログインし、gunicorn を sync ワーカー (mysite.wsgi) と
+    uvicorn ワーカー (mysite.asgi) で順に起動して、お気に入りの追加・削除と口コミの投稿を
+    --concurrency 件同時に送り、スループット (req/s) と応答時間の p50 / p99 を比較する。
+    書き込みが同時に発生するため PostgreSQL で実行する（SQLite ではロック待ちのエラーになる）。
+    作成したユーザーとそのお気に入り・口コミは最後に削除する。
+    """
+
+    help = "Load-tests WSGI vs ASGI gunicorn servers with concurrent favorite/review requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modes",
+            nargs="+",
+            choices=list(SERVERS),
+            default=list(SERVERS),
+            help="計測するサーバー",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=2, help="gunicorn のワーカー数"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="同時に送るリクエスト数"
+        )
+        parser.add_argument(
+            "--requests", type=int, default=2000, help="計測するリクエスト数"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=100, help="計測前に送るリクエスト数"
+        )
+        parser.add_argument(
+            "--users", type=int, default=50, help="ベンチマーク用のユーザー数"
+        )
+        parser.add_argument(
+            "--port", type=int, help="サーバーのポート（省略時は空きポート）"
+        )
+        parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+
+    def handle(self, *args, **options):
+        if min(options["workers"], options["concurrency"], options["requests"]) < 1:
+            raise CommandError(
+                "--workers・--concurrency・--requests は1以上で指定してください"
+            )
+        playground_ids = list(
+            Playground.objects.order_by("id").values_list("id", flat=True)[:1000]
+        )
+        if not playground_ids:
+            raise CommandError("施設がありません。先に seed_data で作成してください")
+
+        sessions = self._login_users(options["users"])
+        rng = random.Random(options["seed"])
+        self.stdout.write(
+            f"{'server':>6} {'requests':>9} {'errors':>7} {'seconds':>8} "
+            f"{'req/s':>8} {'p50(ms)':>8} {'p99(ms)':>8}"
+        )
+        try:
+            for mode in options["modes"]:
+                port = options["port"] or self._free_port()
+                with self._server(mode, port, options["workers"]):
+                    url = f"http://127.0.0.1:{port}"
+                    asyncio.run(
+                        self._load(
+                            url, sessions, playground_ids, options["warmup"], rng, 1
+                        )
+                    )
+                    started = time.perf_counter()
+                    timings, errors = asyncio.run(
+                        self._load(
+                            url,
+                            sessions,
+                            playground_ids,
+                            options["requests"],
+                            rng,
+                            options["concurrency"],
+                        )
+                    )
+                    self._report(mode, timings, errors, time.perf_counter() - started)
+        finally:
+            get_user_model().objects.filter(
+                email__endswith=f"@{BENCH_EMAIL_DOMAIN}"
+            ).delete()
+
+    @staticmethod
+    def _login_users(count: int) -> list[dict[str, str]]:
+        """ベンチマーク用のユーザーを作成してログインし、リクエストに付ける Cookie とヘッダーを返す"""
+        User = get_user_model()
+        User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").delete()
+        sessions = []
+        for i in range(count):
+            user = User.objects.create_user(
+                email=f"bench{i}@{BENCH_EMAIL_DOMAIN}",
+                password=None,
+                account_name=f"bench{i}",
+            )
+            client = Client()
+            client.force_login(user)
+            session_id = client.cookies[settings.SESSION_COOKIE_NAME].value
+            csrf_token = get_random_string(CSRF_SECRET_LENGTH)
+            sessions.append(
+                {
+                    "Cookie": f"{settings.SESSION_COOKIE_NAME}={session_id}; "
+                    f"{settings.CSRF_COOKIE_NAME}={csrf_token}",
+                    "X-CSRFToken": csrf_token,
+                    "X-Requested-With": "XMLHttpRequest",
+                }
+            )
+        return sessions
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    @contextmanager
+    def _server(self, mode: str, port: int, workers: int):
+        """gunicorn を起動し、応答するようになってから制御を戻す"""
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+                *SERVERS[mode],
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        )
+        try:
+            self._wait_until_ready(process, f"http://127.0.0.1:{port}")
+            yield
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    @staticmethod
+    def _wait_until_ready(process: subprocess.Popen, url: str, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError("サーバーの起動に失敗しました")
+            try:
+                httpx.get(f"{url}{reverse('myapp:about')}", timeout=1)
+                return
+            except httpx.TransportError:
+                time.sleep(0.2)
+        raise CommandError(f"サーバーが {timeout:.0f} 秒以内に応答しませんでした")
+
+    @staticmethod
+    async def _load(
+        url: str,
+        sessions: list[dict[str, str]],
+        playground_ids: list[int],
+        count: int,
+        rng: random.Random,
+        concurrency: int,
+    ) -> tuple[list[float], int]:
+        """count 件のリクエストを concurrency 件ずつ同時に送り、(応答時間のリスト, エラー数) を返す"""
+        names, weights = zip(*OPERATIONS)
+        requests = []
+        for _ in range(count):
+            operation = rng.choices(names, weights)[0]
+            playground_id = rng.choice(playground_ids)
+            if operation == "add_review":
+                path = reverse(
+                    "myapp:add_review", kwargs={"playground_id": playground_id}
+                )
+                data = {"content": "ベンチマーク", "rating": rng.randint(1, 5)}
+            else:
+                path = reverse(f"myapp:{operation}")
+                data = {"playground_id": playground_id}
+            requests.append((path, data, rng.choice(sessions)))
+
+        timings: list[float] = []
+        errors = 0
+        queue: asyncio.Queue = asyncio.Queue()
+        for request in requests:
+            queue.put_nowait(request)
+
+        async def worker(client: httpx.AsyncClient):
+            nonlocal errors
+            while not queue.empty():
+                path, data, headers = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    response = await client.post(path, data=data, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                timings.append((time.perf_counter() - started) * 1000)
+
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return timings, errors
+
+    def _report(self, mode: str, timings: list[float], errors: int, seconds: float):
+        timings.sort()
+        p99 = timings[max(0, int(len(timings) * 0.99) - 1)]
+        self.stdout.write(
+            f"{mode:>6} {len(timings):>9} {errors:>7} {seconds:>8.2f} "
+            f"{len(timings) / seconds:>8.1f} {statistics.median(timings):>8.1f} "
+            f"{p99:>8.1f}"
+        )
@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from myapp import caching
+
+
+class Command(BaseCommand):
+    """
+    キャッシュの名前空間 (playground / review / ranking / page) ごとのヒット率とキーの件数を表示するコマンド。
+    キーの件数はキーを列挙できるバックエンド (Redis / locmem / db) でのみ表示する。
+    ヒット・ミスの回数は、PROMETHEUS_MULTIPROC_DIR を設定して起動したワーカー（scripts/start.sh）の合計。
+    このコマンドのプロセス自身は回数を持たないため、PROMETHEUS_MULTIPROC_DIR が設定されていなければエラーにする。
+    """
+
+    help = "Shows cache hit rate and key counts per namespace."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the hit/miss counters after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            raise CommandError(
+                "PROMETHEUS_MULTIPROC_DIR が設定されていないため、ワーカーのヒット・ミスの回数を読めません。"
+                "ワーカーと同じディレクトリを指定して実行してください"
+            )
+        self.stdout.write(f"Backend: {settings.CACHES['default']['BACKEND']}")
+        self.stdout.write(
+            f"{'namespace':<12}{'version':>22}{'hits':>10}{'misses':>10}"
+            f"{'hit rate':>10}{'keys':>8}{'stale':>8}"
+        )
+        for namespace in caching.NAMESPACES:
+            stats = caching.get_stats(namespace)
+            hit_rate = stats["hit_rate"]
+            keys = stats["keys"]
+            all_keys = stats["all_versions_keys"]
+            self.stdout.write(
+                f"{namespace:<12}{stats['version']:>22}{stats['hits']:>10}"
+                f"{stats['misses']:>10}"
+                f"{'-' if hit_rate is None else f'{hit_rate:.1%}':>10}"
+                f"{'n/a' if keys is None else keys:>8}"
+                f"{'n/a' if all_keys is None else all_keys - keys:>8}"
+            )
+            if options["reset"]:
+                caching.reset_stats(namespace)
+        if options["reset"]:
+            self.stdout.write(self.style.SUCCESS("Reset hit/miss counters."))
@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, QuerySet
+from myapp.filters import apply_filter_criteria
+from myapp.geo import BoundingBox, covering_cells, geohash_prefix_q
+from myapp.models import Favorite, Playground, Review
+from myapp.search import search_playgrounds
+
+
+def hot_queries(playground_id: int, user_id: int) -> dict[str, QuerySet]:
+    """ビューが発行する主なクエリ（名前 → QuerySet）を返す"""
+    playgrounds = Playground.objects.all()
+    reviews = (
+        Review.objects.filter(playground_id=playground_id)
+        .select_related("user")
+        .order_by("-created_at")
+    )
+    kagoshima = BoundingBox(south=31.4, west=130.4, north=31.7, east=130.7)
+    return {
+        # 施設一覧 (PlaygroundListView)
+        "list_first_page": playgrounds.order_by("id")[:25],
+        "list_filter_amenity": playgrounds.filter(nursing_room_available=True).order_by(
+            "id"
+        )[:25],
+        "list_filter_parking": playgrounds.filter(parking_info="FREE").order_by("id")[
+            :25
+        ],
+        "list_filter_age_fee": apply_filter_criteria(
+            playgrounds, {"target_age_min": 3, "fee_max": Decimal("500")}
+        ).order_by("id")[:25],
+        "list_keyword_search": search_playgrounds(playgrounds, "公園").order_by(
+            "-search_rank", "id"
+        )[:25],
+        # 地図 (PlaygroundMapDataView / PlaygroundClusterTileView)
+        "map_bbox": playgrounds.filter(
+            geohash_prefix_q(covering_cells(kagoshima)),
+            latitude__range=(kagoshima.south, kagoshima.north),
+            longitude__range=(kagoshima.west, kagoshima.east),
+        ),
+        # 施設詳細・口コミ一覧 (FacilityDetailView / ReviewListView)
+        "detail_recent_reviews": reviews[:11],
+        "review_list_page": reviews[10:20],
+        "detail_version": Playground.objects.filter(pk=playground_id)
+        .annotate(latest_review_at=Max("reviews__created_at"))
+        .values_list("updated_at", "latest_review_at", "review_count", "rating_sum"),
+        # ランキング (RankingListView)
+        "ranking_snapshot": Playground.objects.filter(review_count__gt=0)
+        .order_by()
+        .values_list("id", "review_count", "rating_sum"),
+        "ranking_by_rating": Playground.objects.get_by_rating_rank()[:20],
+        # お気に入り
+        "favorite_ids": Favorite.objects.filter(user_id=user_id).values_list(
+            "playground_id", flat=True
+        ),
+    }
+
+
+class Command(BaseCommand):
+    """
+    ビューが発行する主なクエリの実行計画 (EXPLAIN) を表示するコマンド。
+    インデックスの追加・削除やクエリの変更で、全件走査になっていないかを確認する。
+    """
+
+    help = "Prints EXPLAIN plans for the hot view queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names", nargs="*", help="表示するクエリの名前（省略時はすべて）"
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="実際に実行して計測する (PostgreSQL の EXPLAIN ANALYZE)",
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="クエリの名前の一覧を表示する"
+        )
+
+    def handle(self, *args, **options):
+        playground_id = Playground.objects.values_list("id", flat=True).first() or 0
+        user_id = Favorite.objects.values_list("user_id", flat=True).first() or 0
+        queries = hot_queries(playground_id, user_id)
+        if options["list"]:
+            for name in queries:
+                self.stdout.write(name)
+            return
+
+        names = options["names"] or list(queries)
+        unknown = [name for name in names if name not in queries]
+        if unknown:
+            raise CommandError(f"Unknown query: {', '.join(unknown)}")
+
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name} =="))
+            self.stdout.write(str(queries[name].query))
+            self.stdout.write(queries[name].explain(**explain_options))
+            self.stdout.write("")
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from myapp import importing
+
+
+class Command(BaseCommand):
+    """
+    施設データのファイル（CSV・JSON・JSON Lines）を取り込むコマンド。
+    ファイルを指定しない場合は settings.PLAYGROUND_IMPORT_SOURCES のファイルを取り込む（cron から毎月実行）。
+    行を検証・正規化して既存の施設と比較し、追加・更新をバッチごとにまとめて書き込み、
+    追加・更新・変更なし・不正な行の件数と処理速度 (rows/s) を表示する。
+    """
+
+    help = (
+        "Imports playgrounds from CSV/JSON files, upserting only new and changed rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="取り込むファイル（省略時は PLAYGROUND_IMPORT_SOURCES）",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="1回に比較・書き込みする行数"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="件数だけを表示し、取り込み結果をロールバックする",
+        )
+
+    def handle(self, *args, **options):
+        paths = [
+            Path(path)
+            for path in options["paths"] or settings.PLAYGROUND_IMPORT_SOURCES
+        ]
+        if not paths:
+            raise CommandError(
+                "取り込むファイルを指定するか、PLAYGROUND_IMPORT_SOURCES を設定してください"
+            )
+        missing = [str(path) for path in paths if not path.is_file()]
+        if missing:
+            raise CommandError(f"ファイルが見つかりません: {', '.join(missing)}")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size は1以上で指定してください")
+
+        try:
+            with importing.atomic_or_dry_run(options["dry_run"]):
+                result = importing.import_playgrounds(
+                    paths, options["batch_size"], self._report_progress
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: changes were rolled back."))
+
+        for error in result.errors:
+            self.stderr.write(f"  {error}")
+        self.stdout.write(
+            f"inserted={result.inserted} updated={result.updated} "
+            f"unchanged={result.unchanged} invalid={result.invalid} "
+            f"duplicates={result.duplicates} "
+            f"({result.rows} rows in {result.seconds:.2f}s, "
+            f"{result.rows_per_second:,.0f} rows/s)"
+        )
+        self.stdout.write(self.style.SUCCESS("Successfully imported playgrounds."))
+
+    def _report_progress(self, result: importing.ImportResult):
+        self.stdout.write(
+            f"  {result.rows} rows: +{result.inserted} ~{result.updated} "
+            f"={result.unchanged} !{result.invalid} "
+            f"({result.rows_per_second:,.0f} rows/s)"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from myapp.models import Playground
+
+
+class Command(BaseCommand):
+    """
+    全施設の評価集計 (review_count / rating_sum / avg_rating) を口コミから作り直すコマンド。
+    bulk_create や raw SQL など、シグナルを経由せずに口コミを登録・削除した後に実行する。
+    """
+
+    help = "Rebuilds review_count, rating_sum and avg_rating of every playground."
+
+    def handle(self, *args, **options):
+        updated = Playground.objects.recalculate_rating_aggregates()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt rating aggregates for {updated} playgrounds.")
+        )
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from myapp.models import Playground
+
+
+class Command(BaseCommand):
+    """
+    全施設のキーワード検索用文書 (search_document) と範囲検索用の geohash を作り直すコマンド。
+    bulk_create / bulk_update など save() を経由せずに施設を登録・更新した後に実行する。
+    """
+
+    help = "Rebuilds the n-gram search document and geohash of every playground."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="1回のUPDATEでまとめて更新する件数",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        batch: list[Playground] = []
+        updated = 0
+        queryset = Playground.objects.only(
+            "id",
+            "name",
+            "address",
+            "description",
+            "latitude",
+            "longitude",
+            "search_document",
+            "geohash",
+        ).order_by("id")
+        for playground in queryset.iterator(chunk_size=batch_size):
+            playground.refresh_search_document()
+            playground.refresh_geohash()
+            batch.append(playground)
+            if len(batch) >= batch_size:
+                Playground.objects.bulk_update(batch, ["search_document", "geohash"])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Playground.objects.bulk_update(batch, ["search_document", "geohash"])
+            updated += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt search documents and geohashes for {updated} playgrounds."
+            )
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp import importing
+
+
+class Command(BaseCommand):
+    """
+    取り込み時に保存した表記から、施設の開館時間・対象年齢・料金・駐車場を正規化し直すコマンド。
+    myapp.normalization の変換規則を変更した後に実行する。変換は pandas の列単位でまとめて行い、
+    値が変わった施設だけを書き込んで、更新・変更なしの件数と処理速度 (rows/s) を表示する。
+    """
+
+    help = "Re-derives opening hours, target age, fee and parking from the imported source values."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="1回に変換・書き込みする件数"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="件数だけを表示し、結果をロールバックする",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size は1以上で指定してください")
+        with importing.atomic_or_dry_run(options["dry_run"]):
+            result = importing.renormalize_playgrounds(
+                options["batch_size"], self._report_progress
+            )
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: changes were rolled back."))
+
+        self.stdout.write(
+            f"updated={result.updated} unchanged={result.unchanged} "
+            f"({result.rows} rows in {result.seconds:.2f}s, "
+            f"{result.rows_per_second:,.0f} rows/s)"
+        )
+        self.stdout.write(self.style.SUCCESS("Successfully renormalized playgrounds."))
+
+    def _report_progress(self, result: importing.ImportResult):
+        self.stdout.write(
+            f"  {result.rows} rows: ~{result.updated} ={result.unchanged} "
+            f"({result.rows_per_second:,.0f} rows/s)"
+        )
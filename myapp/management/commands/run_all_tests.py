@@ -32,6 +32,8 @@ class Command(BaseCommand):
 
         pytest_path = os.path.join(os.path.dirname(sys.executable), "pytest")
         base_env = os.environ.copy()
+        # テストのメトリクスを開発サーバーと共有するディレクトリに書き込まない（テストはこのプロセスの値で確認する）
+        base_env.pop("PROMETHEUS_MULTIPROC_DIR", None)
 
         # Modify DATABASE_URL only if DATABASE_URL_OVERRIDE is set to 'true'
         # (Useful for running tests on the host while the DB is in a container)
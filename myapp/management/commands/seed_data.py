@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from myapp import seeding
+from myapp.models import Playground
+
+
+class Command(BaseCommand):
+    """
+    負荷試験用の合成データ（施設・ユーザー・お気に入り・口コミ）を一括作成するコマンド。
+    同じ --seed を指定すると同じデータを作成する。書き込みは PostgreSQL では COPY、
+    それ以外のデータベースでは bulk_create を使い（--method で変更可）、
+    バッチごとに進捗を、最後にテーブルごとの件数と書き込み速度 (rows/s) を表示する。
+    --reviews-only を指定すると施設・ユーザーは作成せず、既存の施設に既存のユーザーの口コミだけを作成する
+    （npm run dummy）。
+    """
+
+    help = "Generates deterministic synthetic playgrounds, users, favorites and reviews in bulk."
+
+    def add_arguments(self, parser):
+        defaults = seeding.SeedPlan()
+        parser.add_argument(
+            "--playgrounds", type=int, default=defaults.playgrounds, help="施設数"
+        )
+        parser.add_argument(
+            "--users", type=int, default=defaults.users, help="ユーザー数"
+        )
+        parser.add_argument(
+            "--reviews",
+            type=int,
+            help=f"口コミ数（省略時は {defaults.reviews}、--reviews-only では施設数×"
+            f"{seeding.REVIEWS_PER_PLAYGROUND}）",
+        )
+        parser.add_argument(
+            "--favorites",
+            type=int,
+            default=defaults.favorites_per_user,
+            help="ユーザー1人あたりのお気に入り数",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=defaults.seed, help="乱数シード"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=defaults.batch_size,
+            help="1回の INSERT / COPY で書き込む行数",
+        )
+        parser.add_argument(
+            "--method",
+            choices=seeding.METHODS,
+            help="書き込み方法（省略時は PostgreSQL なら copy、それ以外は bulk）",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="作成前に、以前に作成した合成の施設・ユーザーとそのお気に入り・口コミを削除する"
+            "（取り込んだ施設や実際のユーザーは残す）。"
+            "--reviews-only では、実際のユーザーの口コミも含めてすべての口コミを削除するので注意",
+        )
+        parser.add_argument(
+            "--reviews-only",
+            action="store_true",
+            help="施設・ユーザーを作成せず、既存の施設に既存のユーザーの口コミだけを作成する",
+        )
+
+    def handle(self, *args, **options):
+        reviews_only = options["reviews_only"]
+        if options["reviews"] is None:
+            options["reviews"] = (
+                Playground.objects.count() * seeding.REVIEWS_PER_PLAYGROUND
+                if reviews_only
+                else seeding.SeedPlan().reviews
+            )
+        counts = ("playgrounds", "users", "reviews", "favorites")
+        if any(options[name] < 0 for name in counts) or options["batch_size"] < 1:
+            raise CommandError("件数は0以上、--batch-size は1以上で指定してください")
+        plan = seeding.SeedPlan(
+            playgrounds=options["playgrounds"],
+            users=options["users"],
+            reviews=options["reviews"],
+            favorites_per_user=options["favorites"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        method = options["method"] or seeding.default_method()
+        self.stdout.write(f"Method: {method}, seed: {plan.seed}")
+
+        try:
+            with transaction.atomic():
+                if reviews_only:
+                    if options["clear"]:
+                        seeding.clear_reviews()
+                        self.stdout.write(
+                            self.style.WARNING("Deleted all existing reviews.")
+                        )
+                    results = seeding.seed_reviews(plan, method, self._report_progress)
+                else:
+                    if options["clear"]:
+                        seeding.clear_seed_data()
+                        self.stdout.write(
+                            "Deleted seeded playgrounds and users with their reviews."
+                        )
+                    results = seeding.seed(plan, method, self._report_progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'table':<24}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+        for result in results:
+            self.stdout.write(
+                f"{result.table:<24}{result.rows:>10}{result.seconds:>10.2f}"
+                f"{result.rows_per_second:>12.0f}"
+            )
+        self.stdout.write(self.style.SUCCESS("Successfully generated synthetic data."))
+
+    def _report_progress(self, table: str, written: int, total: int, seconds: float):
+        rate = written / seconds if seconds else 0
+        self.stdout.write(f"  {table}: {written}/{total} ({rate:,.0f} rows/s)")
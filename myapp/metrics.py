@@ -0,0 +1,49 @@
+"""
+アプリケーションの Prometheus のメトリクス（キャッシュのヒット・ミスと、お気に入り・口コミの件数）。
+
+/metrics (mysite.metrics) で出力する。gunicorn の複数のワーカーで動かす場合は、環境変数
+PROMETHEUS_MULTIPROC_DIR のディレクトリに各ワーカーの値を書き込み、出力時に合計する。
+"""
+
+import os
+
+from prometheus_client import Counter, multiprocess
+
+CACHE_REQUESTS = Counter(
+    "kidsplayground_cache_requests_total",
+    "名前空間ごとのキャッシュの参照回数 (result は hits / misses)",
+    ["namespace", "result"],
+)
+FAVORITES_TOGGLED = Counter(
+    "kidsplayground_favorites_toggled_total",
+    "お気に入りの追加・削除の回数 (action は added / removed)",
+    ["action"],
+)
+REVIEWS_POSTED = Counter(
+    "kidsplayground_reviews_posted_total",
+    "投稿された口コミの件数",
+)
+
+for action in ("added", "removed"):
+    FAVORITES_TOGGLED.labels(action)
+
+
+def cache_request_counts(namespace: str) -> dict[str, float]:
+    """
+    名前空間のキャッシュの参照回数 {result: 回数}。
+    PROMETHEUS_MULTIPROC_DIR が設定されていれば全ワーカーの合計、なければこのプロセスの値
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        collector = multiprocess.MultiProcessCollector(None)
+    else:
+        collector = CACHE_REQUESTS
+    counts: dict[str, float] = {}
+    for family in collector.collect():
+        for sample in family.samples:
+            if (
+                sample.name == "kidsplayground_cache_requests_total"
+                and sample.labels.get("namespace") == namespace
+            ):
+                result = sample.labels["result"]
+                counts[result] = counts.get(result, 0) + sample.value
+    return counts
@@ -0,0 +1,191 @@
+"""
+匿名ユーザー向けのページキャッシュ。
+
+施設一覧・施設詳細・ランキング・aboutページは、ログインしていない閲覧者には全員同じ内容になる
+（お気に入りボタンやヘッダーが変わるのはログインユーザーだけ）。そこで匿名ユーザーの GET
+リクエストに対しては、レンダリング済みのページを page 名前空間にキャッシュして返す。
+
+- キーはURL名・URLの引数と、ページの表示に使うGETパラメータを正規化（並べ替え）したもの。
+  表示に使わないパラメータが付いている場合は、リンクに引き継がれるなど内容が変わりうるためキャッシュしない。
+- ページには内容から計算した ETag と、キャッシュした時刻の Last-Modified を付け（ビューが付けている
+  場合はそれを使う）、If-None-Match / If-Modified-Since で変更がなければ 304 を返す。
+- キャッシュするページは、書き込みが反映されていないレプリカの値をキャッシュしないよう、
+  キャッシュにない場合はプライマリから読んで作る (mysite.db_router)。
+- 施設・口コミが追加・更新・削除されると myapp.signals で page 名前空間ごと無効になる。
+  キーには施設ごと・一覧ごとのスコープ（page_scope）のバージョンも含めており、施設データの取り込み
+  (myapp.importing) では変更のあった施設の詳細ページと一覧だけを無効にする。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    set_response_etag,
+)
+from django.utils.http import http_date, parse_http_date_safe
+from myapp import caching
+from myapp.filters import FILTER_PARAMS
+from mysite.db_router import read_from_primary
+
+# キャッシュするページ (URL名) と、表示に使うGETパラメータ
+CACHEABLE_PAGES = {
+    "myapp:index": FILTER_PARAMS + ("cursor", "tab"),
+    "myapp:facility_detail": (),
+    "myapp:ranking": ("sort", "page"),
+    "myapp:about": (),
+}
+PAGE_CACHE_TIMEOUT = 60 * 10
+# 施設の一覧を表示するページ（いずれかの施設が追加・変更されると内容が変わる）
+LISTING_PAGES = ("myapp:index", "myapp:ranking")
+LISTING_SCOPE = "listing"
+
+
+def playground_page_scope(playground_id: int) -> str:
+    """施設の詳細ページのスコープ"""
+    return f"playground:{playground_id}"
+
+
+def page_scope(view_name: str, kwargs: dict) -> Optional[str]:
+    """ページのキャッシュを部分的に無効にするためのスコープ。施設に依存しないページは None"""
+    if view_name == "myapp:facility_detail":
+        return playground_page_scope(kwargs["pk"])
+    if view_name in LISTING_PAGES:
+        return LISTING_SCOPE
+    return None
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    匿名ユーザーに CACHEABLE_PAGES のページをキャッシュから返すミドルウェア。
+    ログイン状態とメッセージを参照するため、AuthenticationMiddleware・MessageMiddleware より後に置く。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+        # ASGI では非同期のまま呼ばれるようにする（キャッシュへの書き込みだけをスレッドで行う）
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)  # type: ignore[return-value]
+        return self.handle_response(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response = await self.get_response(request)  # type: ignore[misc]
+        if getattr(request, "_page_cache_key", None) is None:
+            return response
+        return await sync_to_async(self.handle_response)(request, response)
+
+    def handle_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        """キャッシュ対象のページをキャッシュし、条件付きリクエストに 304 を返す"""
+        key = getattr(request, "_page_cache_key", None)
+        if key is None:
+            return response
+        if getattr(request, "_page_cache_hit", False):
+            return self.make_conditional(request, response)
+        if not self.is_cacheable_response(request, response):
+            return response
+        # ビューが ETag / Last-Modified を付けている場合（施設ページ）はそれを使う
+        if not response.has_header("ETag"):
+            set_response_etag(response)
+        if not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(time.time())
+        caching.set_value(
+            caching.PAGE,
+            key,
+            {
+                "content": response.content,
+                "content_type": response.headers["Content-Type"],
+                "etag": response.headers["ETag"],
+                "last_modified": response.headers["Last-Modified"],
+            },
+            PAGE_CACHE_TIMEOUT,
+        )
+        response.headers["X-Page-Cache"] = "MISS"
+        return self.make_conditional(request, response)
+
+    def process_view(
+        self, request: HttpRequest, view_func, view_args, view_kwargs
+    ) -> Optional[HttpResponse]:
+        """キャッシュ対象のリクエストなら、キャッシュしたページをビューの代わりに返す"""
+        key = self.get_cache_key(request)
+        if key is None:
+            return None
+        request._page_cache_key = key  # type: ignore[attr-defined]
+        entry = caching.get_value(caching.PAGE, key)
+        if entry is None:
+            read_from_primary()
+            return None
+        request._page_cache_hit = True  # type: ignore[attr-defined]
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response.headers["ETag"] = entry["etag"]
+        response.headers["Last-Modified"] = entry["last_modified"]
+        response.headers["X-Page-Cache"] = "HIT"
+        return response
+
+    def get_cache_key(self, request: HttpRequest) -> Optional[tuple[str, ...]]:
+        """
+        キャッシュのキー（URL名・URLの引数・正規化したGETパラメータ）を返す。
+        キャッシュできないリクエストの場合は None を返す。
+        """
+        match = request.resolver_match
+        if request.method != "GET" or match is None:
+            return None
+        params = CACHEABLE_PAGES.get(match.view_name)
+        if params is None:
+            return None
+        if set(request.GET) - set(params):
+            return None
+        # ログインユーザーと、表示待ちのメッセージがある匿名ユーザーには毎回ページを作る
+        if request.user.is_authenticated or len(messages.get_messages(request)):
+            return None
+        query = sorted(
+            (name, value) for name in request.GET for value in request.GET.getlist(name)
+        )
+        scope = page_scope(match.view_name, match.kwargs)
+        scope_version = caching.get_scope_version(caching.PAGE, scope) if scope else 0
+        return (
+            match.view_name,
+            *(f"{name}={value}" for name, value in sorted(match.kwargs.items())),
+            # memcached のキーに使えない空白などを含むため、GETパラメータはハッシュにする
+            hashlib.md5(repr(query).encode(), usedforsecurity=False).hexdigest(),
+            f"s{scope_version}",
+        )
+
+    @staticmethod
+    def is_cacheable_response(request: HttpRequest, response: HttpResponse) -> bool:
+        """他の閲覧者に返してよい（閲覧者固有の Cookie やCSRFトークンを含まない）レスポンスか"""
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            and not request.session.modified
+            and "private" not in response.headers.get("Cache-Control", "")
+        )
+
+    @staticmethod
+    def make_conditional(request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """ブラウザに毎回検証させ、変更がなければ 304 を返す"""
+        patch_cache_control(response, max_age=0)
+        return get_conditional_response(
+            request,
+            etag=response.headers["ETag"],
+            last_modified=parse_http_date_safe(response.headers["Last-Modified"]),
+            response=response,
+        )
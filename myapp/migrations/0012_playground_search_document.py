@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+from myapp.search import build_search_document
+
+TRIGRAM_INDEX_NAME = "myapp_playground_search_trgm"
+
+
+def populate_search_document(apps, schema_editor):
+    Playground = apps.get_model("myapp", "Playground")
+    playgrounds = list(Playground.objects.all())
+    for playground in playgrounds:
+        playground.search_document = build_search_document(
+            playground.name, playground.address, playground.description
+        )
+    Playground.objects.bulk_update(playgrounds, ["search_document"], batch_size=500)
+
+
+def create_trigram_index(apps, schema_editor):
+    """PostgreSQLの場合のみ、検索用文書にpg_trgmのGINインデックスを作成する"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX_NAME} "
+        "ON myapp_playground USING gin (search_document gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0011_remove_playground_kids_space_available"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playground",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(populate_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-18 06:57
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    """既存の口コミから施設の評価集計を計算して保存する"""
+    Playground = apps.get_model("myapp", "Playground")
+    Review = apps.get_model("myapp", "Review")
+    per_playground = (
+        Review.objects.filter(playground=OuterRef("pk")).order_by().values("playground")
+    )
+    Playground.objects.update(
+        review_count=Coalesce(
+            Subquery(per_playground.annotate(c=Count("pk")).values("c")), 0
+        ),
+        rating_sum=Coalesce(
+            Subquery(per_playground.annotate(s=Sum("rating")).values("s")), 0
+        ),
+        avg_rating=Subquery(
+            per_playground.annotate(a=Avg(Cast("rating", FloatField()))).values("a")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0012_playground_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playground",
+            name="avg_rating",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="playground",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="playground",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("review_count__gt", 0)),
+                fields=["-avg_rating", "id"],
+                name="playground_rating_rank_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("review_count__gt", 0)),
+                fields=["-review_count", "id"],
+                name="playground_review_rank_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+from myapp.geo import encode_geohash
+
+
+def populate_geohash(apps, schema_editor):
+    Playground = apps.get_model("myapp", "Playground")
+    playgrounds = list(
+        Playground.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    )
+    for playground in playgrounds:
+        playground.geohash = encode_geohash(playground.latitude, playground.longitude)
+    Playground.objects.bulk_update(playgrounds, ["geohash"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0013_playground_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playground",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=12
+            ),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0014_playground_geohash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playground",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
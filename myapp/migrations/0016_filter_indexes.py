@@ -0,0 +1,92 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0015_playground_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                fields=["target_age_start"], name="playground_age_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                fields=["target_age_end"], name="playground_age_end_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(fields=["fee_decimal"], name="playground_fee_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                fields=["parking_info", "id"], name="playground_parking_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("nursing_room_available", True)),
+                fields=["id"],
+                name="playground_nursing_room_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("diaper_changing_station_available", True)),
+                fields=["id"],
+                name="playground_diaper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("stroller_accessible", True)),
+                fields=["id"],
+                name="playground_stroller_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("lunch_allowed", True)),
+                fields=["id"],
+                name="playground_lunch_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("indoor_play_area", True)),
+                fields=["id"],
+                name="playground_indoor_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playground",
+            index=models.Index(
+                condition=models.Q(("kids_toilet_available", True)),
+                fields=["id"],
+                name="playground_kids_toilet_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["playground", "-created_at"],
+                name="review_playground_recent_idx",
+            ),
+        ),
+    ]
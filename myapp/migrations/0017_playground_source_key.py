@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0016_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playground",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="playground",
+            name="source_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, unique=True
+            ),
+        ),
+    ]
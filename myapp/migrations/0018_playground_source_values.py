@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0017_playground_source_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playground",
+            name="source_values",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -2,10 +2,26 @@
 from __future__ import annotations
 from django.db import models
 from django.conf import settings
-from django.db.models import Avg, Count, QuerySet
-from typing import Any
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
+from typing import Any, Iterable
 import datetime
 from users.models import CustomUser
+from myapp.geo import encode_geohash
+from myapp.search import build_search_document
 import re
 
 
@@ -13,19 +29,61 @@ class PlaygroundManager(models.Manager["Playground"]):
     def get_by_rating_rank(self) -> QuerySet["Playground"]:
         """評価の平均点が高い順に施設を返す"""
         return (
-            self.get_queryset()
-            .annotate(avg_rating=Avg("reviews__rating"))
-            .filter(avg_rating__isnull=False)
-            .order_by("-avg_rating")
+            self.get_queryset().filter(review_count__gt=0).order_by("-avg_rating", "id")
         )
 
     def get_by_review_count_rank(self) -> QuerySet["Playground"]:
         """口コミの件数が多い順に施設を返す"""
         return (
             self.get_queryset()
-            .annotate(review_count=Count("reviews"))
             .filter(review_count__gt=0)
-            .order_by("-review_count")
+            .order_by("-review_count", "id")
+        )
+
+    def record_review_added(self, playground_id: int, rating: int) -> None:
+        """口コミが1件追加されたときに、施設の評価集計を差分で更新する"""
+        self.filter(pk=playground_id).update(
+            review_count=F("review_count") + 1,
+            rating_sum=F("rating_sum") + rating,
+            avg_rating=Cast(F("rating_sum") + rating, FloatField())
+            / (F("review_count") + 1),
+        )
+
+    def record_review_removed(self, playground_id: int, rating: int) -> None:
+        """口コミが1件削除されたときに、施設の評価集計を差分で更新する"""
+        self.filter(pk=playground_id, review_count__gt=0).update(
+            review_count=F("review_count") - 1,
+            rating_sum=F("rating_sum") - rating,
+            avg_rating=Case(
+                When(review_count__lte=1, then=Value(None)),
+                default=Cast(F("rating_sum") - rating, FloatField())
+                / (F("review_count") - 1),
+                output_field=FloatField(),
+            ),
+        )
+
+    def recalculate_rating_aggregates(
+        self, playground_ids: Iterable[int] | None = None
+    ) -> int:
+        """
+        口コミテーブルから施設の評価集計を再計算する。
+        playground_ids を省略した場合は全施設を対象とし、更新した件数を返す。
+        """
+        reviews = Review.objects.filter(playground=OuterRef("pk")).order_by()
+        per_playground = reviews.values("playground")
+        queryset = self.get_queryset()
+        if playground_ids is not None:
+            queryset = queryset.filter(pk__in=list(playground_ids))
+        return queryset.update(
+            review_count=Coalesce(
+                Subquery(per_playground.annotate(c=Count("pk")).values("c")), 0
+            ),
+            rating_sum=Coalesce(
+                Subquery(per_playground.annotate(s=Sum("rating")).values("s")), 0
+            ),
+            avg_rating=Subquery(
+                per_playground.annotate(a=Avg(Cast("rating", FloatField()))).values("a")
+            ),
         )
 
 
@@ -84,11 +142,107 @@ class Playground(models.Model):
         blank=True,
     )
 
+    # 施設情報の最終更新日時。テンプレートのフラグメントキャッシュのキーに使う
+    updated_at: datetime.datetime = models.DateTimeField(auto_now=True)  # type: ignore
+
+    # 口コミの評価集計。Reviewの追加・削除時にシグナルで差分更新する（myapp.signals 参照）
+    review_count: int = models.PositiveIntegerField(default=0)  # type: ignore
+    rating_sum: int = models.PositiveIntegerField(default=0)  # type: ignore
+    avg_rating: float | None = models.FloatField(null=True, blank=True)  # type: ignore
+
+    # キーワード検索用に施設名・住所・説明を2-gramに分割した文書（myapp.search 参照）
+    search_document: str = models.TextField(blank=True, default="", editable=False)  # type: ignore
+
+    # 範囲検索用に緯度・経度を変換した geohash。位置情報がない場合は空文字（myapp.geo 参照）
+    geohash: str = models.CharField(  # type: ignore
+        max_length=12, blank=True, default="", editable=False, db_index=True
+    )
+
+    # 施設データの取り込み (myapp.importing) で照合に使う、取り込み元での施設の識別子
+    source_key: str | None = models.CharField(  # type: ignore
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
+    # 取り込み元の開館時間・対象年齢・料金・駐車場の表記（renormalize コマンドで正規化し直す）
+    source_values: dict = models.JSONField(default=dict, blank=True, editable=False)  # type: ignore
+    # 最後に取り込んだ内容のハッシュ。同じ内容の行は取り込み時に読み込み・書き込みをしない
+    content_hash: str = models.CharField(  # type: ignore
+        max_length=64, blank=True, default="", editable=False
+    )
+
     objects: "PlaygroundManager" = PlaygroundManager()
 
+    class Meta:
+        indexes = [
+            # ランキングを口コミのある施設だけのインデックススキャンで取得する
+            models.Index(
+                fields=["-avg_rating", "id"],
+                name="playground_rating_rank_idx",
+                condition=Q(review_count__gt=0),
+            ),
+            models.Index(
+                fields=["-review_count", "id"],
+                name="playground_review_rank_idx",
+                condition=Q(review_count__gt=0),
+            ),
+            # 対象年齢・料金の範囲指定での絞り込み
+            models.Index(fields=["target_age_start"], name="playground_age_start_idx"),
+            models.Index(fields=["target_age_end"], name="playground_age_end_idx"),
+            models.Index(fields=["fee_decimal"], name="playground_fee_idx"),
+            # 駐車場の区分で絞り込み、一覧の並び順 (id) でページ分割する
+            models.Index(fields=["parking_info", "id"], name="playground_parking_idx"),
+            # 設備がある施設だけの部分インデックス（一覧の並び順 id で読む）
+            *(
+                models.Index(
+                    fields=["id"],
+                    name=f"playground_{name}_idx",
+                    condition=Q(**{field: True}),
+                )
+                for name, field in (
+                    ("nursing_room", "nursing_room_available"),
+                    ("diaper", "diaper_changing_station_available"),
+                    ("stroller", "stroller_accessible"),
+                    ("lunch", "lunch_allowed"),
+                    ("indoor", "indoor_play_area"),
+                    ("kids_toilet", "kids_toilet_available"),
+                )
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def cache_version(self) -> str:
+        """フラグメントキャッシュのキーに使う、更新日時をマイクロ秒まで含めた文字列"""
+        return f"{self.updated_at.timestamp():.6f}" if self.updated_at else ""
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """保存時に検索用文書と geohash を作り直し、更新日時を更新する"""
+        self.refresh_search_document()
+        self.refresh_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                "search_document",
+                "geohash",
+                "updated_at",
+            }
+        super().save(*args, **kwargs)
+
+    def refresh_search_document(self) -> None:
+        """施設名・住所・説明から検索用文書を作成する"""
+        self.search_document = build_search_document(
+            self.name, self.address, self.description
+        )
+
+    def refresh_geohash(self) -> None:
+        """緯度・経度から geohash を作成する"""
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ""
+        else:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+
     @property
     def formatted_opening_hours(self) -> str:
         if self.opening_time and self.closing_time:
@@ -167,5 +321,14 @@ class Review(models.Model):
     rating: int = models.PositiveIntegerField()  # type: ignore
     created_at: datetime.datetime = models.DateTimeField(auto_now_add=True)  # type: ignore
 
+    class Meta:
+        indexes = [
+            # 施設ごとの新しい順の口コミ（施設詳細・口コミ一覧・最新の投稿日時）
+            models.Index(
+                fields=["playground", "-created_at"],
+                name="review_playground_recent_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.user.email} - {self.playground.name} - {self.rating}"
@@ -0,0 +1,270 @@
+"""
+施設データの表記の正規化。
+
+外部の施設データでは開館時間・対象年齢・料金・駐車場が "9:00〜17:00"・"0歳〜6歳"・
+"大人 300円"・"あり（有料）" のような文字列で提供されるため、Playground のフィールド
+（opening_time / closing_time、target_age_start / target_age_end、fee_decimal、parking_info）の値に変換する。
+変換規則はマイグレーション 0009 のデータ移行と同じ。
+
+parse_* は1件ずつ変換する関数、normalize_* は pandas の Series（列）をまとめて変換する関数で、
+同じ入力に対して同じ結果を返す。normalize_frame は列を重複しない表記に分解 (factorize) してから
+変換するため、行数が多くても表記の種類の数だけの文字列処理で済む。施設データの取り込み (myapp.importing) と renormalize コマンドは
+列単位の normalize_frame を使う（速度の比較は benchmark_normalization コマンド）。
+"""
+
+from __future__ import annotations
+
+import datetime
+import re
+from decimal import Decimal
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+TIME_RANGE_SEPARATOR_RE = re.compile(r"[-〜~]")
+_HH_MM_RE = re.compile(r"(\d{1,2}):(\d{2})")
+_HH_JI_RE = re.compile(r"(\d{1,2})時(?:(\d{2})分)?")
+_NUMBER_RE = re.compile(r"\d+")
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y", "あり", "有", "可", "○", "◯"}
+FALSE_VALUES = {"0", "false", "f", "no", "n", "なし", "無", "不可", "×", "-", ""}
+
+
+def parse_time(time_str: Optional[str]) -> Optional[datetime.time]:
+    """'HH:MM'・'HH時MM分'・'H時' 形式の文字列を time に変換する。変換できなければ None"""
+    if not time_str:
+        return None
+    time_str = time_str.strip()
+    for pattern in (_HH_MM_RE, _HH_JI_RE):
+        match = pattern.match(time_str)
+        if match:
+            hour = int(match.group(1))
+            minute = int(match.group(2) or 0)
+            if 0 <= hour <= 23 and 0 <= minute <= 59:
+                return datetime.time(hour, minute)
+    return None
+
+
+def parse_opening_hours(
+    text: Optional[str],
+) -> tuple[Optional[datetime.time], Optional[datetime.time]]:
+    """'9:00〜17:00' のような開館時間を (開館時刻, 閉館時刻) に変換する"""
+    if not text:
+        return None, None
+    parts = TIME_RANGE_SEPARATOR_RE.split(text)
+    if len(parts) == 2:
+        return parse_time(parts[0]), parse_time(parts[1])
+    if len(parts) == 1:
+        return parse_time(parts[0]), None
+    return None, None
+
+
+def parse_target_age(text: Optional[str]) -> tuple[Optional[int], Optional[int]]:
+    """'0歳〜6歳' のような対象年齢を (開始年齢, 終了年齢) に変換する"""
+    if not text:
+        return None, None
+    numbers = _NUMBER_RE.findall(text)
+    if not numbers:
+        return None, None
+    return int(numbers[0]), int(numbers[1]) if len(numbers) >= 2 else None
+
+
+def parse_fee(text: Optional[str]) -> Optional[Decimal]:
+    """'無料' は 0、'大人 1,000円' のような料金は最初の金額に変換する"""
+    if not text:
+        return None
+    if "無料" in text:
+        return Decimal(0)
+    numbers = _NUMBER_RE.findall(text.replace(",", ""))
+    return Decimal(numbers[0]) if numbers else None
+
+
+def parse_parking(text: Optional[str]) -> str:
+    """駐車場の表記を parking_info の区分 (NO / FREE / PAID) に変換する"""
+    if not text:
+        return "NO"
+    text = text.strip()
+    if text.upper() in ("NO", "FREE", "PAID"):
+        return text.upper()
+    if "有料" in text:
+        return "PAID"
+    if text.lower() in FALSE_VALUES or text.startswith("なし"):
+        return "NO"
+    # 有料・無料の区別がない「あり」は、マイグレーション 0009 と同じく無料として扱う
+    return "FREE"
+
+
+def parse_bool(value: Any) -> bool:
+    """'あり'・'○'・'true'・1 などを真偽値に変換する。解釈できない値は ValueError"""
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"真偽値として解釈できません: {value!r}")
+
+
+# 取り込み元の表記の列と、変換先の Playground のフィールド
+SOURCE_COLUMNS = {
+    "opening_hours": ("opening_time", "closing_time"),
+    "target_age": ("target_age_start", "target_age_end"),
+    "fee": ("fee_decimal",),
+    "parking": ("parking_info",),
+}
+
+# 0時0分からの分数 → time
+_TIMES = np.array(
+    [datetime.time(hour, minute) for hour in range(24) for minute in range(60)]
+    + [None],
+    dtype=object,
+)
+
+
+def records_frame(records: list[dict]) -> pd.DataFrame:
+    """
+    辞書の行から object 型の列の DataFrame を作る。
+    型を推論すると、一部の行にしかない整数・真偽値の列が欠損値のために float になり、
+    文字列にしたときに 1 が "1.0" になる（JSON の行はキーが揃っているとは限らない）。
+    """
+    return pd.DataFrame(records, dtype=object)
+
+
+def text_column(values: pd.Series) -> pd.Series:
+    """None・NaN を空文字にした文字列の列"""
+    return values.where(values.notna(), "").astype(str)
+
+
+def _numbers(captured: pd.Series) -> pd.Series:
+    # 全角数字も int() と同じく数値として扱う
+    return pd.to_numeric(captured.str.normalize("NFKC"), errors="coerce")
+
+
+def _objects(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """mask が偽の要素を None にした object 型の配列"""
+    result = values.astype(object)
+    result[~mask] = None
+    return result
+
+
+def normalize_time(values: pd.Series) -> pd.Series:
+    """parse_time の列版"""
+    text = text_column(values).str.strip()
+    hh_mm = text.str.extract(r"^(\d{1,2}):(\d{2})")
+    hour, minute = _numbers(hh_mm[0]), _numbers(hh_mm[1])
+    valid_hh_mm = hour.between(0, 23) & minute.between(0, 59)
+    hh_ji = text.str.extract(r"^(\d{1,2})時(?:(\d{2})分)?")
+    hour_ji, minute_ji = _numbers(hh_ji[0]), _numbers(hh_ji[1]).fillna(0)
+    valid_hh_ji = hour_ji.between(0, 23) & minute_ji.between(0, 59)
+    minutes = np.select(
+        [valid_hh_mm, valid_hh_ji],
+        [hour * 60 + minute, hour_ji * 60 + minute_ji],
+        default=len(_TIMES) - 1,
+    ).astype(int)
+    return pd.Series(_TIMES[minutes], index=values.index)
+
+
+def normalize_opening_hours(values: pd.Series) -> pd.DataFrame:
+    """parse_opening_hours の列版。opening_time・closing_time の列を返す"""
+    text = text_column(values)
+    separators = text.str.count(TIME_RANGE_SEPARATOR_RE.pattern)
+    parts = text.str.split(TIME_RANGE_SEPARATOR_RE.pattern, n=2, regex=True)
+    opening = normalize_time(parts.str[0]).where(separators <= 1, None)
+    closing = normalize_time(parts.str[1]).where(separators == 1, None)
+    return pd.DataFrame({"opening_time": opening, "closing_time": closing})
+
+
+def normalize_target_age(values: pd.Series) -> pd.DataFrame:
+    """parse_target_age の列版。target_age_start・target_age_end の列を返す"""
+    numbers = text_column(values).str.extract(r"^\D*?(\d+)(?:\D+(\d+))?")
+    start, end = _numbers(numbers[0]), _numbers(numbers[1])
+    return pd.DataFrame(
+        {
+            "target_age_start": _objects(
+                start.fillna(0).to_numpy(int), start.notna().to_numpy()
+            ),
+            "target_age_end": _objects(
+                end.fillna(0).to_numpy(int), end.notna().to_numpy()
+            ),
+        },
+        index=values.index,
+    )
+
+
+def normalize_fee(values: pd.Series) -> pd.Series:
+    """parse_fee の列版"""
+    text = text_column(values)
+    amount = (
+        text.str.replace(",", "", regex=False)
+        .str.extract(r"(\d+)")[0]
+        .str.normalize("NFKC")
+    )
+    free = text.str.contains("無料", regex=False)
+    fees = amount.map(Decimal, na_action="ignore").where(amount.notna(), None)
+    return fees.mask(free, Decimal(0)).astype(object)
+
+
+def normalize_parking(values: pd.Series) -> pd.Series:
+    """parse_parking の列版"""
+    text = text_column(values).str.strip()
+    upper = text.str.upper()
+    code = upper.isin(("NO", "FREE", "PAID"))
+    none = text.str.lower().isin(FALSE_VALUES) | text.str.startswith("なし")
+    return pd.Series(
+        np.select(
+            [text == "", code, text.str.contains("有料", regex=False), none],
+            ["NO", upper, "PAID", "NO"],
+            default="FREE",
+        ).astype(object),
+        index=values.index,
+    )
+
+
+def normalize_bool(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """parse_bool の列版。(真偽値の列, 解釈できない値だった行) を返す"""
+    text = text_column(values).str.strip().str.lower()
+    true = text.isin(TRUE_VALUES)
+    invalid = ~true & ~text.isin(FALSE_VALUES)
+    return pd.Series(true.to_numpy().astype(object), index=values.index), invalid
+
+
+def normalize_unique(values: pd.Series, normalize) -> pd.DataFrame | pd.Series:
+    """
+    列の重複しない値だけを normalize で変換し、元の行の並びに展開する。
+    施設データの表記は種類が少ない（"9:00〜17:00" などが繰り返し現れる）ため、
+    文字列処理の回数が行数ではなく表記の種類の数で済む。
+    """
+    codes, uniques = pd.factorize(text_column(values), sort=False)
+    normalized = normalize(pd.Series(uniques, dtype=object))
+    result = normalized.take(codes)
+    result.index = values.index
+    return result
+
+
+def normalize_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    SOURCE_COLUMNS の表記の列（opening_hours など）を、対応する Playground のフィールドの列に変換する。
+    frame にない表記の列は変換しない。値は object 型で、値がない要素は None になる。
+    """
+    columns = []
+    if "opening_hours" in frame:
+        columns.append(
+            normalize_unique(frame["opening_hours"], normalize_opening_hours)
+        )
+    if "target_age" in frame:
+        columns.append(normalize_unique(frame["target_age"], normalize_target_age))
+    if "fee" in frame:
+        columns.append(
+            normalize_unique(frame["fee"], normalize_fee).rename("fee_decimal")
+        )
+    if "parking" in frame:
+        columns.append(
+            normalize_unique(frame["parking"], normalize_parking).rename("parking_info")
+        )
+    if not columns:
+        return pd.DataFrame(index=frame.index)
+    return pd.concat(columns, axis=1)
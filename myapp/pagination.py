@@ -0,0 +1,192 @@
+"""
+キーセット（カーソル）方式のページネーション。
+
+OFFSETを使わず、直前のページの先頭・末尾のソートキーを条件にしてページを取得する。
+施設数が増えても、何ページ目であってもページ取得のコストが一定に保たれる。
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Sequence
+
+from django.db.models import F, Func, IntegerField, Q, QuerySet, Subquery
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+@dataclass
+class CursorPage:
+    """
+    キーセットページネーションの1ページ分の結果。
+    テンプレートからは Django の Page と同様に page_obj として参照する。
+    """
+
+    object_list: list[Any]
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    paginator: "CursorPaginator | None" = field(default=None, repr=False)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    QuerySetをソートキーの値で区切ってページ分割するクラス。
+
+    ordering には一意な並びになるようにフィールド名を指定する（最後に主キーを含めること）。
+    降順のフィールドは Django の order_by と同様に "-" を先頭に付ける。
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet[Any],
+        per_page: int,
+        ordering: Sequence[str] = ("id",),
+    ) -> None:
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    @cached_property
+    def count(self) -> int:
+        """
+        フィルタリング後の全件数を返す。
+        page() で取得した行に件数が含まれていれば、追加のクエリは発行しない。
+        """
+        return self.queryset.count()
+
+    def page(self, cursor: str | None) -> CursorPage:
+        """
+        カーソル文字列に対応するページを返す。
+        カーソルが未指定または不正な場合は先頭ページを返す。
+        """
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            rows = self._fetch(self.queryset.order_by(*self.ordering))
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            if not rows:
+                # 先頭ページが空であれば、全件数も0件と確定する
+                self.__dict__["count"] = 0
+            return CursorPage(
+                object_list=rows,
+                next_cursor=self._cursor_for(rows[-1], NEXT) if has_more else None,
+                paginator=self,
+            )
+
+        direction, values = decoded
+        if direction == NEXT:
+            queryset = self.queryset.filter(self._after(values)).order_by(
+                *self.ordering
+            )
+            rows = self._fetch(queryset)
+            has_more = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            return CursorPage(
+                object_list=rows,
+                next_cursor=self._cursor_for(rows[-1], NEXT) if has_more else None,
+                previous_cursor=self._cursor_for(rows[0], PREVIOUS) if rows else None,
+                paginator=self,
+            )
+
+        # 前のページは並び順を反転して取得し、表示用に元の順序へ戻す
+        queryset = self.queryset.filter(self._after(values, reverse=True)).order_by(
+            *self._reversed_ordering()
+        )
+        rows = self._fetch(queryset)
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page][::-1]
+        return CursorPage(
+            object_list=rows,
+            next_cursor=self._cursor_for(rows[-1], NEXT) if rows else None,
+            previous_cursor=self._cursor_for(rows[0], PREVIOUS) if has_more else None,
+            paginator=self,
+        )
+
+    def _fetch(self, queryset: QuerySet[Any]) -> list[Any]:
+        """
+        ページの行（次ページの有無の判定用に1件多く）を取得する。
+        フィルタリング後の全件数をスカラーサブクエリとして同じクエリで取得し、count に保持する。
+        """
+        counted = (
+            self.queryset.order_by()
+            .annotate(
+                _filtered_total=Func(
+                    F("pk"), function="COUNT", output_field=IntegerField()
+                )
+            )
+            .values("_filtered_total")
+        )
+        rows = list(
+            queryset.annotate(_filtered_total=Subquery(counted))[: self.per_page + 1]
+        )
+        if rows:
+            self.__dict__["count"] = rows[0]._filtered_total
+        return rows
+
+    def _key_values(self, obj: Any) -> list[Any]:
+        return [getattr(obj, name.lstrip("-")) for name in self.ordering]
+
+    def _cursor_for(self, obj: Any, direction: str) -> str:
+        return self.encode_cursor(direction, self._key_values(obj))
+
+    def _reversed_ordering(self) -> list[str]:
+        return [
+            name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering
+        ]
+
+    def _after(self, values: list[Any], reverse: bool = False) -> Q:
+        """
+        ソートキーの値 values より後ろ（reverse=True の場合は前）にある行の条件を組み立てる。
+        (a, b) > (x, y) を a > x OR (a = x AND b > y) の形に展開する。
+        """
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith("-") != reverse
+            field_name = name.lstrip("-")
+            lookup = "lt" if descending else "gt"
+            term = Q(**{f"{field_name}__{lookup}": values[index]})
+            for prev_index in range(index):
+                prev_name = self.ordering[prev_index].lstrip("-")
+                term &= Q(**{prev_name: values[prev_index]})
+            condition |= term
+        return condition
+
+    @staticmethod
+    def encode_cursor(direction: str, values: list[Any]) -> str:
+        payload = json.dumps({"d": direction, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> tuple[str, list[Any]] | None:
+        """カーソル文字列を (方向, ソートキーの値) に復元する。不正な場合は None を返す。"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction = payload["d"]
+            values = payload["v"]
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            return None
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        return direction, values
@@ -0,0 +1,96 @@
+"""
+施設ランキングの計算とキャッシュ。
+
+評価順は口コミの平均点をそのまま使うと、口コミ1件で星5の施設が多数の高評価を集めた施設より
+上位になってしまう。そこで全施設の平均点 m を事前分布とするベイズ平均
+(C * m + 評価の合計) / (C + 口コミ件数) をスコアとし、口コミが少ない施設の平均点を全体平均に
+引き寄せてから並べる。
+
+ランキングは並び順ごとに (施設ID, スコア) のリスト（スナップショット）として一括計算して
+ranking 名前空間にキャッシュする。口コミの追加・削除時は myapp.signals で名前空間ごと無効にし、
+シグナルを経由しない更新があっても RANKING_CACHE_TIMEOUT 秒で作り直される。
+"""
+
+from __future__ import annotations
+
+from myapp import caching
+from myapp.models import Playground
+
+SORT_RATING = "rating"
+SORT_REVIEW_COUNT = "review_count"
+SORT_CHOICES = (SORT_RATING, SORT_REVIEW_COUNT)
+
+# ベイズ平均で全体平均の口コミを何件分あらかじめ加えておくか
+PRIOR_WEIGHT = 5
+
+RANKING_CACHE_TIMEOUT = 60 * 10
+
+# (施設ID, スコア) の並び。評価順のスコアはベイズ平均、口コミ数順のスコアは口コミ件数
+RankingSnapshot = list[tuple[int, float]]
+
+
+def bayesian_score(
+    rating_sum: int, review_count: int, prior_mean: float, prior_weight: int
+) -> float:
+    """口コミの評価合計と件数から、全体平均で平滑化した平均点を計算する"""
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + review_count)
+
+
+def build_ranking(sort: str) -> RankingSnapshot:
+    """
+    施設の評価集計カラムから、口コミのある施設のランキングを計算する。
+    施設テーブルを1回読むだけで、口コミテーブルの集計は行わない。
+    """
+    rows = list(
+        Playground.objects.filter(review_count__gt=0)
+        .order_by()
+        .values_list("id", "review_count", "rating_sum")
+    )
+    if sort == SORT_REVIEW_COUNT:
+        entries = [(pk, float(count)) for pk, count, _ in rows]
+    else:
+        total_reviews = sum(count for _, count, _ in rows)
+        prior_mean = (
+            sum(rating_sum for _, _, rating_sum in rows) / total_reviews
+            if total_reviews
+            else 0.0
+        )
+        entries = [
+            (pk, bayesian_score(rating_sum, count, prior_mean, PRIOR_WEIGHT))
+            for pk, count, rating_sum in rows
+        ]
+    # スコアの降順、同点は施設IDの昇順
+    entries.sort(key=lambda entry: (-entry[1], entry[0]))
+    return entries
+
+
+def get_ranking(sort: str) -> RankingSnapshot:
+    """並び順に対応するランキングのスナップショットを返す。キャッシュになければ計算する"""
+    if sort not in SORT_CHOICES:
+        sort = SORT_RATING
+    return caching.get_or_set(
+        caching.RANKING,
+        ("snapshot", sort),
+        lambda: build_ranking(sort),
+        RANKING_CACHE_TIMEOUT,
+    )
+
+
+def load_ranked_playgrounds(
+    entries: RankingSnapshot, start_rank: int = 1
+) -> list[Playground]:
+    """
+    スナップショットの一部（1ページ分）の施設をまとめて取得し、順位 (rank) と
+    スコア (ranking_score) を付けてランキング順に並べて返す。
+    スナップショット作成後に削除された施設は除外する。
+    """
+    playgrounds = Playground.objects.in_bulk([pk for pk, _ in entries])
+    ranked = []
+    for offset, (pk, score) in enumerate(entries):
+        playground = playgrounds.get(pk)
+        if playground is None:
+            continue
+        playground.rank = start_rank + offset
+        playground.ranking_score = score
+        ranked.append(playground)
+    return ranked
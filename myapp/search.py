@@ -0,0 +1,88 @@
+"""
+施設のキーワード検索。
+
+日本語の形態素解析器を使わずに部分一致検索を行うため、施設名・住所・説明を文字の2-gram
+（bigram）に分割した検索用文書 (Playground.search_document) を保存時に作成しておき、
+検索語の2-gramがすべて含まれる施設を検索する。
+
+検索用文書は " 公園 園鹿 鹿児 " のように空白で区切った2-gramの並びで、各2-gramを
+" xx " という単語として LIKE で照合する。PostgreSQL ではこの列に pg_trgm の GIN
+インデックス（マイグレーション 0012 で作成）を張っているため、照合がインデックスで
+絞り込まれる。SQLite などでは同じ条件が通常の LIKE 検索として動作する。
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+from django.db.models import Case, IntegerField, Q, QuerySet, Value, When
+
+NGRAM_SIZE = 2
+
+# 単語の区切りとみなす文字（記号・空白・アンダースコア）
+_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+# 検索語が含まれる列ごとの関連度の重み
+RANK_WEIGHTS = (("name", 3), ("address", 2), ("description", 1))
+
+
+def normalize(text: str) -> str:
+    """全角英数字・半角カナなどの表記揺れをNFKC正規化でそろえ、小文字に変換する"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def split_words(text: str) -> list[str]:
+    """正規化したテキストを記号や空白で単語に分割する"""
+    return [word for word in _SEPARATOR_RE.split(normalize(text)) if word]
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    テキストを重複のないn-gramのリストに変換する。
+    n文字に満たない単語はそのまま1つのトークンとする。
+    """
+    tokens: dict[str, None] = {}
+    for word in split_words(text):
+        if len(word) <= NGRAM_SIZE:
+            tokens[word] = None
+            continue
+        for i in range(len(word) - NGRAM_SIZE + 1):
+            tokens[word[i : i + NGRAM_SIZE]] = None
+    return list(tokens)
+
+
+def build_search_document(*texts: str | None) -> str:
+    """施設名・住所・説明などから検索用文書を作成する"""
+    tokens = tokenize(" ".join(text for text in texts if text))
+    if not tokens:
+        return ""
+    return f" {' '.join(tokens)} "
+
+
+def search_playgrounds(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    検索語のn-gramをすべて含む施設に絞り込み、関連度 search_rank を付与する。
+    関連度は検索語の各単語が施設名・住所・説明のどれに含まれるかで重み付けした整数値。
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        # 記号だけの検索語などは絞り込まず、並び順の基準だけをそろえる
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    for token in tokens:
+        if len(token) < NGRAM_SIZE:
+            # 1文字の検索語は、その文字を含むいずれかの2-gramに一致させる
+            queryset = queryset.filter(search_document__contains=token)
+        else:
+            queryset = queryset.filter(search_document__contains=f" {token} ")
+
+    rank = Value(0, output_field=IntegerField())
+    for word in split_words(query):
+        for field_name, weight in RANK_WEIGHTS:
+            rank = rank + Case(
+                When(Q(**{f"{field_name}__icontains": word}), then=Value(weight)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+    return queryset.annotate(search_rank=rank)
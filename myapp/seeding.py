@@ -0,0 +1,441 @@
+"""
+負荷試験用の合成データ（施設・ユーザー・お気に入り・口コミ）の一括作成。
+seed_reviews は施設・ユーザーを作らず、既存の施設に既存のユーザーの口コミだけを作成する（開発用のダミーデータ）。
+
+乱数シードを固定すると同じデータを再現できる。テーブルごとにシードから別の乱数列を作るため、
+例えば口コミの件数だけを変えても施設やユーザーの内容は変わらない。
+
+行は batch_size 件ずつ作成して書き込む。書き込みは bulk_create か、PostgreSQL の場合は
+COPY FROM STDIN（1バッチを1回の COPY で送る）を使う。どちらもシグナルを経由しないため、
+最後に施設の評価集計を再計算し、キャッシュの名前空間を無効にする。
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Sequence, Type
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, models, transaction
+from django.db.models import Q
+from myapp import caching
+from myapp.geo import encode_geohash
+from myapp.models import Favorite, Playground, Review
+from myapp.search import build_search_document
+from users.models import CustomUser
+
+BULK = "bulk"
+COPY = "copy"
+METHODS = (BULK, COPY)
+
+# 口コミだけを作成する場合の、件数を省略したときの施設1件あたりの口コミ数
+REVIEWS_PER_PLAYGROUND = 35
+
+# 合成ユーザーのメールアドレスのドメインと、合成した施設の source_key の接頭辞
+# （--clear で削除する対象の判定に使う）
+SEED_EMAIL_DOMAIN = "seed.example.com"
+SEED_SOURCE_KEY_PREFIX = "seed:"
+
+CITIES = (
+    "鹿児島市",
+    "霧島市",
+    "鹿屋市",
+    "薩摩川内市",
+    "姶良市",
+    "指宿市",
+    "日置市",
+    "出水市",
+)
+FACILITY_KINDS = (
+    "こども公園",
+    "児童館",
+    "子育て支援センター",
+    "わんぱく広場",
+    "ふれあい広場",
+)
+PARKING_VALUES = tuple(value for value, _ in Playground.PARKING_CHOICES)
+AMENITY_FIELDS = (
+    "nursing_room_available",
+    "diaper_changing_station_available",
+    "stroller_accessible",
+    "lunch_allowed",
+    "indoor_play_area",
+    "kids_toilet_available",
+)
+
+# 評価に応じた口コミテンプレート
+REVIEW_TEMPLATES = {
+    5: (
+        "最高でした！子供がとても楽しんでいました。また来たいです！",
+        "素晴らしい施設です。清潔で設備も充実しており、一日中楽しめました。",
+        "スタッフの方々も親切で、安心して遊ばせることができました。大満足です！",
+        "期待以上の体験でした。子供の笑顔がたくさん見られて幸せです。",
+        "リピート確定です。子供のお気に入りの場所になりました。",
+    ),
+    4: (
+        "とても良かったです。子供も喜んでいました。",
+        "清潔感があり、快適に過ごせました。また利用したいと思います。",
+        "週末は少し混んでいましたが、それでも十分楽しめました。",
+        "設備も充実しており、子供が飽きずに遊んでいました。",
+    ),
+    3: (
+        "普通です。可もなく不可もなくといった印象。",
+        "まあまあ楽しめました。期待していたほどではなかったです。",
+        "料金相応の内容だと思います。",
+    ),
+    2: (
+        "想像していたより狭く、少し窮屈に感じました。",
+        "設備の一部が古くなっているのが気になりました。",
+        "案内が少し分かりにくく、迷ってしまいました。",
+    ),
+    1: (
+        "あまり楽しめませんでした。期待外れでした。",
+        "清掃が少し行き届いていないように感じました。",
+        "子供には合わなかったようです。すぐに飽きてしまいました。",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    """作成する件数と乱数シード"""
+
+    playgrounds: int = 1_000
+    users: int = 100
+    reviews: int = 10_000
+    favorites_per_user: int = 5
+    seed: int = 42
+    batch_size: int = 5_000
+
+
+@dataclass(frozen=True)
+class TableResult:
+    """1テーブル分の書き込み件数と所要時間"""
+
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# (テーブル名, 書き込んだ件数, 作成する件数, 経過秒数) を受け取る進捗の通知先
+ProgressCallback = Callable[[str, int, int, float], None]
+
+
+def _rng(seed: int, table: str) -> random.Random:
+    return random.Random(f"{seed}:{table}")
+
+
+def _batched(rows: Iterator[models.Model], size: int) -> Iterator[list[models.Model]]:
+    batch: list[models.Model] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_playgrounds(plan: SeedPlan) -> Iterator[Playground]:
+    """鹿児島県内に散らばる施設を作成する。検索用文書と geohash も作成しておく"""
+    rng = _rng(plan.seed, "playgrounds")
+    for i in range(plan.playgrounds):
+        city = rng.choice(CITIES)
+        name = f"{city}{rng.choice(FACILITY_KINDS)} {i + 1}"
+        address = f"鹿児島県{city}{rng.randint(1, 30)}丁目{rng.randint(1, 20)}-{rng.randint(1, 20)}"
+        description = f"{city}にある施設です。"
+        latitude = round(rng.uniform(31.2, 32.0), 6)
+        longitude = round(rng.uniform(130.2, 130.9), 6)
+        age_start = rng.choice((None, 0, 1, 3))
+        yield Playground(
+            source_key=f"{SEED_SOURCE_KEY_PREFIX}{plan.seed}:{i + 1}",
+            prefecture="鹿児島県",
+            name=name,
+            address=address,
+            phone=f"099{rng.randrange(10**7):07d}",
+            description=description,
+            latitude=latitude,
+            longitude=longitude,
+            geohash=encode_geohash(latitude, longitude),
+            search_document=build_search_document(name, address, description),
+            parking_info=rng.choice(PARKING_VALUES),
+            target_age_start=age_start,
+            target_age_end=None if age_start is None else age_start + rng.randint(3, 9),
+            fee_decimal=rng.choice((None, 0, 100, 300, 500)),
+            **{field: rng.random() < 0.5 for field in AMENITY_FIELDS},
+        )
+
+
+def generate_users(plan: SeedPlan) -> Iterator[CustomUser]:
+    """ログインできない（パスワードを使えない）合成ユーザーを作成する"""
+    password = make_password(None)
+    for i in range(plan.users):
+        yield CustomUser(
+            email=f"seed{plan.seed}-{i + 1}@{SEED_EMAIL_DOMAIN}",
+            account_name=f"利用者{i + 1}",
+            password=password,
+        )
+
+
+def generate_favorites(
+    plan: SeedPlan, user_ids: Sequence[int], playground_ids: Sequence[int]
+) -> Iterator[Favorite]:
+    """ユーザーごとに重複しない favorites_per_user 件の施設をお気に入りに登録する"""
+    rng = _rng(plan.seed, "favorites")
+    per_user = min(plan.favorites_per_user, len(playground_ids))
+    for user_id in user_ids:
+        for index in rng.sample(range(len(playground_ids)), per_user):
+            yield Favorite(user_id=user_id, playground_id=playground_ids[index])
+
+
+def generate_reviews(
+    plan: SeedPlan, user_ids: Sequence[int], playground_ids: Sequence[int]
+) -> Iterator[Review]:
+    """
+    口コミを作成する。一部の施設に口コミが集まるよう、施設の選び方を先頭の施設に偏らせる。
+    評価は9割を高評価 (4-5)、1割を低評価 (1-3) にする。
+    """
+    rng = _rng(plan.seed, "reviews")
+    count = len(playground_ids)
+    for _ in range(plan.reviews):
+        rating = rng.randint(4, 5) if rng.random() < 0.9 else rng.randint(1, 3)
+        yield Review(
+            playground_id=playground_ids[int(count * rng.random() ** 2)],
+            user_id=rng.choice(user_ids),
+            rating=rating,
+            content=rng.choice(REVIEW_TEMPLATES[rating]),
+        )
+
+
+def _copy_text(value: Any) -> str:
+    """COPY のテキスト形式の1列分の値を返す"""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_value(field: models.Field, row: models.Model) -> Any:
+    """
+    COPY で送る1列分の値を返す。JSONField は get_db_prep_save が psycopg の Jsonb を返し、
+    str() では JSON にならないため、JSON の文字列にする
+    """
+    value = field.pre_save(row, add=True)
+    if isinstance(field, models.JSONField):
+        value = field.get_prep_value(value)
+        return None if value is None else json.dumps(value, cls=field.encoder)
+    return field.get_db_prep_save(value, connection)
+
+
+def copy_rows(model: Type[models.Model], rows: list[models.Model]) -> None:
+    """PostgreSQL の COPY FROM STDIN で行をまとめて書き込む（主キーは自動採番）"""
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if not isinstance(field, models.AutoField)
+    ]
+    buffer = io.StringIO()
+    for row in rows:
+        values = (_copy_value(field, row) for field in fields)
+        buffer.write("\t".join(_copy_text(value) for value in values))
+        buffer.write("\n")
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    sql = (
+        f"COPY {quote(model._meta.db_table)} "
+        f"({', '.join(quote(field.column) for field in fields)}) FROM STDIN"
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def write_rows(
+    model: Type[models.Model],
+    rows: Iterator[models.Model],
+    total: int,
+    plan: SeedPlan,
+    method: str,
+    progress: Optional[ProgressCallback] = None,
+) -> TableResult:
+    """行を batch_size 件ずつ書き込み、件数と所要時間を返す"""
+    table = model._meta.db_table
+    written = 0
+    started = time.perf_counter()
+    for batch in _batched(rows, plan.batch_size):
+        if method == COPY:
+            copy_rows(model, batch)
+        else:
+            model.objects.bulk_create(batch)
+        written += len(batch)
+        if progress is not None:
+            progress(table, written, total, time.perf_counter() - started)
+    return TableResult(table, written, time.perf_counter() - started)
+
+
+def _ids_after(model: Type[models.Model], last_id: int) -> list[int]:
+    """last_id より後に作成された行の主キーを昇順で返す"""
+    return list(
+        model.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def _last_id(model: Type[models.Model]) -> int:
+    return model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+
+def default_method() -> str:
+    return COPY if connection.vendor == "postgresql" else BULK
+
+
+def clear_seed_data() -> None:
+    """
+    合成した施設・ユーザーと、それらのお気に入り・口コミを削除する（取り込んだ施設や実際のユーザーは残す）。
+    施設・口コミの post_delete のシグナルで1件ずつ集計の更新やキャッシュの無効化が走らないよう、
+    シグナルを経由せずにまとめて削除し、最後に評価集計の再計算とキャッシュの無効化を1回だけ行う
+    """
+    playgrounds = Playground.objects.filter(
+        source_key__startswith=SEED_SOURCE_KEY_PREFIX
+    )
+    users = CustomUser.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}")
+    seeded = Q(playground__in=playgrounds) | Q(user__in=users)
+    _raw_delete(Review.objects.filter(seeded))
+    _raw_delete(Favorite.objects.filter(seeded))
+    _raw_delete(playgrounds)
+    # 口コミ・お気に入りは削除済みのため、残りの関連（メールアドレスなど）は通常の削除で消す
+    users.delete()
+    _after_bulk_delete()
+
+
+def clear_reviews() -> None:
+    """口コミをすべて削除する（シグナルを経由せずにまとめて削除する）"""
+    _raw_delete(Review.objects.all())
+    _after_bulk_delete()
+
+
+def _raw_delete(queryset: models.QuerySet) -> int:
+    """シグナルとカスケードを経由せずに1回の DELETE で削除する"""
+    return queryset._raw_delete(queryset.db)
+
+
+def _after_bulk_delete() -> None:
+    Playground.objects.recalculate_rating_aggregates()
+    transaction.on_commit(invalidate_all_caches)
+
+
+def _resolve_method(method: Optional[str]) -> str:
+    method = method or default_method()
+    if method not in METHODS:
+        raise ValueError(f"method は {', '.join(METHODS)} のいずれかを指定してください")
+    if method == COPY and connection.vendor != "postgresql":
+        raise ValueError("COPY は PostgreSQL でのみ使用できます")
+    return method
+
+
+def seed(
+    plan: SeedPlan,
+    method: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> list[TableResult]:
+    """
+    計画どおりに施設・ユーザー・お気に入り・口コミを作成し、テーブルごとの結果を返す。
+    method を省略した場合は PostgreSQL なら COPY、それ以外は bulk_create を使う。
+    """
+    method = _resolve_method(method)
+
+    last_playground_id = _last_id(Playground)
+    last_user_id = _last_id(CustomUser)
+    results = [
+        write_rows(
+            Playground,
+            generate_playgrounds(plan),
+            plan.playgrounds,
+            plan,
+            method,
+            progress,
+        ),
+        write_rows(
+            CustomUser, generate_users(plan), plan.users, plan, method, progress
+        ),
+    ]
+    playground_ids = _ids_after(Playground, last_playground_id)
+    user_ids = _ids_after(CustomUser, last_user_id)
+    if playground_ids and user_ids:
+        results.append(
+            write_rows(
+                Favorite,
+                generate_favorites(plan, user_ids, playground_ids),
+                len(user_ids) * min(plan.favorites_per_user, len(playground_ids)),
+                plan,
+                method,
+                progress,
+            )
+        )
+        results.append(
+            write_rows(
+                Review,
+                generate_reviews(plan, user_ids, playground_ids),
+                plan.reviews,
+                plan,
+                method,
+                progress,
+            )
+        )
+        Playground.objects.recalculate_rating_aggregates()
+
+    # シグナルを経由していないため、コミット後に施設・口コミのキャッシュをまとめて無効にする
+    transaction.on_commit(invalidate_all_caches)
+    return results
+
+
+def seed_reviews(
+    plan: SeedPlan,
+    method: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> list[TableResult]:
+    """
+    既存の施設に、既存のユーザーの口コミを plan.reviews 件作成する（施設・ユーザーは作成しない）。
+    施設かユーザーが1件もなければ ValueError
+    """
+    method = _resolve_method(method)
+    playground_ids = _ids_after(Playground, 0)
+    user_ids = _ids_after(CustomUser, 0)
+    if not playground_ids or not user_ids:
+        raise ValueError("施設とユーザーを先に作成してください")
+
+    result = write_rows(
+        Review,
+        generate_reviews(plan, user_ids, playground_ids),
+        plan.reviews,
+        plan,
+        method,
+        progress,
+    )
+    Playground.objects.recalculate_rating_aggregates()
+    transaction.on_commit(invalidate_all_caches)
+    return [result]
+
+
+def invalidate_all_caches() -> None:
+    """すべての名前空間のキャッシュを無効にする"""
+    for namespace in caching.NAMESPACES:
+        caching.bump_namespace(namespace)
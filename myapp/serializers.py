@@ -0,0 +1,22 @@
+from typing import Any, Dict
+from myapp.models import Playground
+
+
+def serialize_playground_for_map(playground: Playground) -> Dict[str, Any]:
+    """
+    地図のマーカー・ポップアップ表示に必要な施設情報を辞書に変換する。
+    formatted_phone などの表示用プロパティもここで展開する。
+    """
+    return {
+        "id": playground.id,
+        "name": playground.name,
+        "address": playground.address,
+        "phone": playground.phone,  # 元の電話番号も保持
+        "formatted_phone": playground.formatted_phone,  # フォーマット済み電話番号
+        "latitude": playground.latitude,
+        "longitude": playground.longitude,
+        "opening_hours": playground.formatted_opening_hours,
+        "target_age": playground.formatted_target_age,
+        "fee": playground.formatted_fee,
+        "parking": playground.formatted_parking,
+    }
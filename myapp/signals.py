@@ -0,0 +1,124 @@
+from functools import partial
+from typing import Optional
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from myapp import caching, metrics
+from myapp.bitmap_index import amenity_index
+from myapp.models import Playground, Review
+from users.models import CustomUser
+
+
+@receiver(post_save, sender=Playground)
+def playground_saved(sender, instance, created, **kwargs):
+    """
+    施設が追加・更新されたときに、コミット後に施設の総数・地図のクラスタ・ページなどのキャッシュを無効にし、
+    設備のビットマップインデックスに反映する。
+    コミットより前に無効にすると、他のワーカーがコミット前の内容でインデックスやキャッシュを
+    新しいバージョンで作り直してしまい、ロールバックした場合もこのプロセスのインデックスに変更が残るため
+    """
+    transaction.on_commit(partial(invalidate_playground_caches, instance.pk, instance))
+
+
+@receiver(post_delete, sender=Playground)
+def playground_deleted(sender, instance, **kwargs):
+    """施設が削除されたときに、コミット後に施設・ランキング・ページのキャッシュを無効にし、ビットマップインデックスから除く"""
+    transaction.on_commit(
+        partial(invalidate_playground_caches, instance.pk, None, deleted=True)
+    )
+
+
+def invalidate_playground_caches(
+    pk: int, playground: Optional[Playground], deleted: bool = False
+) -> None:
+    """施設の保存（playground が None の場合は削除）をビットマップインデックスに反映し、施設のキャッシュを無効にする"""
+    version = caching.bump_namespace(caching.PLAYGROUND)
+    amenity_index.apply(pk, playground, version)
+    caching.bump_namespace(caching.TILE)
+    if deleted:
+        caching.bump_namespace(caching.RANKING)
+    caching.bump_namespace(caching.PAGE)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, raw, **kwargs):
+    """既存の口コミを更新する前に、更新前の施設を記録しておく"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_playground_id = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list("playground_id", flat=True)
+        .first()
+    )
+
+
+def invalidate_review_caches() -> None:
+    """口コミ・ランキング・ページのキャッシュを無効にする"""
+    caching.bump_namespace(caching.REVIEW)
+    caching.bump_namespace(caching.RANKING)
+    caching.bump_namespace(caching.PAGE)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw, **kwargs):
+    """
+    口コミの追加・更新に合わせて施設の評価集計を更新し、コミット後に口コミ・ランキング・ページのキャッシュを無効にする。
+    集計の更新とコミットより前に無効にすると、その間にランキングなどを作り直したリクエストが
+    古い集計を新しいバージョンのキャッシュに入れてしまうため、無効にするのは最後に行う。
+    """
+    if raw:
+        return
+    if created:
+        metrics.REVIEWS_POSTED.inc()
+        Playground.objects.record_review_added(instance.playground_id, instance.rating)
+    else:
+        # 評価の変更や施設の付け替えは差分が分からないため、関係する施設を再集計する
+        playground_ids = {instance.playground_id}
+        previous_id = getattr(instance, "_previous_playground_id", None)
+        if previous_id is not None:
+            playground_ids.add(previous_id)
+        Playground.objects.recalculate_rating_aggregates(playground_ids)
+    transaction.on_commit(invalidate_review_caches)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """口コミが削除されたときに施設の評価集計を更新し、コミット後に口コミ・ランキング・ページのキャッシュを無効にする"""
+    Playground.objects.record_review_removed(instance.playground_id, instance.rating)
+    transaction.on_commit(invalidate_review_caches)
+
+
+@receiver(pre_save, sender=CustomUser)
+def user_saving(sender, instance, raw, update_fields, **kwargs):
+    """ユーザーを更新する前に、アカウント名が変わるかを記録しておく"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    # ログイン時の last_login の更新などでは問い合わせない
+    if update_fields is not None and "account_name" not in update_fields:
+        return
+    previous = (
+        CustomUser.objects.filter(pk=instance.pk)
+        .values_list("account_name", flat=True)
+        .first()
+    )
+    instance._account_name_changed = previous != instance.account_name
+    if instance._account_name_changed:
+        # 施設ページの条件付きGET (myapp.conditional) で投稿者名の変更を検出するため
+        instance.account_name_changed_at = timezone.now()
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, **kwargs):
+    """アカウント名が変わったときに、コミット後に投稿者名を表示する口コミ・ページのキャッシュを無効にする"""
+    if not getattr(instance, "_account_name_changed", False):
+        return
+    instance._account_name_changed = False
+    transaction.on_commit(invalidate_author_caches)
+
+
+def invalidate_author_caches() -> None:
+    """投稿者名を表示する口コミ・ページのキャッシュを無効にする"""
+    caching.bump_namespace(caching.REVIEW)
+    caching.bump_namespace(caching.PAGE)
@@ -9,6 +9,28 @@ interface Playground {
   formatted_phone: string;
   latitude: string | number;
   longitude: string | number;
+  distance_km?: number; // 範囲指定で取得した場合の基準点からの距離
+}
+
+// サーバー側で複数の遊び場をまとめたクラスタ
+interface Cluster {
+  latitude: number;
+  longitude: number;
+  count: number;
+}
+
+// クラスタAPIが返す1タイル分のデータ
+interface ClusterTile {
+  zoom: number;
+  clusters: Cluster[];
+  playgrounds: Playground[];
+}
+
+// 地図タイルの位置（ズームレベル、列、行）
+interface TileCoords {
+  z: number;
+  x: number;
+  y: number;
 }
 
 // windowオブジェクトにカスタムプロパティの型を定義
@@ -27,6 +49,10 @@ declare global {
  */
 class MapManager {
   private L: typeof L;
+  private loadedDataUrl: string | null = null;
+  private clusterLayer: L.LayerGroup | null = null;
+  private loadedTiles = new Set<string>();
+  private tileZoom: number | null = null;
   public readonly KAGOSHIMA_CENTER: L.LatLngTuple = [31.5602, 130.5581];
   public readonly DEFAULT_ZOOM_LEVEL: number = 10;
 
@@ -77,19 +103,179 @@ class MapManager {
     }).addTo(window.mapInstance);
 
     playgrounds.forEach((playground) => {
-      if (playground.latitude && playground.longitude) {
-        const position: L.LatLngTuple = [
-          parseFloat(playground.latitude as string),
-          parseFloat(playground.longitude as string),
-        ];
-        const marker = this.L.marker(position).addTo(window.mapInstance!);
-        marker.bindPopup(() => this.createPopupContent(playground));
-      }
+      this.createPlaygroundMarker(playground)?.addTo(window.mapInstance!);
     });
 
     setTimeout(() => this.updateFavoriteButtonsOnMap(window.favorite_ids), 500);
   }
 
+  /**
+   * @param {Playground} playground - 遊び場の情報を含むオブジェクト。
+   * @returns {L.Marker | null} ポップアップ付きのピン。位置情報がない場合はnull。
+   */
+  createPlaygroundMarker(playground: Playground): L.Marker | null {
+    if (!(playground.latitude && playground.longitude)) {
+      return null;
+    }
+    const position: L.LatLngTuple = [
+      parseFloat(playground.latitude as string),
+      parseFloat(playground.longitude as string),
+    ];
+    const marker = this.L.marker(position);
+    marker.bindPopup(() => this.createPopupContent(playground));
+    return marker;
+  }
+
+  /**
+   * 件数を表示したクラスタのピンを作成します。クリックすると拡大します。
+   * @param {Cluster} cluster - クラスタの重心と件数。
+   * @returns {L.Marker} クラスタのピン。
+   */
+  createClusterMarker(cluster: Cluster): L.Marker {
+    const position: L.LatLngTuple = [cluster.latitude, cluster.longitude];
+    const marker = this.L.marker(position, {
+      icon: this.L.divIcon({
+        html: `<span>${cluster.count}</span>`,
+        className: 'map-cluster',
+        iconSize: [40, 40],
+      }),
+    });
+    marker.on('click', () => {
+      const map = window.mapInstance;
+      if (map) {
+        map.setView(position, map.getZoom() + 2);
+      }
+    });
+    return marker;
+  }
+
+  /**
+   * 表示範囲に含まれる地図タイルの一覧を返します。
+   * @param {L.LatLngBounds} bounds - 地図の表示範囲。
+   * @param {number} zoom - ズームレベル。
+   * @returns {TileCoords[]} タイルの位置の配列。
+   */
+  visibleTiles(bounds: L.LatLngBounds, zoom: number): TileCoords[] {
+    const n = 2 ** zoom;
+    const clamp = (value: number): number =>
+      Math.min(Math.max(Math.floor(value), 0), n - 1);
+    const column = (lng: number): number => clamp(((lng + 180) / 360) * n);
+    const row = (lat: number): number => {
+      const rad = (lat * Math.PI) / 180;
+      return clamp(
+        ((1 - Math.log(Math.tan(rad) + 1 / Math.cos(rad)) / Math.PI) / 2) * n,
+      );
+    };
+
+    const tiles: TileCoords[] = [];
+    for (let x = column(bounds.getWest()); x <= column(bounds.getEast()); x++) {
+      for (let y = row(bounds.getNorth()); y <= row(bounds.getSouth()); y++) {
+        tiles.push({ z: zoom, x, y });
+      }
+    }
+    return tiles;
+  }
+
+  /**
+   * クラスタAPIのURLテンプレートにタイルの位置を埋め込みます。
+   * @param {string} template - タイル位置が /0/0/0/ のクラスタAPIのURL。
+   * @param {TileCoords} tile - タイルの位置。
+   * @returns {string} タイルのクラスタを取得するURL。
+   */
+  buildTileUrl(template: string, tile: TileCoords): string {
+    return template.replace('/0/0/0/', `/${tile.z}/${tile.x}/${tile.y}/`);
+  }
+
+  /**
+   * 1タイル分のクラスタをAPIから取得します。
+   * @param {string} url - タイルのクラスタを取得するURL。
+   * @returns {Promise<ClusterTile>} タイル内のクラスタと遊び場。
+   */
+  fetchClusterTile(url: string): Promise<ClusterTile> {
+    return fetch(url, { headers: { Accept: 'application/json' } }).then(
+      (response) => {
+        if (!response.ok) {
+          throw new Error(`地図データの取得に失敗しました: ${response.status}`);
+        }
+        return response.json() as Promise<ClusterTile>;
+      },
+    );
+  }
+
+  /**
+   * 表示範囲のうち、まだ取得していないタイルのクラスタを取得して地図に配置します。
+   * ズームレベルが変わった場合は、配置済みのピンをすべて取り除いてから取得し直します。
+   * @param {string} template - タイル位置が /0/0/0/ のクラスタAPIのURL。
+   * @returns {Promise<void>} 非同期操作のPromise。
+   */
+  loadVisibleTiles(template: string): Promise<void> {
+    const map = window.mapInstance;
+    const layer = this.clusterLayer;
+    if (!map || !layer) {
+      return Promise.resolve();
+    }
+    const zoom = Math.round(map.getZoom());
+    if (zoom !== this.tileZoom) {
+      layer.clearLayers();
+      this.loadedTiles.clear();
+      this.tileZoom = zoom;
+    }
+
+    const requests = this.visibleTiles(map.getBounds(), zoom)
+      .map((tile) => this.buildTileUrl(template, tile))
+      .filter((url) => !this.loadedTiles.has(url))
+      .map((url) => {
+        this.loadedTiles.add(url);
+        return this.fetchClusterTile(url).then(
+          (tile) => {
+            // 取得中に地図が作り直されたりズームが変わった場合は配置しない
+            if (this.clusterLayer !== layer || this.tileZoom !== tile.zoom) {
+              return;
+            }
+            tile.clusters.forEach((cluster) =>
+              this.createClusterMarker(cluster).addTo(layer),
+            );
+            tile.playgrounds.forEach((playground) =>
+              this.createPlaygroundMarker(playground)?.addTo(layer),
+            );
+          },
+          (error) => {
+            // 失敗したタイルは次の移動時に再取得する
+            this.loadedTiles.delete(url);
+            throw error;
+          },
+        );
+      });
+    return Promise.all(requests).then(() =>
+      this.updateFavoriteButtonsOnMap(window.favorite_ids),
+    );
+  }
+
+  /**
+   * 地図を描画し、表示範囲のクラスタを配置します。
+   * 地図を移動・拡大縮小するたびに、新たに表示されたタイルのクラスタを取得します。
+   * 同じURLのデータで描画済みの場合は再取得しません。
+   * @param {string} template - タイル位置が /0/0/0/ のクラスタAPIのURL（検索条件のクエリ文字列を含む）。
+   * @returns {Promise<void>} 非同期操作のPromise。
+   */
+  loadMap(template: string): Promise<void> {
+    if (this.loadedDataUrl === template && window.mapInstance) {
+      return Promise.resolve();
+    }
+    this.loadedDataUrl = template;
+    this.initMap([]);
+    this.clusterLayer = this.L.layerGroup().addTo(window.mapInstance!);
+    this.loadedTiles.clear();
+    this.tileZoom = null;
+    window.mapInstance!.on('moveend', () => {
+      this.loadVisibleTiles(template).catch((error) => console.error(error));
+    });
+    return this.loadVisibleTiles(template).catch((error) => {
+      this.loadedDataUrl = null;
+      throw error;
+    });
+  }
+
   /**
    * @param {Playground[]} playgrounds - お気に入り遊び場の情報を含むオブジェクトの配列。
    */
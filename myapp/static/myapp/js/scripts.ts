@@ -6,7 +6,18 @@ const isAuthenticated = (): boolean => {
   return document.body.dataset.isAuthenticated === 'true';
 };
 
+// json_scriptタグで埋め込まれたデータを読み取る関数
+const readJsonScript = <T>(elementId: string, fallback: T): T => {
+  const element = document.getElementById(elementId);
+  return element?.textContent
+    ? (JSON.parse(element.textContent) as T)
+    : fallback;
+};
+
 document.addEventListener('DOMContentLoaded', () => {
+  if (!window.favorite_ids) {
+    window.favorite_ids = readJsonScript<string[]>('favorite-ids', []);
+  }
   const mapManager = new MapManager();
   // FavoriteManagerに認証チェック関数を注入してインスタンス化
   const favoriteManager = new FavoriteManager(undefined, isAuthenticated);
@@ -14,8 +25,13 @@ document.addEventListener('DOMContentLoaded', () => {
   const mapTab = document.getElementById('map-tab');
   if (mapTab) {
     mapTab.addEventListener('shown.bs.tab', () => {
-      if (document.getElementById('map-container')) {
-        mapManager.initMap(window.playgrounds);
+      const mapContainer = document.getElementById('map-container');
+      if (mapContainer) {
+        // 地図データは地図タブを開いたときに、表示範囲のタイルごとに取得する
+        const clusterUrl = mapContainer.dataset.mapClusterUrl;
+        if (clusterUrl) {
+          mapManager.loadMap(clusterUrl).catch((error) => console.error(error));
+        }
       } else if (document.getElementById('mypage-map-container')) {
         mapManager.initFavoritesMap(window.playgrounds);
       }
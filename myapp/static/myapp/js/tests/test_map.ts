@@ -17,6 +17,9 @@ interface MockMapType extends Partial<L.Map> {
   setView: jest.Mock<L.Map, [L.LatLngExpression, number?, L.ZoomPanOptions?]>;
   remove: jest.Mock<L.Map, []>;
   addLayer: jest.Mock<L.Map, [L.Layer]>;
+  on: jest.Mock;
+  getBounds: jest.Mock;
+  getZoom: jest.Mock;
 }
 
 interface MockTileLayerType extends Partial<L.TileLayer> {
@@ -26,19 +29,37 @@ interface MockTileLayerType extends Partial<L.TileLayer> {
 interface MockMarkerType extends Partial<L.Marker> {
   addTo: jest.Mock<L.Marker, [L.Map | L.LayerGroup | string]>;
   bindPopup: jest.Mock<L.Marker, [L.Content, L.PopupOptions?]>;
+  on: jest.Mock;
+}
+
+interface MockLayerGroupType extends Partial<L.LayerGroup> {
+  addTo: jest.Mock;
+  clearLayers: jest.Mock;
 }
 
 interface MockLeafletType {
   map: jest.Mock<MockMapType, [string]>;
   tileLayer: jest.Mock<MockTileLayerType, [string, L.TileLayerOptions?]>;
   marker: jest.Mock<MockMarkerType, [L.LatLngExpression, L.MarkerOptions?]>;
+  layerGroup: jest.Mock<MockLayerGroupType, []>;
+  divIcon: jest.Mock;
 }
 
+// 鹿児島市付近を表示したときの範囲
+const mockBounds = {
+  getWest: () => 130.4,
+  getEast: () => 130.7,
+  getNorth: () => 31.7,
+  getSouth: () => 31.4,
+  toBBoxString: () => '130.4,31.4,130.7,31.7',
+};
+
 describe('MapManager', () => {
   let mapManager: MapManager;
   let mockMap: MockMapType; // Changed type
   let mockTileLayer: MockTileLayerType; // Changed type
   let mockMarker: MockMarkerType; // Changed type
+  let mockLayerGroup: MockLayerGroupType;
   let mockL: MockLeafletType; // Changed type
   let mockDocumentQuerySelectorAll: jest.Mock;
 
@@ -47,6 +68,11 @@ describe('MapManager', () => {
     mockMarker = {
       addTo: jest.fn().mockReturnThis(),
       bindPopup: jest.fn(),
+      on: jest.fn(),
+    };
+    mockLayerGroup = {
+      addTo: jest.fn().mockReturnThis(),
+      clearLayers: jest.fn(),
     };
     mockTileLayer = {
       addTo: jest.fn().mockReturnThis(),
@@ -55,6 +81,9 @@ describe('MapManager', () => {
       setView: jest.fn(),
       remove: jest.fn(),
       addLayer: jest.fn(),
+      on: jest.fn(),
+      getBounds: jest.fn(() => mockBounds),
+      getZoom: jest.fn(() => 10),
     };
 
     mockL = {
@@ -65,6 +94,8 @@ describe('MapManager', () => {
       marker: jest.fn(
         (_latlng: L.LatLngExpression, _options?: L.MarkerOptions) => mockMarker,
       ),
+      layerGroup: jest.fn(() => mockLayerGroup),
+      divIcon: jest.fn((options: L.DivIconOptions) => options),
     };
 
     // DOM要素をモック
@@ -145,6 +176,116 @@ describe('MapManager', () => {
     });
   });
 
+  describe('visibleTiles', () => {
+    test('表示範囲を含むタイルの一覧を返すこと', () => {
+      // ズームレベル10では鹿児島市付近が列882〜883、行416〜417のタイルに含まれる
+      expect(
+        mapManager.visibleTiles(mockBounds as unknown as L.LatLngBounds, 10),
+      ).toEqual([
+        { z: 10, x: 882, y: 416 },
+        { z: 10, x: 882, y: 417 },
+        { z: 10, x: 883, y: 416 },
+        { z: 10, x: 883, y: 417 },
+      ]);
+    });
+  });
+
+  describe('buildTileUrl', () => {
+    test('URLテンプレートにタイルの位置を埋め込み、検索条件を保持すること', () => {
+      expect(
+        mapManager.buildTileUrl('/api/playgrounds/clusters/0/0/0/?q=park', {
+          z: 10,
+          x: 882,
+          y: 416,
+        }),
+      ).toBe('/api/playgrounds/clusters/10/882/416/?q=park');
+    });
+  });
+
+  describe('loadMap', () => {
+    const template = '/api/playgrounds/clusters/0/0/0/?q=park';
+    const mockTile = {
+      zoom: 10,
+      clusters: [{ latitude: 31.56, longitude: 130.55, count: 5 }],
+      playgrounds: [
+        {
+          id: '1',
+          name: 'Park 1',
+          address: 'Addr 1',
+          phone: '111',
+          formatted_phone: '111-1',
+          latitude: '31.5',
+          longitude: '130.5',
+        },
+      ],
+    };
+    let mockFetch: jest.Mock;
+
+    beforeEach(() => {
+      mockFetch = jest.fn(() =>
+        Promise.resolve({
+          ok: true,
+          json: () => Promise.resolve(mockTile),
+        }),
+      );
+      global.fetch = mockFetch as unknown as typeof fetch;
+    });
+
+    test('表示範囲のタイルごとにクラスタを取得して配置すること', async () => {
+      await mapManager.loadMap(template);
+
+      expect(mockFetch).toHaveBeenCalledTimes(4);
+      expect(mockFetch).toHaveBeenCalledWith(
+        '/api/playgrounds/clusters/10/882/416/?q=park',
+        expect.anything(),
+      );
+      // タイルごとにクラスタ1件と遊び場1件のピンを配置する
+      expect(mockL.marker).toHaveBeenCalledTimes(8);
+      expect(mockL.divIcon).toHaveBeenCalledWith(
+        expect.objectContaining({ html: '<span>5</span>' }),
+      );
+      expect(mockMarker.addTo).toHaveBeenCalledWith(mockLayerGroup);
+    });
+
+    test('地図を移動しても取得済みのタイルは再取得しないこと', async () => {
+      await mapManager.loadMap(template);
+      expect(mockMap.on).toHaveBeenCalledWith('moveend', expect.any(Function));
+
+      await mapManager.loadVisibleTiles(template);
+
+      expect(mockFetch).toHaveBeenCalledTimes(4);
+    });
+
+    test('ズームレベルが変わるとピンを取り除いてタイルを取得し直すこと', async () => {
+      await mapManager.loadMap(template);
+      mockMap.getZoom.mockReturnValue(11);
+
+      await mapManager.loadVisibleTiles(template);
+
+      expect(mockLayerGroup.clearLayers).toHaveBeenCalledTimes(2);
+      expect(mockFetch.mock.calls[4][0]).toMatch(
+        /^\/api\/playgrounds\/clusters\/11\//,
+      );
+    });
+
+    test('同じURLで描画済みの場合、データを再取得しないこと', async () => {
+      await mapManager.loadMap(template);
+      await mapManager.loadMap(template);
+
+      expect(mockFetch).toHaveBeenCalledTimes(4);
+    });
+
+    test('APIがエラーを返した場合、Promiseが拒否されること', async () => {
+      mockFetch.mockImplementation(() =>
+        Promise.resolve({ ok: false, status: 500 }),
+      );
+
+      await expect(mapManager.loadMap(template)).rejects.toThrow(
+        '地図データの取得に失敗しました',
+      );
+    });
+  });
+
   describe('initFavoritesMap', () => {
     const mockPlaygrounds: MockPlayground[] = [
       {
@@ -10,6 +10,10 @@ def is_favorite(playground, user):
     """ユーザーが施設をお気に入り登録しているか判定する"""
     if not user.is_authenticated:
         return False
+    # 一覧ビューで判定済みの場合は、施設ごとのクエリを発行しない
+    is_favorited = getattr(playground, "is_favorited", None)
+    if is_favorited is not None:
+        return is_favorited
     return Favorite.objects.filter(playground=playground, user=user).exists()
 
 
@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import cache
+from myapp.bitmap_index import amenity_index
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    テスト間でキャッシュの内容が持ち越されないよう、各テストの前後でキャッシュを空にする。
+    プロセス内のビットマップインデックスもバージョンの確認を間引くため、合わせて捨てる
+    """
+    cache.clear()
+    amenity_index.reset()
+    yield
+    cache.clear()
+    amenity_index.reset()
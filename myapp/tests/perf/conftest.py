@@ -0,0 +1,115 @@
+"""
+性能予算テスト (pytest -m perf) 用の合成データと結果の集計。
+
+budgets.json の dataset に従って、鹿児島県内に散らばる施設・口コミ・ユーザーを
+モジュール単位で一括作成し、テスト後に削除する。
+"""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from myapp.geo import encode_geohash
+from myapp.models import Favorite, Playground, Review
+from myapp.search import build_search_document
+from users.models import CustomUser
+
+BUDGET_FILE = Path(__file__).with_name("budgets.json")
+PARKING_VALUES = [value for value, _ in Playground.PARKING_CHOICES]
+CITIES = ["鹿児島市", "霧島市", "鹿屋市", "薩摩川内市", "姶良市", "指宿市"]
+
+# 計測結果（ターミナルの最後に一覧で表示する）
+RESULTS: list[dict] = []
+
+
+def load_budgets() -> dict:
+    return json.loads(BUDGET_FILE.read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def perf_dataset(django_db_setup, django_db_blocker):
+    """合成データを作成し、計測に使う施設・ユーザーを返す"""
+    dataset = load_budgets()["dataset"]
+    rng = random.Random(dataset["seed"])
+    with django_db_blocker.unblock():
+        playgrounds = []
+        for i in range(dataset["playgrounds"]):
+            name = f"{rng.choice(CITIES)}こども公園 {i}"
+            address = f"鹿児島県{rng.choice(CITIES)}{rng.randint(1, 30)}丁目"
+            latitude = rng.uniform(31.2, 32.0)
+            longitude = rng.uniform(130.2, 130.9)
+            playgrounds.append(
+                Playground(
+                    prefecture="鹿児島県",
+                    name=name,
+                    address=address,
+                    latitude=latitude,
+                    longitude=longitude,
+                    geohash=encode_geohash(latitude, longitude),
+                    search_document=build_search_document(name, address),
+                    parking_info=rng.choice(PARKING_VALUES),
+                    nursing_room_available=rng.random() < 0.5,
+                    lunch_allowed=rng.random() < 0.5,
+                )
+            )
+        playgrounds = Playground.objects.bulk_create(playgrounds, batch_size=2000)
+
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(email=f"perf{i}@example.com", account_name=f"利用者{i}")
+                for i in range(dataset["users"])
+            ]
+        )
+        reviews = [
+            Review(
+                playground=playground,
+                user=rng.choice(users),
+                content="子どもが楽しく遊べました。",
+                rating=rng.randint(1, 5),
+            )
+            for playground in playgrounds[: dataset["reviewed_playgrounds"]]
+            for _ in range(dataset["reviews_per_playground"])
+        ]
+        Review.objects.bulk_create(reviews, batch_size=2000)
+        Playground.objects.recalculate_rating_aggregates()
+
+        user = users[0]
+        Favorite.objects.bulk_create(
+            [
+                Favorite(user=user, playground=playground)
+                for playground in playgrounds[: dataset["favorites"]]
+            ]
+        )
+        # URLconf・テンプレートなどの初回の読み込みを最初に計測するURLの時間に含めないよう、一度アクセスしておく
+        Client().get(reverse("myapp:about"))
+        yield {"user": user, "playground": playgrounds[0]}
+
+        Favorite.objects.all().delete()
+        Review.objects.all().delete()
+        Playground.objects.all().delete()
+        CustomUser.objects.filter(pk__in=[u.pk for u in users]).delete()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("performance budgets")
+    terminalreporter.write_line(
+        f"{'route':<28}{'user':<15}{'queries':>14}{'median(ms)':>12}{'p95(ms)':>20}"
+    )
+    for result in RESULTS:
+        queries = f"{result['queries']}/{result['budget_queries']}"
+        p95 = f"{result['p95_ms']:.1f}/{result['budget_p95_ms']:.0f}"
+        if not result["queries_ok"]:
+            mark = "  <-- over budget"
+        elif not result["latency_ok"]:
+            mark = "  <-- slow (not enforced)"
+        else:
+            mark = ""
+        terminalreporter.write_line(
+            f"{result['route']:<28}{result['user']:<15}{queries:>14}"
+            f"{result['median_ms']:>12.1f}{p95:>20}{mark}"
+        )
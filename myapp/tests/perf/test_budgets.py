@@ -0,0 +1,170 @@
+"""
+全URLのクエリ数・応答時間 (p95) が budgets.json の予算内に収まっているかを確認するテスト。
+
+    pytest -m perf
+
+各URLに warmup 回アクセスしてから、キャッシュを空にした状態で iterations 回ずつアクセスし、
+最大のクエリ数と応答時間の中央値・p95 を計測する。
+クエリ数が予算を超えた場合は予算と実測値の差分を表示して失敗する。
+応答時間は CI の共有ランナーでは GC や他のジョブの影響で外れ値が出るため、予算を超えても失敗にはせず、
+警告と結果の一覧に表示するだけにする。
+意図した変更で予算を変える場合は budgets.json を更新し、version を上げる。
+"""
+
+import math
+import statistics
+import time
+import warnings
+
+import pytest
+from accounts import urls as accounts_urls
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from myapp import urls as myapp_urls
+
+from .conftest import RESULTS, load_budgets
+
+pytestmark = pytest.mark.perf
+
+BUDGET_VERSION = 2
+BUDGETS = load_budgets()
+USER_KINDS = ("anonymous", "authenticated")
+BUDGETS_PATH_HINT = "myapp/tests/perf/budgets.json"
+
+# URL名 → 計測するリクエスト (メソッド, パス, データ)
+ROUTES = {
+    "myapp:index": lambda d: ("get", reverse("myapp:index"), {}),
+    "myapp:playground_map_data": lambda d: (
+        "get",
+        reverse("myapp:playground_map_data"),
+        {"bbox": "130.4,31.4,130.7,31.7"},
+    ),
+    "myapp:playground_clusters": lambda d: (
+        "get",
+        reverse("myapp:playground_clusters", kwargs={"z": 10, "x": 882, "y": 416}),
+        {},
+    ),
+    "myapp:facility_detail": lambda d: (
+        "get",
+        reverse("myapp:facility_detail", kwargs={"pk": d["playground"].pk}),
+        {},
+    ),
+    "myapp:ranking": lambda d: ("get", reverse("myapp:ranking"), {}),
+    "myapp:favorites": lambda d: ("get", reverse("myapp:favorites"), {}),
+    "myapp:add_favorite": lambda d: (
+        "post",
+        reverse("myapp:add_favorite"),
+        {"playground_id": d["playground"].pk},
+    ),
+    "myapp:remove_favorite": lambda d: (
+        "post",
+        reverse("myapp:remove_favorite"),
+        {"playground_id": d["playground"].pk},
+    ),
+    "myapp:add_review": lambda d: (
+        "post",
+        reverse("myapp:add_review", kwargs={"playground_id": d["playground"].pk}),
+        {"content": "また行きたいです。", "rating": 4},
+    ),
+    "myapp:view_reviews": lambda d: (
+        "get",
+        reverse("myapp:view_reviews", kwargs={"playground_id": d["playground"].pk}),
+        {},
+    ),
+    "myapp:review_create": lambda d: (
+        "get",
+        reverse("myapp:review_create", kwargs={"pk": d["playground"].pk}),
+        {},
+    ),
+    "myapp:about": lambda d: ("get", reverse("myapp:about"), {}),
+    "accounts:mypage": lambda d: ("get", reverse("accounts:mypage"), {}),
+    "accounts:name_change": lambda d: ("get", reverse("accounts:name_change"), {}),
+}
+
+
+def route_names() -> set[str]:
+    return {
+        f"{module.app_name}:{pattern.name}"
+        for module in (myapp_urls, accounts_urls)
+        for pattern in module.urlpatterns
+    }
+
+
+def p95(timings: list[float]) -> float:
+    """
+    p95（最近傍順位法）。iterations が 20 未満だと最大値と同じになり、
+    1回の外れ値で予算を超えるため、budgets.json の iterations は 40 にしている
+    """
+    ordered = sorted(timings)
+    return ordered[math.ceil(len(ordered) * 0.95) - 1]
+
+
+def format_diff(
+    route: str, user_kind: str, budget: dict, actual: dict, keys: tuple[str, ...]
+) -> str:
+    lines = [f"{route} ({user_kind}) が予算を超えました:"]
+    for key in keys:
+        change = actual[key] - budget[key]
+        mark = "  <-- 超過" if change > 0 else ""
+        lines.append(
+            f"  {key}: 予算 {budget[key]} -> 実測 {actual[key]:g} ({change:+g}){mark}"
+        )
+    lines.append(f"意図した変更であれば {BUDGETS_PATH_HINT} を更新してください")
+    return "\n".join(lines)
+
+
+def test_予算ファイルがすべてのURLを含むこと():
+    assert BUDGETS["version"] == BUDGET_VERSION
+    assert set(ROUTES) == route_names()
+    assert set(BUDGETS["routes"]) == route_names()
+    for budgets in BUDGETS["routes"].values():
+        assert set(budgets) == set(USER_KINDS)
+    # p95 が最大値にならない回数
+    assert BUDGETS["iterations"] >= 20
+
+
+@pytest.mark.parametrize("user_kind", USER_KINDS)
+@pytest.mark.parametrize("route", sorted(ROUTES))
+def test_クエリ数と応答時間が予算内であること(
+    client, db, perf_dataset, route, user_kind
+):
+    budget = BUDGETS["routes"][route][user_kind]
+    if user_kind == "authenticated":
+        client.force_login(perf_dataset["user"])
+    method, path, data = ROUTES[route](perf_dataset)
+    send = getattr(client, method)
+    for _ in range(BUDGETS["warmup"]):
+        send(path, data)
+
+    timings = []
+    max_queries = 0
+    for _ in range(BUDGETS["iterations"]):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send(path, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < 500
+        max_queries = max(max_queries, len(queries))
+
+    actual = {"queries": max_queries, "p95_ms": round(p95(timings), 1)}
+    queries_ok = actual["queries"] <= budget["queries"]
+    latency_ok = actual["p95_ms"] <= budget["p95_ms"]
+    RESULTS.append(
+        {
+            "route": route,
+            "user": user_kind,
+            "queries": actual["queries"],
+            "median_ms": round(statistics.median(timings), 1),
+            "p95_ms": actual["p95_ms"],
+            "budget_queries": budget["queries"],
+            "budget_p95_ms": budget["p95_ms"],
+            "queries_ok": queries_ok,
+            "latency_ok": latency_ok,
+        }
+    )
+    if not latency_ok:
+        warnings.warn(format_diff(route, user_kind, budget, actual, ("p95_ms",)))
+    assert queries_ok, format_diff(route, user_kind, budget, actual, ("queries",))
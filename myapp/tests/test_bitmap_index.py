@@ -0,0 +1,137 @@
+import pytest
+from myapp import caching
+from myapp.bitmap_index import AmenityBitmapIndex, amenity_index, bits_to_ids
+from myapp.models import Playground
+
+
+def test_立っているビットの位置を昇順で返すこと():
+    assert bits_to_ids(0) == []
+    assert bits_to_ids(0b1011) == [0, 1, 3]
+    assert bits_to_ids(1 << 100 | 1 << 9) == [9, 100]
+
+
+@pytest.fixture
+def playgrounds(db):
+    return [
+        Playground.objects.create(
+            name=f"公園{i}",
+            nursing_room_available=i % 2 == 0,
+            lunch_allowed=i % 3 == 0,
+            kids_toilet_available=i % 5 == 0,
+            parking_info=("NO", "FREE", "PAID")[i % 3],
+        )
+        for i in range(30)
+    ]
+
+
+def test_設備の組み合わせの結果がORMでの絞り込みと一致すること(playgrounds):
+    index = AmenityBitmapIndex()
+    conditions = [
+        {"nursing_room_available": True},
+        {"nursing_room_available": True, "lunch_allowed": True},
+        {"lunch_allowed": True, "kids_toilet_available": True, "parking_info": "NO"},
+        {"parking_info": "PAID", "lunch_allowed": True},
+        {"nursing_room_available": False},
+    ]
+    for condition in conditions:
+        expected = list(
+            Playground.objects.filter(**condition)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        assert index.query(condition) == expected
+
+
+def test_同じプロセスでの保存と削除はコミット後にクエリなしで反映されること(
+    playgrounds, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    amenity_index.query({"lunch_allowed": True})  # インデックスを作っておく
+    deleted_id = playgrounds[0].id
+
+    playground = playgrounds[1]
+    with django_capture_on_commit_callbacks(execute=True):
+        playground.lunch_allowed = True
+        playground.save()
+        playgrounds[0].delete()
+
+    with django_assert_num_queries(0):
+        ids = amenity_index.query({"lunch_allowed": True})
+    assert ids == list(
+        Playground.objects.filter(lunch_allowed=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    assert playground.id in ids
+    assert deleted_id not in ids
+
+
+def test_コミットされなかった保存はインデックスに反映しないこと(
+    playgrounds, django_capture_on_commit_callbacks
+):
+    amenity_index.query({"lunch_allowed": True})
+    version = caching.get_namespace_version(caching.PLAYGROUND)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        playground = playgrounds[1]
+        playground.lunch_allowed = True
+        playground.save()
+
+    # ロールバックした場合と同じく、コミット後の処理を実行しない
+    assert len(callbacks) == 1
+    assert caching.get_namespace_version(caching.PLAYGROUND) == version
+    assert playground.id not in amenity_index.query({"lunch_allowed": True})
+
+
+def test_他のプロセスで施設が更新された場合は作り直すこと(
+    playgrounds, django_assert_num_queries
+):
+    index = AmenityBitmapIndex(version_check_interval=0)
+    index.query({"lunch_allowed": True})
+    # 他のプロセスでの更新（シグナルはこのインデックスに届かない）
+    Playground.objects.filter(pk=playgrounds[1].pk).update(lunch_allowed=True)
+    caching.bump_namespace(caching.PLAYGROUND)
+
+    with django_assert_num_queries(1):
+        ids = index.query({"lunch_allowed": True})
+    assert playgrounds[1].id in ids
+
+
+def test_保存では値が変わったキーのビットマップだけを書き換えること(
+    playgrounds, django_capture_on_commit_callbacks
+):
+    amenity_index.query({"lunch_allowed": True})
+    before = dict(amenity_index._bitmaps)
+
+    playground = playgrounds[1]
+    with django_capture_on_commit_callbacks(execute=True):
+        playground.lunch_allowed = True
+        playground.save()
+
+    after = amenity_index._bitmaps
+    changed = {key for key in after if after[key] is not before.get(key)}
+    assert changed == {("lunch_allowed", False), ("lunch_allowed", True)}
+
+
+def test_キャッシュのバージョンの確認は一定間隔に1回だけ行うこと(
+    playgrounds, monkeypatch
+):
+    calls = []
+    get_version = caching.get_namespace_version
+    monkeypatch.setattr(
+        caching,
+        "get_namespace_version",
+        lambda namespace: calls.append(namespace) or get_version(namespace),
+    )
+    index = AmenityBitmapIndex(version_check_interval=60)
+    for _ in range(5):
+        index.query({"lunch_allowed": True})
+    assert len(calls) == 1
+
+    index.version_check_interval = 0
+    index.query({"lunch_allowed": True})
+    assert len(calls) == 2
+
+
+def test_対象外のフィールドを指定するとエラーになること(playgrounds):
+    with pytest.raises(ValueError):
+        AmenityBitmapIndex().query({"name": "公園0"})
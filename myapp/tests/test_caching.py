@@ -0,0 +1,129 @@
+import pytest
+from io import StringIO
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from myapp import caching
+from myapp.models import Playground, Review
+from mysite.cache_config import parse_cache_url
+from users.models import CustomUser
+
+
+def test_CACHE_URLが未指定ならプロセスごとのメモリキャッシュになること():
+    config = parse_cache_url(None)
+    assert config["BACKEND"] == "django.core.cache.backends.locmem.LocMemCache"
+    assert config["KEY_PREFIX"] == "kidsplayground"
+
+
+def test_CACHE_URLのスキームでバックエンドと接続先が決まること():
+    redis = parse_cache_url("redis://cache:6379/1?timeout=60")
+    assert redis["BACKEND"] == "django.core.cache.backends.redis.RedisCache"
+    assert redis["LOCATION"] == "redis://cache:6379/1"
+    assert redis["TIMEOUT"] == 60
+
+    memcached = parse_cache_url("memcached://cache:11211")
+    assert memcached["LOCATION"] == "cache:11211"
+
+    file_based = parse_cache_url("file:///var/tmp/django_cache?timeout=none")
+    assert file_based["LOCATION"] == "/var/tmp/django_cache"
+    assert file_based["TIMEOUT"] is None
+
+
+def test_対応していないスキームはエラーになること():
+    with pytest.raises(ImproperlyConfigured):
+        parse_cache_url("mongodb://localhost")
+
+
+def test_名前空間のバージョンを上げると古いキャッシュが使われないこと():
+    assert caching.get_or_set(caching.RANKING, ("x",), lambda: "old", 60) == "old"
+    assert caching.get_or_set(caching.RANKING, ("x",), lambda: "new", 60) == "old"
+
+    caching.bump_namespace(caching.RANKING)
+
+    assert caching.get_or_set(caching.RANKING, ("x",), lambda: "new", 60) == "new"
+    # 他の名前空間には影響しない
+    assert caching.get_or_set(caching.REVIEW, ("x",), lambda: "review", 60) == "review"
+
+
+def test_名前空間ごとにヒット率とキーの件数が記録されること():
+    caching.reset_stats(caching.REVIEW)
+    for _ in range(3):
+        caching.get_or_set(caching.REVIEW, ("a",), lambda: 1, 60)
+    caching.get_or_set(caching.REVIEW, ("b",), lambda: 2, 60)
+
+    stats = caching.get_stats(caching.REVIEW)
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+    assert stats["keys"] == 2
+
+    caching.bump_namespace(caching.REVIEW)
+    stats = caching.get_stats(caching.REVIEW)
+    assert stats["keys"] == 0
+    assert stats["all_versions_keys"] == 2
+
+
+def test_キャッシュのヒットでは値の読み込みのほかにキャッシュに書き込まないこと(
+    monkeypatch,
+):
+    caching.get_or_set(caching.REVIEW, ("a",), lambda: 1, 60)
+    backend = caching._cache()
+    calls = []
+    for name in ("add", "incr", "set", "set_many"):
+        monkeypatch.setattr(backend, name, lambda *a, _n=name, **k: calls.append(_n))
+
+    assert caching.get_or_set(caching.REVIEW, ("a",), lambda: 2, 60) == 1
+    assert calls == []
+
+
+@pytest.mark.django_db
+def test_施設を保存するとコミット後にplayground名前空間のキャッシュが無効になること(
+    django_capture_on_commit_callbacks,
+):
+    version = caching.get_namespace_version(caching.PLAYGROUND)
+    with django_capture_on_commit_callbacks(execute=True):
+        Playground.objects.create(name="公園", address="鹿児島市")
+        assert caching.get_namespace_version(caching.PLAYGROUND) == version
+    assert caching.get_namespace_version(caching.PLAYGROUND) != version
+
+
+@pytest.mark.django_db
+def test_口コミの追加では集計を更新してからコミット後にキャッシュを無効にすること(
+    monkeypatch, django_capture_on_commit_callbacks
+):
+    playground = Playground.objects.create(name="公園", address="鹿児島市")
+    user = CustomUser.objects.create_user(email="user@example.com", password="x")
+    bumped = []
+    monkeypatch.setattr(
+        caching,
+        "bump_namespace",
+        lambda namespace: bumped.append(
+            Playground.objects.get(pk=playground.pk).review_count
+        ),
+    )
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        Review.objects.create(playground=playground, user=user, rating=5, content="")
+    assert bumped == []
+
+    for callback in callbacks:
+        callback()
+    assert bumped and set(bumped) == {1}
+
+
+def test_cache_statsコマンドで名前空間ごとの統計が表示されること(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    caching.get_or_set(caching.PLAYGROUND, ("a",), lambda: 1, 60)
+    out = StringIO()
+    call_command("cache_stats", "--reset", stdout=out)
+    output = out.getvalue()
+    for namespace in caching.NAMESPACES:
+        assert namespace in output
+    assert caching.get_stats(caching.PLAYGROUND)["misses"] == 0
+
+
+def test_PROMETHEUS_MULTIPROC_DIRがなければcache_statsコマンドはエラーになること(
+    monkeypatch,
+):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    with pytest.raises(CommandError):
+        call_command("cache_stats", stdout=StringIO())
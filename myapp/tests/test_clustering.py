@@ -0,0 +1,101 @@
+import math
+
+import pytest
+from django.urls import reverse
+from myapp.clustering import tile_bounds
+from myapp.models import Playground
+
+
+def tile_for(latitude: float, longitude: float, z: int) -> tuple[int, int]:
+    n = 2**z
+    x = int((longitude + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+    return x, y
+
+
+def clusters_url(z: int, x: int, y: int) -> str:
+    return reverse("myapp:playground_clusters", kwargs={"z": z, "x": x, "y": y})
+
+
+@pytest.fixture
+def playgrounds(db):
+    # 鹿児島市内に近接した5施設と、離れた1施設
+    near = [
+        Playground.objects.create(
+            name=f"近くの公園{i}",
+            address="鹿児島市",
+            latitude=31.56 + i * 0.001,
+            longitude=130.55 + i * 0.001,
+        )
+        for i in range(5)
+    ]
+    far = Playground.objects.create(
+        name="遠くの公園", address="霧島市", latitude=31.2, longitude=129.6
+    )
+    return near, far
+
+
+def test_タイルの範囲を緯度経度で返すこと():
+    bounds = tile_bounds(1, 1, 0)
+    assert bounds.west == 0
+    assert bounds.east == 180
+    assert bounds.south == pytest.approx(0)
+    assert bounds.north == pytest.approx(85.0511, abs=1e-4)
+
+
+def test_近接した施設を1つのクラスタにまとめること(client, playgrounds):
+    x, y = tile_for(31.56, 130.55, 8)
+    data = client.get(clusters_url(8, x, y)).json()
+
+    assert data["zoom"] == 8
+    assert data["clusters"] == [
+        {
+            "latitude": pytest.approx(31.562),
+            "longitude": pytest.approx(130.552),
+            "count": 5,
+        }
+    ]
+    # 別のセルにある1件だけの施設はクラスタにせず施設の情報を返す
+    assert [p["name"] for p in data["playgrounds"]] == ["遠くの公園"]
+
+
+def test_拡大すると個別の施設として返すこと(client, playgrounds):
+    x, y = tile_for(31.56, 130.55, 18)
+    data = client.get(clusters_url(18, x, y)).json()
+    total = sum(c["count"] for c in data["clusters"]) + len(data["playgrounds"])
+    assert total <= 5
+    assert "遠くの公園" not in [p["name"] for p in data["playgrounds"]]
+
+
+def test_一覧ページと同じ検索条件で絞り込めること(client, playgrounds):
+    x, y = tile_for(31.56, 130.55, 8)
+    data = client.get(clusters_url(8, x, y), {"city": "霧島市"}).json()
+    assert data["clusters"] == []
+    assert [p["name"] for p in data["playgrounds"]] == ["遠くの公園"]
+
+    data = client.get(clusters_url(8, x, y), {"q": "近く"}).json()
+    assert [c["count"] for c in data["clusters"]] == [5]
+    assert data["playgrounds"] == []
+
+
+def test_タイルの結果をキャッシュし施設の更新で破棄すること(
+    client, playgrounds, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    x, y = tile_for(31.56, 130.55, 8)
+    url = clusters_url(8, x, y)
+    client.get(url)
+    with django_assert_num_queries(0):
+        client.get(url)
+
+    near, far = playgrounds
+    with django_capture_on_commit_callbacks(execute=True):
+        far.latitude = 31.561
+        far.longitude = 130.551
+        far.save()
+    data = client.get(url).json()
+    assert [c["count"] for c in data["clusters"]] == [6]
+
+
+def test_範囲外のタイルは400を返すこと(client, db):
+    assert client.get(clusters_url(2, 4, 0)).status_code == 400
+    assert client.get(clusters_url(21, 0, 0)).status_code == 400
@@ -0,0 +1,78 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.urls import reverse
+from mysite.db_config import configure_connections, connection_mode
+from users.models import CustomUser
+
+POSTGRES = {"ENGINE": "django.db.backends.postgresql", "NAME": "kidsplayground_db"}
+SQLITE = {"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"}
+
+
+def test_既定ではWSGIは接続を使い回しASGIはコネクションプールを使うこと():
+    wsgi = configure_connections(POSTGRES, {})
+    assert (wsgi["CONN_MAX_AGE"], wsgi["CONN_HEALTH_CHECKS"]) == (60, True)
+    assert "pool" not in wsgi["OPTIONS"]
+
+    asgi = configure_connections(POSTGRES, {"SERVER_MODE": "asgi"})
+    assert asgi["CONN_MAX_AGE"] == 0 and asgi["CONN_HEALTH_CHECKS"] is True
+    assert asgi["OPTIONS"]["pool"]["max_size"] == 4
+    assert connection_mode(asgi) == "pool" and connection_mode(wsgi) == "persistent"
+
+
+def test_プールの大きさと待ち時間を環境変数で指定できること():
+    config = configure_connections(
+        POSTGRES,
+        {
+            "DB_CONN_MODE": "pool",
+            "DB_POOL_MIN_SIZE": "2",
+            "DB_POOL_MAX_SIZE": "8",
+            "DB_POOL_TIMEOUT": "3",
+        },
+    )
+    pool = config["OPTIONS"]["pool"]
+    assert (pool["min_size"], pool["max_size"], pool["timeout"]) == (2, 8, 3.0)
+    assert POSTGRES.get("OPTIONS") is None  # 元の設定は変更しない
+
+
+def test_PostgreSQL以外ではプールの代わりに接続を使い回すこと():
+    config = configure_connections(SQLITE, {"DB_CONN_MODE": "pool"})
+    assert connection_mode(config) == "persistent"
+    assert connection_mode(configure_connections(SQLITE, {"DB_CONN_MODE": "none"})) == (
+        "none"
+    )
+
+
+@pytest.mark.parametrize(
+    "env",
+    [
+        {"DB_CONN_MODE": "pgbouncer"},
+        {"DB_CONN_MODE": "pool", "DB_POOL_MIN_SIZE": "5", "DB_POOL_MAX_SIZE": "2"},
+    ],
+)
+def test_不正な設定はエラーになること(env):
+    with pytest.raises(ImproperlyConfigured):
+        configure_connections(POSTGRES, env)
+
+
+@pytest.mark.django_db
+def test_接続の状態はトークンかスタッフユーザーでだけ取得できること(client, settings):
+    settings.MONITORING_TOKEN = "secret"
+    url = reverse("db_pool_status")
+
+    assert client.get(url).status_code == 404
+    assert client.get(url, headers={"Authorization": "Bearer wrong"}).status_code == 404
+    response = client.get(url, headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    body = response.json()
+    mode = connection_mode(connection.settings_dict)
+    assert body["vendor"] == connection.vendor and body["mode"] == mode
+    # プールを使っている場合だけ統計を返す（CI の PostgreSQL では設定による）
+    assert (body["pool"] is not None) == (mode == "pool")
+    assert body["ping_ms"] >= 0
+
+    staff = CustomUser.objects.create_user(
+        email="staff@example.com", password="x", account_name="staff", is_staff=True
+    )
+    client.force_login(staff)
+    assert client.get(url).status_code == 200
@@ -0,0 +1,107 @@
+import pytest
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from myapp import caching
+from myapp.models import Playground
+from mysite.db_router import (
+    REPLICA_STICKY_COOKIE,
+    REPLICA_STICKY_SECONDS,
+    PrimaryReplicaRouter,
+    replica_reads,
+)
+from mysite.middleware import ReplicaReadsMiddleware
+
+router = PrimaryReplicaRouter()
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ["replica1"]
+
+
+def test_書き込みと管理コマンドなどの読み取りはプライマリに送ること(replica):
+    assert router.db_for_write(Playground) == "default"
+    assert router.db_for_read(Playground) == "default"
+    with replica_reads():
+        assert router.db_for_read(Playground) == "replica1"
+        assert router.db_for_write(Playground) == "default"
+
+
+def test_レプリカが設定されていなければプライマリから読むこと():
+    assert settings.DATABASE_REPLICAS == []
+    with replica_reads():
+        assert router.db_for_read(Playground) == "default"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_トランザクション内ではプライマリから読むこと(replica):
+    with replica_reads():
+        assert router.db_for_read(Playground) == "replica1"
+        with transaction.atomic():
+            assert router.db_for_read(Playground) == "default"
+
+
+def test_キャッシュに書き込む値はプライマリから読むこと(replica):
+    with replica_reads():
+        value = caching.get_or_set(
+            caching.PLAYGROUND,
+            ("router",),
+            lambda: router.db_for_read(Playground),
+            None,
+        )
+        assert value == "default"
+        assert router.db_for_read(Playground) == "replica1"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_キャッシュするページはキャッシュにない場合プライマリから読んで作ること(
+    client, replica
+):
+    # replica1 は DATABASES にないため、レプリカから読むとエラーになる
+    Playground.objects.create(name="中央公園", address="鹿児島市")
+    response = client.get(reverse("myapp:index"))
+    assert response.status_code == 200
+    assert response["X-Page-Cache"] == "MISS"
+
+
+def test_マイグレーションはプライマリにだけ行うこと(replica):
+    assert router.allow_migrate("default", "myapp")
+    assert not router.allow_migrate("replica1", "myapp")
+
+
+def routed_view(request):
+    """読み取りを送るデータベースのエイリアスを返すビュー"""
+    status = int(request.GET.get("status", 200))
+    return HttpResponse(router.db_for_read(Playground), status=status)
+
+
+@pytest.mark.parametrize(
+    "method, cookies, expected",
+    [
+        ("get", {}, "replica1"),
+        ("get", {REPLICA_STICKY_COOKIE: "1"}, "default"),
+        ("post", {}, "default"),
+    ],
+)
+def test_書き込み直後でないGETリクエストだけをレプリカから読むこと(
+    replica, method, cookies, expected
+):
+    request = getattr(RequestFactory(), method)("/")
+    request.COOKIES.update(cookies)
+    response = ReplicaReadsMiddleware(routed_view)(request)
+    assert response.content.decode() == expected
+
+
+def test_書き込みに成功したらしばらくプライマリから読むCookieを付けること(replica):
+    middleware = ReplicaReadsMiddleware(routed_view)
+
+    response = middleware(RequestFactory().post("/"))
+    cookie = response.cookies[REPLICA_STICKY_COOKIE]
+    assert cookie["max-age"] == REPLICA_STICKY_SECONDS
+
+    failed = middleware(RequestFactory().post("/?status=400"))
+    assert REPLICA_STICKY_COOKIE not in failed.cookies
+    assert REPLICA_STICKY_COOKIE not in middleware(RequestFactory().get("/")).cookies
@@ -0,0 +1,84 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from myapp.filters import filter_criteria_key, normalize_filter_params
+from myapp.models import Playground
+
+
+def test_既定値や不正な値は絞り込み条件に含めないこと():
+    criteria = normalize_filter_params(
+        QueryDict(
+            "q=+&city=&nursing_room=off&kids_toilet=on&target_age_min=abc"
+            "&target_age_max=6&fee_min=NaN&fee_max=500&parking_info=all"
+        )
+    )
+    assert criteria == {
+        "kids_toilet": True,
+        "target_age_max": 6,
+        "fee_max": Decimal("500"),
+    }
+
+
+def test_順序や表記が違っても同じ絞り込み条件なら同じキーになること():
+    first = normalize_filter_params(
+        QueryDict("fee_min=100&city=鹿児島&lunch_allowed=on")
+    )
+    second = normalize_filter_params(
+        QueryDict("lunch_allowed=on&city=+鹿児島+&fee_min=100.00&parking_info=all")
+    )
+    assert filter_criteria_key(first) == filter_criteria_key(second)
+    assert filter_criteria_key(first) != filter_criteria_key({})
+    assert filter_criteria_key({}) == "all"
+
+
+@pytest.fixture
+def playgrounds(db):
+    return [
+        Playground.objects.create(
+            name=f"公園{i}", address="鹿児島市", lunch_allowed=i % 2 == 0
+        )
+        for i in range(10)
+    ]
+
+
+def test_同じ絞り込み条件の2回目以降はキャッシュした施設IDで取得すること(
+    client, playgrounds, django_assert_num_queries
+):
+    url = reverse("myapp:index")
+    first = client.get(url, {"lunch_allowed": "on"})
+    assert first.context["filtered_count"] == 5
+
+    # 表記の違うURL（ページキャッシュは別）でも、絞り込み結果のIDはキャッシュを使う
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url, {"lunch_allowed": "on", "parking_info": "all"})
+    assert len(queries) == 1
+    where = queries[0]["sql"].split(" WHERE ", 1)[1]
+    assert "lunch_allowed" not in where
+    assert '"id" IN (' in where
+    assert [p.id for p in second.context["playgrounds"]] == [
+        p.id for p in first.context["playgrounds"]
+    ]
+
+
+def test_施設が追加されると絞り込み結果のキャッシュが無効になること(
+    client, playgrounds, django_capture_on_commit_callbacks
+):
+    url = reverse("myapp:index")
+    assert client.get(url, {"lunch_allowed": "on"}).context["filtered_count"] == 5
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Playground.objects.create(name="新しい公園", lunch_allowed=True)
+
+    response = client.get(url, {"lunch_allowed": "on", "tab": "list"})
+    assert response.context["filtered_count"] == 6
+
+
+def test_一致する施設が多い条件はIDをキャッシュせずに絞り込むこと(client, playgrounds):
+    url = reverse("myapp:index")
+    with patch("myapp.filters.MAX_CACHED_FILTER_IDS", 3):
+        response = client.get(url, {"lunch_allowed": "on"})
+    assert response.context["filtered_count"] == 5
@@ -0,0 +1,76 @@
+import pytest
+from myapp.geo import (
+    BoundingBox,
+    bbox_around,
+    covering_cells,
+    encode_geohash,
+    haversine_km,
+    parse_bbox,
+    parse_point,
+)
+from myapp.models import Playground
+
+
+def test_緯度経度を既知のgeohashに変換すること():
+    # 参考値: http://geohash.org/ezs42
+    assert encode_geohash(42.6, -5.6, precision=5) == "ezs42"
+
+
+def test_近い地点のgeohashは前方一致すること():
+    a = encode_geohash(31.5602, 130.5581)
+    b = encode_geohash(31.5603, 130.5582)
+    assert a[:6] == b[:6]
+
+
+def test_範囲を覆うセルは範囲内の地点のgeohashを前方一致で含むこと():
+    bbox = BoundingBox(south=31.4, west=130.4, north=31.7, east=130.7)
+    cells = covering_cells(bbox)
+    assert 0 < len(cells) <= 16
+    for lat, lng in [(31.4, 130.4), (31.55, 130.55), (31.7, 130.7), (31.41, 130.69)]:
+        geohash = encode_geohash(lat, lng)
+        assert any(geohash.startswith(cell) for cell in cells)
+
+
+def test_2地点間の距離をkmで計算すること():
+    # 鹿児島中央駅から鹿児島空港まで約30km
+    distance = haversine_km(31.5838, 130.5413, 31.8034, 130.7193)
+    assert distance == pytest.approx(29.6, abs=1.0)
+
+
+def test_半径を含む矩形を返すこと():
+    bbox = bbox_around(31.5, 130.5, 10)
+    assert haversine_km(31.5, 130.5, bbox.north, 130.5) == pytest.approx(10, rel=1e-3)
+    assert haversine_km(31.5, 130.5, 31.5, bbox.east) == pytest.approx(10, rel=1e-2)
+
+
+def test_bboxをwest_south_east_northの順で解釈すること():
+    assert parse_bbox("130.4,31.4,130.7,31.7") == BoundingBox(
+        south=31.4, west=130.4, north=31.7, east=130.7
+    )
+
+
+@pytest.mark.parametrize(
+    "value", ["130,31,131", "a,b,c,d", "131,31,130,32", "nan,1,2,3"]
+)
+def test_不正なbboxはValueErrorになること(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
+
+
+@pytest.mark.parametrize("value", ["31.5", "91,130", "x,y"])
+def test_不正な地点はValueErrorになること(value):
+    with pytest.raises(ValueError):
+        parse_point(value)
+
+
+@pytest.mark.django_db
+def test_施設を保存するとgeohashが作成されること():
+    playground = Playground.objects.create(
+        name="公園", address="鹿児島市", latitude=31.5602, longitude=130.5581
+    )
+    assert playground.geohash == encode_geohash(31.5602, 130.5581)
+
+    playground.latitude = None
+    playground.save(update_fields=["latitude"])
+    playground.refresh_from_db()
+    assert playground.geohash == ""
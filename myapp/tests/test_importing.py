@@ -0,0 +1,309 @@
+import datetime
+import json
+from decimal import Decimal
+from io import StringIO
+
+import pandas as pd
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from myapp import caching, normalization
+from myapp.clustering import tile_scope, tiles_containing
+from myapp.importing import import_playgrounds
+from myapp.middleware import playground_page_scope
+from myapp.models import Playground
+
+CSV_HEADER = "name,address,latitude,longitude,opening_hours,target_age,fee,parking,lunch_allowed\n"
+
+
+def test_開館時間_対象年齢_料金_駐車場の表記を正規化すること():
+    assert normalization.parse_opening_hours("9:00〜17:30") == (
+        datetime.time(9, 0),
+        datetime.time(17, 30),
+    )
+    assert normalization.parse_opening_hours("10時") == (datetime.time(10, 0), None)
+    assert normalization.parse_target_age("0歳〜6歳") == (0, 6)
+    assert normalization.parse_target_age("3歳から") == (3, None)
+    assert normalization.parse_fee("無料") == Decimal(0)
+    assert normalization.parse_fee("大人 1,200円") == Decimal(1200)
+    assert normalization.parse_parking("あり（有料）") == "PAID"
+    assert normalization.parse_parking("あり") == "FREE"
+    assert normalization.parse_parking("なし") == "NO"
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = tmp_path / "playgrounds.csv"
+    path.write_text(
+        CSV_HEADER
+        + "中央公園,鹿児島市1-1,31.59,130.55,9:00-17:00,0歳〜6歳,無料,あり,○\n"
+        + "南公園,鹿児島市2-2,31.50,130.50,,,大人300円,有料,×\n"
+        + ",住所のみ,,,,,,,\n"
+        + "北公園,鹿児島市3-3,abc,130.50,,,,,\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+@pytest.mark.django_db
+def test_新しい施設を正規化して追加し不正な行を数えること(feed):
+    result = import_playgrounds([feed])
+
+    assert (result.inserted, result.updated, result.unchanged, result.invalid) == (
+        2,
+        0,
+        0,
+        2,
+    )
+    central = Playground.objects.get(name="中央公園")
+    assert central.opening_time == datetime.time(9, 0)
+    assert central.target_age_end == 6
+    assert central.fee_decimal == 0
+    assert central.parking_info == "FREE"
+    assert central.lunch_allowed is True
+    assert central.geohash and "中央" in central.search_document
+    assert Playground.objects.get(name="南公園").parking_info == "PAID"
+
+
+@pytest.mark.django_db
+def test_変更のない施設は書き込まず変更のある施設だけを更新すること(feed, tmp_path):
+    import_playgrounds([feed])
+    south = Playground.objects.get(name="南公園")
+
+    changed = tmp_path / "changed.json"
+    changed.write_text(
+        json.dumps(
+            [
+                {
+                    "name": "中央公園",
+                    "address": "鹿児島市1-1",
+                    "latitude": 31.59,
+                    "longitude": 130.55,
+                    "opening_hours": "9:00-17:00",
+                    "target_age": "0歳〜6歳",
+                    "fee": "無料",
+                    "parking": "あり",
+                    "lunch_allowed": True,
+                },
+                {
+                    "name": "南公園",
+                    "address": "鹿児島市2-2",
+                    "latitude": 31.50,
+                    "longitude": 130.50,
+                    "fee": "大人500円",
+                    "parking": "有料",
+                },
+            ],
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    result = import_playgrounds([changed])
+
+    assert (result.inserted, result.updated, result.unchanged) == (0, 1, 1)
+    south.refresh_from_db()
+    assert south.fee_decimal == 500
+    assert Playground.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_コマンドで件数と処理速度を表示しdry_runではロールバックすること(
+    feed, django_capture_on_commit_callbacks
+):
+    stdout = StringIO()
+    version = caching.get_namespace_version(caching.PLAYGROUND)
+    with django_capture_on_commit_callbacks() as callbacks:
+        call_command(
+            "fetch_playgrounds",
+            str(feed),
+            "--dry-run",
+            stdout=stdout,
+            stderr=StringIO(),
+        )
+
+    # ロールバックした取り込みではキャッシュを無効にしない
+    assert callbacks == []
+    assert caching.get_namespace_version(caching.PLAYGROUND) == version
+
+    output = stdout.getvalue()
+    assert "inserted=2" in output and "invalid=2" in output
+    assert "rows/s" in output
+    assert Playground.objects.count() == 0
+
+
+def test_ファイルの指定がなければエラーになること(settings):
+    settings.PLAYGROUND_IMPORT_SOURCES = []
+    with pytest.raises(CommandError):
+        call_command("fetch_playgrounds", stdout=StringIO())
+
+
+def write_feed(path, rows):
+    path.write_text(json.dumps(rows, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+FEED_ROWS = [
+    {
+        "source_key": "k-1",
+        "name": "中央公園",
+        "address": "鹿児島市1-1",
+        "latitude": 31.59,
+        "longitude": 130.55,
+        "fee": "無料",
+    },
+    {
+        "source_key": "k-2",
+        "name": "南公園",
+        "address": "霧島市2-2",
+        "latitude": 31.74,
+        "longitude": 130.76,
+        "fee": "大人300円",
+    },
+]
+
+
+@pytest.mark.django_db
+def test_内容が同じ行は施設を読み込まず書き込まないこと(tmp_path):
+    feed = write_feed(tmp_path / "feed.json", FEED_ROWS)
+    import_playgrounds([feed])
+
+    with CaptureQueriesContext(connection) as queries:
+        result = import_playgrounds([feed])
+
+    assert (result.inserted, result.updated, result.unchanged) == (0, 0, 2)
+    assert len(queries) == 1  # source_key とハッシュの取得だけ
+
+
+@pytest.mark.django_db
+def test_更新は変更のあったフィールドだけを書き込むこと(tmp_path):
+    import_playgrounds([write_feed(tmp_path / "feed.json", FEED_ROWS)])
+    changed = [{**FEED_ROWS[0], "fee": "大人100円"}, FEED_ROWS[1]]
+
+    with CaptureQueriesContext(connection) as queries:
+        result = import_playgrounds([write_feed(tmp_path / "changed.json", changed)])
+
+    assert (result.updated, result.unchanged) == (1, 1)
+    updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1
+    assert '"fee_decimal"' in updates[0]
+    assert '"name"' not in updates[0] and '"search_document"' not in updates[0]
+    assert Playground.objects.get(source_key="k-1").fee_decimal == 100
+
+
+@pytest.mark.django_db
+def test_変更のあった施設のタイルと詳細ページのキャッシュだけを無効にすること(
+    tmp_path, django_capture_on_commit_callbacks
+):
+    import_playgrounds([write_feed(tmp_path / "feed.json", FEED_ROWS)])
+    central, south = (
+        Playground.objects.get(source_key="k-1"),
+        Playground.objects.get(source_key="k-2"),
+    )
+
+    def versions():
+        return (
+            caching.get_namespace_version(caching.PLAYGROUND),
+            caching.get_scope_version(
+                caching.TILE, tile_scope(*tiles_containing(31.59, 130.55)[12])
+            ),
+            caching.get_scope_version(
+                caching.TILE, tile_scope(*tiles_containing(31.74, 130.76)[12])
+            ),
+            caching.get_scope_version(caching.PAGE, playground_page_scope(central.pk)),
+            caching.get_scope_version(caching.PAGE, playground_page_scope(south.pk)),
+        )
+
+    before = versions()
+    changed = [{**FEED_ROWS[0], "name": "中央こども公園"}, FEED_ROWS[1]]
+    with django_capture_on_commit_callbacks() as callbacks:
+        import_playgrounds([write_feed(tmp_path / "changed.json", changed)])
+    # キャッシュはコミット後に無効にする
+    assert versions() == before
+    for callback in callbacks:
+        callback()
+    after = versions()
+
+    # 施設名は絞り込みに使わないため、施設数・絞り込み結果のキャッシュはそのまま
+    assert after[0] == before[0]
+    assert after[1] != before[1] and after[3] != before[3]
+    assert after[2] == before[2] and after[4] == before[4]
+    assert "中央こども" not in central.search_document
+    central.refresh_from_db()
+    assert " 中央 " in central.search_document and "こど" in central.search_document
+
+
+@pytest.mark.django_db
+def test_一部の行にしかない整数と真偽値のキーも取り込めること(tmp_path):
+    rows = [
+        {**FEED_ROWS[0], "nursing_room_available": 1, "target_age_start": 3},
+        FEED_ROWS[1],
+    ]
+
+    result = import_playgrounds([write_feed(tmp_path / "feed.json", rows)])
+
+    assert (result.inserted, result.invalid) == (2, 0)
+    central = Playground.objects.get(source_key="k-1")
+    assert central.nursing_room_available is True
+    assert central.target_age_start == 3
+    south = Playground.objects.get(source_key="k-2")
+    assert south.nursing_room_available is False and south.target_age_start is None
+
+
+@pytest.mark.django_db
+def test_source_keyのない既存の施設は施設名と住所で照合すること(tmp_path):
+    legacy = Playground.objects.create(name="中央公園", address="鹿児島市1-1")
+
+    result = import_playgrounds([write_feed(tmp_path / "feed.json", FEED_ROWS[:1])])
+
+    assert (result.inserted, result.updated) == (0, 1)
+    legacy.refresh_from_db()
+    assert legacy.source_key == "k-1" and legacy.content_hash
+
+
+def test_列単位の正規化が1行ずつの変換と同じ結果になること():
+    hours = ["9:00〜17:30", "10時", "１０:００-18:00", "9:00-12:00-18:00", "", None]
+    ages = ["0歳〜6歳", "3歳から", "どなたでも", "", None, "1歳"]
+    fees = ["無料", "大人 1,200円", "有料", "入場無料 駐車場300円", "", None]
+    parkings = ["あり（有料）", "あり", "なし", "free", "", None]
+    frame = normalization.normalize_frame(
+        pd.DataFrame(
+            {
+                "opening_hours": hours,
+                "target_age": ages,
+                "fee": fees,
+                "parking": parkings,
+            }
+        )
+    )
+
+    for row, hour, age, fee, parking in zip(
+        frame.to_dict("records"), hours, ages, fees, parkings
+    ):
+        assert (row["opening_time"], row["closing_time"]) == (
+            normalization.parse_opening_hours(hour)
+        )
+        assert (row["target_age_start"], row["target_age_end"]) == (
+            normalization.parse_target_age(age)
+        )
+        assert row["fee_decimal"] == normalization.parse_fee(fee)
+        assert row["parking_info"] == normalization.parse_parking(parking)
+
+
+@pytest.mark.django_db
+def test_保存した表記から変わったフィールドだけを正規化し直すこと(tmp_path):
+    import_playgrounds([write_feed(tmp_path / "feed.json", FEED_ROWS)])
+    central = Playground.objects.get(source_key="k-1")
+    assert central.source_values == {"fee": "無料"}
+    # 変換規則の変更で値が変わった状態を再現する
+    Playground.objects.filter(pk=central.pk).update(fee_decimal=Decimal(500))
+
+    stdout = StringIO()
+    with CaptureQueriesContext(connection) as queries:
+        call_command("renormalize", stdout=stdout)
+
+    assert "updated=1 unchanged=1" in stdout.getvalue()
+    updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1 and '"name"' not in updates[0]
+    central.refresh_from_db()
+    assert central.fee_decimal == 0
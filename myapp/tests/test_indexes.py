@@ -0,0 +1,69 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from myapp.management.commands.explain_hot_queries import hot_queries
+from myapp.models import Playground, Review
+
+sqlite_only = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="SQLite の実行計画の表記で確認する"
+)
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="PostgreSQL のカタログで確認する"
+)
+
+
+@sqlite_only
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name, index",
+    [
+        ("detail_recent_reviews", "review_playground_recent_idx"),
+        ("review_list_page", "review_playground_recent_idx"),
+        ("list_filter_amenity", "playground_nursing_room_idx"),
+        ("list_filter_parking", "playground_parking_idx"),
+        ("ranking_by_rating", "playground_rating_rank_idx"),
+    ],
+)
+def test_主なクエリがインデックスを使うこと(name, index):
+    plan = hot_queries(playground_id=1, user_id=1)[name].explain()
+    assert index in plan
+
+
+def _expected_columns(model, index) -> str:
+    """インデックスの定義 (pg_indexes.indexdef) での列の並び（降順の列には DESC が付く）"""
+    columns = []
+    for name in index.fields:
+        column = model._meta.get_field(name.lstrip("-")).column
+        columns.append(f"{column} DESC" if name.startswith("-") else column)
+    return f"({', '.join(columns)})"
+
+
+@postgresql_only
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "model, index",
+    [(model, index) for model in (Playground, Review) for index in model._meta.indexes],
+    ids=lambda value: getattr(value, "name", ""),
+)
+def test_PostgreSQLに複合インデックスと部分インデックスが作成されていること(
+    model, index
+):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname = %s",
+            [model._meta.db_table, index.name],
+        )
+        row = cursor.fetchone()
+    assert row is not None, f"{index.name} がありません"
+    indexdef = row[0]
+    assert _expected_columns(model, index) in indexdef
+    # 部分インデックスは条件付き (WHERE) で作成されていること
+    assert ("WHERE" in indexdef) == (index.condition is not None)
+
+
+@pytest.mark.django_db
+def test_explain_hot_queriesコマンドで実行計画が表示されること():
+    out = StringIO()
+    call_command("explain_hot_queries", "detail_recent_reviews", stdout=out)
+    assert "== detail_recent_reviews ==" in out.getvalue()
@@ -0,0 +1,132 @@
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from myapp.models import Playground
+from mysite.metrics import render_latest
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from users.models import CustomUser
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def parse_samples(text: str) -> dict:
+    return {
+        (s.name, tuple(sorted(s.labels.items()))): s.value
+        for family in text_string_to_metric_families(text)
+        for s in family.samples
+    }
+
+
+@pytest.fixture
+def user(db):
+    return CustomUser.objects.create_user(
+        email="metrics@example.com", password="x", account_name="metrics"
+    )
+
+
+@pytest.mark.django_db
+def test_メトリクスはトークンかスタッフユーザーでなければ404を返すこと(
+    client, user, settings
+):
+    settings.MONITORING_TOKEN = "secret"
+    assert client.get("/metrics").status_code == 404
+    client.force_login(user)
+    assert client.get("/metrics").status_code == 404
+
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+
+
+@pytest.mark.django_db
+def test_URL名ごとのリクエスト数と処理時間_SQLの件数を記録すること(client, settings):
+    settings.MONITORING_TOKEN = "secret"
+    requests = sample(
+        "kidsplayground_http_requests_total",
+        route="myapp:ranking",
+        method="GET",
+        status="200",
+    )
+    queries = sample("kidsplayground_db_queries_total", route="myapp:ranking")
+
+    client.get(reverse("myapp:ranking"))
+    client.get("/no-such-page/")
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+
+    samples = parse_samples(response.content.decode())
+    ranking = (("method", "GET"), ("route", "myapp:ranking"), ("status", "200"))
+    assert samples[("kidsplayground_http_requests_total", ranking)] == requests + 1
+    assert (
+        "kidsplayground_http_request_duration_seconds_count",
+        (("method", "GET"), ("route", "myapp:ranking")),
+    ) in samples
+    assert (
+        samples[("kidsplayground_db_queries_total", (("route", "myapp:ranking"),))]
+        > queries
+    )
+    unmatched = (("method", "GET"), ("route", "unmatched"), ("status", "404"))
+    assert samples[("kidsplayground_http_requests_total", unmatched)] >= 1
+
+
+def test_お気に入りの追加削除と口コミの投稿_キャッシュの参照を数えること(client, user):
+    playground = Playground.objects.create(name="中央公園", address="鹿児島市")
+    client.force_login(user)
+    before = {
+        "added": sample("kidsplayground_favorites_toggled_total", action="added"),
+        "removed": sample("kidsplayground_favorites_toggled_total", action="removed"),
+        "reviews": sample("kidsplayground_reviews_posted_total"),
+        "misses": sample(
+            "kidsplayground_cache_requests_total", namespace="page", result="misses"
+        ),
+    }
+
+    data = {"playground_id": playground.pk}
+    client.post(reverse("myapp:add_favorite"), data)
+    client.post(reverse("myapp:add_favorite"), data)  # 登録済みのため数えない
+    client.post(reverse("myapp:remove_favorite"), data)
+    client.post(
+        reverse("myapp:add_review", args=[playground.pk]),
+        {"content": "楽しい", "rating": 5},
+    )
+    client.logout()
+    client.get(reverse("myapp:about"))
+
+    added = sample("kidsplayground_favorites_toggled_total", action="added")
+    removed = sample("kidsplayground_favorites_toggled_total", action="removed")
+    assert added == before["added"] + 1
+    assert removed == before["removed"] + 1
+    assert sample("kidsplayground_reviews_posted_total") == before["reviews"] + 1
+    assert (
+        sample("kidsplayground_cache_requests_total", namespace="page", result="misses")
+        == before["misses"] + 1
+    )
+
+
+def test_複数のワーカーのメトリクスを合計して出力すること(tmp_path, monkeypatch):
+    # ワーカーの代わりに2つのプロセスでそれぞれ1リクエスト分を記録する
+    code = (
+        "from mysite.metrics import record_request;"
+        "record_request('myapp:index', 'GET', 200, 0.1, 3, 0.01)"
+    )
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            cwd=settings.BASE_DIR,
+            env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PATH": ""},
+        )
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    samples = parse_samples(render_latest().decode())
+
+    route = (("route", "myapp:index"),)
+    requests = (("method", "GET"), ("route", "myapp:index"), ("status", "200"))
+    assert samples[("kidsplayground_http_requests_total", requests)] == 2
+    assert samples[("kidsplayground_db_queries_total", route)] == 6
+    assert samples[("kidsplayground_db_queries_per_request_count", route)] == 2
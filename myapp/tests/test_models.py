@@ -79,3 +79,89 @@ def test_get_by_review_count_rank_returns_playgrounds_ordered_by_review_count()
     assert (
         p4 not in ranked_playgrounds
     ), "口コミのない施設がランキングに含まれています。"
+
+
+@pytest.fixture
+def reviewer() -> CustomUser:
+    return CustomUser.objects.create_user(
+        email="reviewer@example.com", password="password"
+    )
+
+
+@pytest.mark.django_db
+def test_口コミの追加で施設の評価集計が更新されること(reviewer: CustomUser) -> None:
+    playground = Playground.objects.create(name="公園A", address="住所A")
+    Review.objects.create(playground=playground, user=reviewer, rating=5, content="a")
+    Review.objects.create(playground=playground, user=reviewer, rating=2, content="b")
+
+    playground.refresh_from_db()
+    assert playground.review_count == 2
+    assert playground.rating_sum == 7
+    assert playground.avg_rating == pytest.approx(3.5)
+
+
+@pytest.mark.django_db
+def test_口コミの削除で施設の評価集計が更新されること(reviewer: CustomUser) -> None:
+    playground = Playground.objects.create(name="公園A", address="住所A")
+    first = Review.objects.create(
+        playground=playground, user=reviewer, rating=5, content="a"
+    )
+    second = Review.objects.create(
+        playground=playground, user=reviewer, rating=2, content="b"
+    )
+
+    first.delete()
+    playground.refresh_from_db()
+    assert (playground.review_count, playground.rating_sum) == (1, 2)
+    assert playground.avg_rating == pytest.approx(2.0)
+
+    # 最後の口コミが削除されると平均点は未評価 (None) に戻る
+    Review.objects.filter(pk=second.pk).delete()
+    playground.refresh_from_db()
+    assert (playground.review_count, playground.rating_sum) == (0, 0)
+    assert playground.avg_rating is None
+
+
+@pytest.mark.django_db
+def test_口コミの評価や施設を変更すると関係する施設が再集計されること(
+    reviewer: CustomUser,
+) -> None:
+    p1 = Playground.objects.create(name="公園A", address="住所A")
+    p2 = Playground.objects.create(name="公園B", address="住所B")
+    review = Review.objects.create(playground=p1, user=reviewer, rating=5, content="a")
+
+    review.rating = 3
+    review.playground = p2
+    review.save()
+
+    p1.refresh_from_db()
+    p2.refresh_from_db()
+    assert (p1.review_count, p1.rating_sum, p1.avg_rating) == (0, 0, None)
+    assert (p2.review_count, p2.rating_sum) == (1, 3)
+    assert p2.avg_rating == pytest.approx(3.0)
+
+
+@pytest.mark.django_db
+def test_recalculate_rating_aggregatesでbulk_createした口コミが集計されること(
+    reviewer: CustomUser,
+) -> None:
+    p1 = Playground.objects.create(name="公園A", address="住所A")
+    p2 = Playground.objects.create(name="公園B", address="住所B")
+    Review.objects.bulk_create(
+        [
+            Review(playground=p1, user=reviewer, rating=4, content="a"),
+            Review(playground=p1, user=reviewer, rating=1, content="b"),
+        ]
+    )
+    # シグナルを経由しないため、この時点では集計されていない
+    p1.refresh_from_db()
+    assert p1.review_count == 0
+
+    updated = Playground.objects.recalculate_rating_aggregates()
+
+    assert updated == 2
+    p1.refresh_from_db()
+    p2.refresh_from_db()
+    assert (p1.review_count, p1.rating_sum) == (2, 5)
+    assert p1.avg_rating == pytest.approx(2.5)
+    assert (p2.review_count, p2.rating_sum, p2.avg_rating) == (0, 0, None)
@@ -0,0 +1,142 @@
+import pytest
+from django.contrib import messages
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.http import HttpRequest
+from django.urls import reverse
+from myapp.models import Playground, Review
+from users.models import CustomUser
+
+
+@pytest.fixture
+def playground(db):
+    return Playground.objects.create(name="中央公園", address="鹿児島市")
+
+
+@pytest.mark.parametrize(
+    "url_name, kwargs",
+    [("myapp:index", {}), ("myapp:ranking", {}), ("myapp:about", {})],
+)
+def test_匿名ユーザーには2回目以降キャッシュしたページをクエリなしで返すこと(
+    client, playground, django_assert_num_queries, url_name, kwargs
+):
+    url = reverse(url_name, kwargs=kwargs)
+    first = client.get(url)
+    assert first["X-Page-Cache"] == "MISS"
+
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second["X-Page-Cache"] == "HIT"
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+
+
+def test_施設詳細ページもキャッシュされること(
+    client, playground, django_assert_num_queries
+):
+    url = reverse("myapp:facility_detail", kwargs={"pk": playground.pk})
+    client.get(url)
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response["X-Page-Cache"] == "HIT"
+
+
+def test_GETパラメータの順序が違っても同じキャッシュを使うこと(client, playground):
+    url = reverse("myapp:index")
+    client.get(url, {"city": "鹿児島", "nursing_room": "on"})
+    response = client.get(f"{url}?nursing_room=on&city=%E9%B9%BF%E5%85%90%E5%B3%B6")
+    assert response["X-Page-Cache"] == "HIT"
+
+
+def test_表示に使わないGETパラメータがあればキャッシュしないこと(client, playground):
+    url = reverse("myapp:index")
+    client.get(url, {"utm_source": "x"})
+    response = client.get(url, {"utm_source": "x"})
+    assert "X-Page-Cache" not in response
+
+
+def test_ETagが一致すれば304を返すこと(client, playground):
+    url = reverse("myapp:about")
+    etag = client.get(url)["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_Last_Modified以降に変更がなければ304を返すこと(client, playground):
+    url = reverse("myapp:about")
+    last_modified = client.get(url)["Last-Modified"]
+
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304
+
+
+def test_ログインユーザーにはキャッシュしたページを返さないこと(client, playground):
+    url = reverse("myapp:index")
+    client.get(url)
+    user = CustomUser.objects.create_user(email="user@example.com", password="password")
+    client.force_login(user)
+
+    response = client.get(url)
+    assert "X-Page-Cache" not in response
+    assert "ログアウト" in response.content.decode()
+
+
+def test_口コミが追加されるとキャッシュしたページが無効になること(
+    client, playground, django_capture_on_commit_callbacks
+):
+    url = reverse("myapp:facility_detail", kwargs={"pk": playground.pk})
+    etag = client.get(url)["ETag"]
+    user = CustomUser.objects.create_user(email="user@example.com", password="password")
+    # キャッシュはコミット後に無効になる
+    with django_capture_on_commit_callbacks(execute=True):
+        Review.objects.create(
+            playground=playground, user=user, rating=5, content="楽しい"
+        )
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["X-Page-Cache"] == "MISS"
+    assert "楽しい" in response.content.decode()
+
+
+def test_施設が更新されるとキャッシュしたページが無効になること(
+    client, playground, django_capture_on_commit_callbacks
+):
+    url = reverse("myapp:index")
+    client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        playground.name = "北公園"
+        playground.save()
+
+    response = client.get(url)
+    assert response["X-Page-Cache"] == "MISS"
+    assert "北公園" in response.content.decode()
+
+
+def test_表示待ちのメッセージがある場合はキャッシュしたページを返さないこと(
+    client, playground
+):
+    url = reverse("myapp:index")
+    client.get(url)
+    storage = CookieStorage(HttpRequest())
+    client.cookies[storage.cookie_name] = storage._encode(
+        [Message(messages.INFO, "お知らせです")]
+    )
+
+    response = client.get(url)
+    assert "X-Page-Cache" not in response
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_ASGIでも非同期のままキャッシュしたページを返すこと(async_client):
+    await Playground.objects.acreate(name="中央公園", address="鹿児島市")
+    url = reverse("myapp:ranking")
+
+    first = await async_client.get(url)
+    second = await async_client.get(url)
+
+    assert first["X-Page-Cache"] == "MISS"
+    assert second["X-Page-Cache"] == "HIT"
+    assert second.content == first.content
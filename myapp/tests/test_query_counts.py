@@ -0,0 +1,112 @@
+import pytest
+from django.urls import reverse
+from myapp.counting import get_total_playground_count
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from myapp.models import Favorite, Playground, Review
+from users.models import CustomUser
+
+
+@pytest.fixture
+def playgrounds(db):
+    return [
+        Playground.objects.create(name=f"公園{i}", address="鹿児島市")
+        for i in range(30)
+    ]
+
+
+@pytest.fixture
+def logged_in_user(client, playgrounds):
+    user = CustomUser.objects.create_user(email="user@example.com", password="password")
+    for playground in playgrounds[:5]:
+        Favorite.objects.create(user=user, playground=playground)
+    client.force_login(user)
+    return user
+
+
+def test_施設一覧は総数のキャッシュがあれば1クエリで表示されること(
+    client, playgrounds, django_assert_num_queries
+):
+    get_total_playground_count()  # 総数をキャッシュしておく
+    # ページの行と絞り込み後の件数を1クエリで取得する
+    with django_assert_num_queries(1):
+        response = client.get(reverse("myapp:index"))
+    assert response.context["filtered_count"] == 30
+    assert response.context["total_count"] == 30
+
+
+def test_施設一覧は総数のキャッシュがなければ2クエリで表示されること(
+    client, playgrounds, django_assert_num_queries
+):
+    with django_assert_num_queries(2):
+        client.get(reverse("myapp:index"))
+
+
+def test_施設一覧の次ページも1クエリで表示されること(
+    client, playgrounds, django_assert_num_queries
+):
+    first = client.get(reverse("myapp:index"))
+    with django_assert_num_queries(1):
+        response = client.get(
+            reverse("myapp:index"), {"cursor": first.context["page_obj"].next_cursor}
+        )
+    assert response.context["filtered_count"] == 30
+
+
+def test_絞り込み結果が0件の場合も1クエリで表示されること(
+    client, playgrounds, django_assert_num_queries
+):
+    get_total_playground_count()
+    with django_assert_num_queries(1):
+        response = client.get(reverse("myapp:index"), {"city": "存在しない市"})
+    assert response.context["filtered_count"] == 0
+
+
+def test_お気に入り一覧はCOUNTクエリを発行せずに表示されること(
+    client, logged_in_user, django_assert_num_queries
+):
+    # セッション、ユーザー、お気に入りID、お気に入り一覧の4クエリ
+    with django_assert_num_queries(4):
+        response = client.get(reverse("myapp:favorites"))
+    assert response.context["filtered_count"] == 5
+    assert response.context["total_count"] == 5
+
+
+def test_施設を追加すると総数のキャッシュが破棄されること(
+    playgrounds, django_capture_on_commit_callbacks
+):
+    assert get_total_playground_count() == 30
+    with django_capture_on_commit_callbacks(execute=True):
+        Playground.objects.create(name="新しい公園", address="鹿児島市")
+    assert get_total_playground_count() == 31
+
+
+def test_施設を削除すると総数のキャッシュが破棄されること(
+    playgrounds, django_capture_on_commit_callbacks
+):
+    assert get_total_playground_count() == 30
+    with django_capture_on_commit_callbacks(execute=True):
+        playgrounds[0].delete()
+    assert get_total_playground_count() == 29
+
+
+def test_ランキングは口コミテーブルを集計せずに表示されること(
+    client, playgrounds, django_assert_num_queries
+):
+    user = CustomUser.objects.create_user(email="user@example.com", password="password")
+    for playground in playgrounds[:10]:
+        for rating in (3, 4, 5):
+            Review.objects.create(
+                playground=playground, user=user, rating=rating, content="良い"
+            )
+    # ランキングの計算と表示ページの施設の取得で2クエリ
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("myapp:ranking"))
+    assert len(response.context["playgrounds"]) == 10
+    assert len(queries) == 2
+    assert all("myapp_review" not in query["sql"] for query in queries)
+
+    # 2回目以降はキャッシュしたランキングを使い、表示ページの施設だけを取得する
+    # （同じURLはページキャッシュから返るため、同じランキングを表す別のURLで確認する）
+    with django_assert_num_queries(1):
+        client.get(reverse("myapp:ranking"), {"sort": "rating"})
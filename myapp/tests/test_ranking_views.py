@@ -57,3 +57,64 @@ def test_ranking_view_sort_by_review_count(
     # コンテキストの順序を検証
     expected_order = [setup_data["p3"], setup_data["p1"], setup_data["p2"]]
     assert list(response.context["playgrounds"]) == expected_order
+
+
+def test_口コミが少ない満点の施設は多数の高評価を集めた施設より下位になること(
+    client: Client, db: None
+) -> None:
+    user = CustomUser.objects.create_user(email="user@example.com", password="password")
+    single = Playground.objects.create(name="口コミ1件の公園", address="住所A")
+    popular = Playground.objects.create(name="人気の公園", address="住所B")
+    low = Playground.objects.create(name="低評価の公園", address="住所C")
+    Review.objects.create(playground=single, user=user, rating=5, content="")
+    for _ in range(20):
+        Review.objects.create(playground=popular, user=user, rating=5, content="")
+    Review.objects.create(playground=popular, user=user, rating=4, content="")
+    for _ in range(5):
+        Review.objects.create(playground=low, user=user, rating=2, content="")
+
+    response = client.get(reverse("myapp:ranking"))
+
+    assert list(response.context["playgrounds"]) == [popular, single, low]
+    assert [p.rank for p in response.context["playgrounds"]] == [1, 2, 3]
+
+
+def test_ランキングはページ分割され順位が通しで付くこと(
+    client: Client, db: None
+) -> None:
+    user = CustomUser.objects.create_user(email="user@example.com", password="password")
+    playgrounds = [
+        Playground.objects.create(name=f"公園{i}", address="住所") for i in range(25)
+    ]
+    for count, playground in enumerate(playgrounds, start=1):
+        for _ in range(count):
+            Review.objects.create(
+                playground=playground, user=user, rating=4, content=""
+            )
+
+    url = reverse("myapp:ranking") + "?sort=review_count"
+    first = client.get(url)
+    second = client.get(url + "&page=2")
+
+    assert len(first.context["playgrounds"]) == 20
+    assert first.context["playgrounds"][0] == playgrounds[-1]
+    assert [p.rank for p in second.context["playgrounds"]] == [21, 22, 23, 24, 25]
+    assert second.context["playgrounds"][-1] == playgrounds[0]
+
+
+def test_口コミの投稿でキャッシュしたランキングが更新されること(
+    client: Client, setup_data: Dict[str, Any], django_capture_on_commit_callbacks
+) -> None:
+    url = reverse("myapp:ranking") + "?sort=review_count"
+    client.get(url)  # ランキングをキャッシュしておく
+    user = CustomUser.objects.get(email="user@example.com")
+    # キャッシュはコミット後に無効になる
+    with django_capture_on_commit_callbacks(execute=True):
+        for _ in range(3):
+            Review.objects.create(
+                playground=setup_data["p2"], user=user, rating=5, content=""
+            )
+
+    response = client.get(url)
+
+    assert list(response.context["playgrounds"])[0] == setup_data["p2"]
@@ -0,0 +1,84 @@
+import json
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from myapp.models import Playground
+from mysite import request_timing
+from users.models import CustomUser
+
+
+def parse_server_timing(header: str) -> dict[str, dict[str, str]]:
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@pytest.fixture
+def user(db):
+    return CustomUser.objects.create_user(
+        email="timing@example.com", password="x", account_name="timing"
+    )
+
+
+def test_SQLの件数と時間_テンプレートと全体の処理時間をServer_Timingで返すこと(
+    client, user
+):
+    Playground.objects.create(name="中央公園", address="鹿児島市")
+    client.force_login(user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("myapp:ranking"))
+
+    metrics = parse_server_timing(response["Server-Timing"])
+    assert metrics["sql"]["desc"] == f'"{len(queries)} queries"'
+    assert float(metrics["tpl"]["dur"]) > 0
+    assert float(metrics["total"]["dur"]) >= float(metrics["tpl"]["dur"])
+
+
+def test_リクエストごとにJSONのログを出し上限を超えたらWARNINGにすること(
+    client, user, settings, caplog, monkeypatch
+):
+    # mysite のロガーはルートに伝播しないため、caplog のハンドラーを直接付ける
+    monkeypatch.setattr(request_timing.logger, "handlers", [caplog.handler])
+    client.force_login(user)
+    settings.REQUEST_TIMING_THRESHOLDS = {
+        "default": {"queries": 100, "ms": 60_000},
+        "myapp:favorites": {"queries": 0},
+    }
+
+    with caplog.at_level(logging.INFO, logger="mysite.request_timing"):
+        client.get(reverse("myapp:ranking"))
+        client.get(reverse("myapp:favorites"))
+
+    records = [r for r in caplog.records if r.name == "mysite.request_timing"]
+    ranking, favorites = (json.loads(r.getMessage()) for r in records)
+    assert records[0].levelno == logging.INFO
+    assert ranking["route"] == "myapp:ranking" and not ranking["over_threshold"]
+    assert records[1].levelno == logging.WARNING
+    assert favorites["over_threshold"] and favorites["threshold"]["queries"] == 0
+    assert favorites["queries"] > 0 and favorites["status"] == 200
+
+
+class AsyncRequestTimingTest(TestCase):
+    async def test_非同期ビューのSQLも数えること(self):
+        user = await CustomUser.objects.acreate(
+            email="async@example.com", account_name="async"
+        )
+        playground = await Playground.objects.acreate(
+            name="中央公園", address="鹿児島市"
+        )
+        await self.async_client.aforce_login(user)
+
+        response = await self.async_client.post(
+            reverse("myapp:add_favorite"), {"playground_id": playground.pk}
+        )
+
+        queries = re.search(r'desc="(\d+) queries"', response["Server-Timing"])
+        assert queries and int(queries.group(1)) > 0
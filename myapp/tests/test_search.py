@@ -0,0 +1,71 @@
+import pytest
+from myapp.models import Playground
+from myapp.search import build_search_document, search_playgrounds, tokenize
+
+
+def test_文字列を重複のない2文字ずつのトークンに分割すること():
+    assert tokenize("公園公園") == ["公園", "園公"]
+
+
+def test_全角英数字は半角小文字に正規化してから分割すること():
+    assert tokenize("ＰＡＲＫ") == ["pa", "ar", "rk"]
+
+
+def test_記号や空白で区切られた単語をまたいだトークンを作らないこと():
+    assert tokenize("森の・広場") == ["森の", "広場"]
+
+
+def test_2文字未満の単語はそのまま1つのトークンにすること():
+    assert tokenize("a 公") == ["a", "公"]
+
+
+def test_空文字列の場合は空の検索用文書を返すこと():
+    assert build_search_document("", None) == ""
+
+
+@pytest.mark.django_db
+def test_施設を保存すると検索用文書が作成されること():
+    playground = Playground.objects.create(name="ひまわり公園", address="鹿児島市")
+    assert " 公園 " in playground.search_document
+
+
+@pytest.mark.django_db
+def test_update_fieldsを指定して保存しても検索用文書が更新されること():
+    playground = Playground.objects.create(name="ひまわり公園", address="鹿児島市")
+    playground.name = "さくら児童館"
+    playground.save(update_fields=["name"])
+    playground.refresh_from_db()
+    assert " 児童 " in playground.search_document
+
+
+@pytest.mark.django_db
+def test_検索語の途中の文字列でも部分一致で検索できること():
+    Playground.objects.create(name="鹿児島ふれあい広場", address="鹿児島市")
+    Playground.objects.create(name="霧島こども館", address="霧島市")
+    result = search_playgrounds(Playground.objects.all(), "ふれあい")
+    assert [p.name for p in result] == ["鹿児島ふれあい広場"]
+
+
+@pytest.mark.django_db
+def test_検索語の一部しか含まない施設は検索結果に含めないこと():
+    Playground.objects.create(name="ひまわり公園", address="鹿児島市")
+    result = search_playgrounds(Playground.objects.all(), "ひまわり児童館")
+    assert list(result) == []
+
+
+@pytest.mark.django_db
+def test_1文字の検索語でも検索できること():
+    Playground.objects.create(name="ひまわり公園", address="鹿児島市")
+    Playground.objects.create(name="さくら児童館", address="霧島市")
+    result = search_playgrounds(Playground.objects.all(), "園")
+    assert [p.name for p in result] == ["ひまわり公園"]
+
+
+@pytest.mark.django_db
+def test_施設名に一致する施設を住所のみに一致する施設より上位に並べること():
+    address_only = Playground.objects.create(name="こども館", address="公園通り1番地")
+    name_match = Playground.objects.create(name="中央公園", address="鹿児島市")
+    result = search_playgrounds(Playground.objects.all(), "公園").order_by(
+        "-search_rank", "id"
+    )
+    assert list(result) == [name_match, address_only]
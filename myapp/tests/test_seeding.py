@@ -0,0 +1,156 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from myapp import seeding
+from myapp.models import Favorite, Playground, Review
+from users.models import CustomUser
+
+PLAN = seeding.SeedPlan(
+    playgrounds=30, users=5, reviews=100, favorites_per_user=3, batch_size=7
+)
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="COPY は PostgreSQL でのみ使用できる"
+)
+
+
+@pytest.mark.django_db
+def test_指定した件数を作成し評価集計を再計算すること():
+    results = seeding.seed(PLAN, seeding.BULK)
+
+    assert [result.rows for result in results] == [30, 5, 15, 100]
+    assert Playground.objects.count() == 30
+    assert CustomUser.objects.count() == 5
+    assert Favorite.objects.count() == 15
+    assert Review.objects.count() == 100
+    total = sum(Playground.objects.values_list("review_count", flat=True))
+    assert total == 100
+    playground = Playground.objects.filter(review_count__gt=0).first()
+    assert playground.geohash and playground.search_document
+
+
+@pytest.mark.django_db
+def test_同じシードなら同じデータを作成すること():
+    def snapshot():
+        return (
+            list(Playground.objects.order_by("id").values_list("name", "parking_info")),
+            list(Review.objects.order_by("id").values_list("rating", "content")),
+        )
+
+    seeding.seed(PLAN, seeding.BULK)
+    first = snapshot()
+    seeding.clear_seed_data()
+    seeding.seed(PLAN, seeding.BULK)
+
+    assert snapshot() == first
+
+
+def test_COPYではJSONFieldの値をJSONの文字列で送ること():
+    playground = next(seeding.generate_playgrounds(PLAN))
+    playground.source_values = {"parking_info": "有料"}
+    field = Playground._meta.get_field("source_values")
+
+    text = seeding._copy_text(seeding._copy_value(field, playground))
+
+    # COPY のテキスト形式ではバックスラッシュを重ねて送る
+    assert json.loads(text.replace("\\\\", "\\")) == {"parking_info": "有料"}
+
+
+@postgresql_only
+@pytest.mark.django_db
+def test_COPYで指定した件数を作成すること():
+    results = seeding.seed(PLAN, seeding.COPY)
+
+    assert [result.rows for result in results] == [30, 5, 15, 100]
+    assert Playground.objects.count() == 30
+    assert CustomUser.objects.count() == 5
+    assert Favorite.objects.count() == 15
+    assert Review.objects.count() == 100
+    assert Playground.objects.filter(source_values={}).count() == 30
+    total = sum(Playground.objects.values_list("review_count", flat=True))
+    assert total == 100
+
+
+@pytest.mark.skipif(
+    connection.vendor == "postgresql", reason="PostgreSQL では COPY を使用できる"
+)
+@pytest.mark.django_db
+def test_PostgreSQL以外でCOPYを指定するとエラーになること():
+    with pytest.raises(CommandError):
+        call_command("seed_data", "--method", "copy", stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_コマンドで進捗と書き込み速度を表示すること():
+    stdout = StringIO()
+    call_command(
+        "seed_data",
+        "--playgrounds=10",
+        "--users=2",
+        "--reviews=20",
+        "--batch-size=5",
+        "--clear",
+        stdout=stdout,
+    )
+
+    output = stdout.getvalue()
+    assert "myapp_playground: 5/10" in output
+    assert "rows/s" in output
+    assert Review.objects.count() == 20
+
+
+@pytest.mark.django_db
+def test_口コミだけの作成では既存の施設とユーザーに口コミを作り直すこと():
+    user = CustomUser.objects.create_user(
+        email="dummy@example.com", password="x", account_name="dummy"
+    )
+    playgrounds = [Playground.objects.create(name=f"公園{i}") for i in range(3)]
+    Review.objects.create(
+        playground=playgrounds[0], user=user, rating=1, content="古い"
+    )
+
+    call_command("seed_data", "--reviews-only", "--clear", stdout=StringIO())
+
+    assert Playground.objects.count() == 3
+    assert CustomUser.objects.count() == 1
+    assert not Review.objects.filter(content="古い").exists()
+    assert Review.objects.count() == 3 * seeding.REVIEWS_PER_PLAYGROUND
+    total = sum(Playground.objects.values_list("review_count", flat=True))
+    assert total == 3 * seeding.REVIEWS_PER_PLAYGROUND
+
+
+@pytest.mark.django_db
+def test_口コミだけの作成で施設がなければエラーになること():
+    with pytest.raises(CommandError):
+        call_command("seed_data", "--reviews-only", stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_削除は合成したデータだけをシグナルを経由せずに行うこと(
+    django_assert_max_num_queries, django_capture_on_commit_callbacks
+):
+    user = CustomUser.objects.create_user(
+        email="real@example.com", password="x", account_name="real"
+    )
+    playground = Playground.objects.create(name="取り込んだ公園")
+    Review.objects.create(playground=playground, user=user, rating=5, content="良い")
+    seeding.seed(PLAN, seeding.BULK)
+    seeded_user = CustomUser.objects.exclude(pk=user.pk).first()
+    Review.objects.create(
+        playground=playground, user=seeded_user, rating=1, content="x"
+    )
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        with django_assert_max_num_queries(20):
+            seeding.clear_seed_data()
+
+    assert len(callbacks) == 1
+    assert list(Playground.objects.all()) == [playground]
+    assert list(CustomUser.objects.all()) == [user]
+    assert list(Review.objects.values_list("content", flat=True)) == ["良い"]
+    assert not Favorite.objects.exists()
+    playground.refresh_from_db()
+    assert (playground.review_count, playground.rating_sum) == (1, 5)
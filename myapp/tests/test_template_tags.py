@@ -30,3 +30,9 @@ class TemplateTagsTest(TestCase):
 
         anonymous_user = AnonymousUser()
         self.assertFalse(is_favorite(self.playground, anonymous_user))
+
+    def test_is_favorite_uses_precomputed_flag(self):
+        """ビューで判定済みのis_favoritedがある場合はクエリを発行せずにその値を返すかテスト"""
+        self.playground.is_favorited = True
+        with self.assertNumQueries(0):
+            self.assertTrue(is_favorite(self.playground, self.user))
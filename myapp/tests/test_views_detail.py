@@ -1,6 +1,7 @@
 import pytest
 from django.urls import reverse
 from django.test import Client
+from myapp import caching
 from myapp.models import Playground, Review
 from users.models import CustomUser
 
@@ -48,3 +49,127 @@ def test_存在しない施設IDの場合_404エラーを返すこと(client):
     # 存在しないIDで詳細ページにアクセス
     response = client.get(reverse("myapp:facility_detail", args=[999]))
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_施設情報はキャッシュされ_施設の更新で作り直されること(
+    client, playground, django_capture_on_commit_callbacks
+):
+    url = reverse("myapp:facility_detail", args=[playground.id])
+    client.get(url)
+
+    # save() を経由しない更新では更新日時が変わらないため、キャッシュした内容が表示される
+    Playground.objects.filter(pk=playground.pk).update(name="変更後の施設")
+    assert "テスト施設</h1>" in client.get(url).content.decode()
+
+    playground.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        playground.save()
+    assert "変更後の施設</h1>" in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_施設情報のキャッシュがあっても口コミ欄はログイン状態に応じて表示されること(
+    client, playground
+):
+    url = reverse("myapp:facility_detail", args=[playground.id])
+    assert "ログインして口コミを投稿" in client.get(url).content.decode()
+
+    user = CustomUser.objects.create_user(
+        email="testuser@example.com", password="password"
+    )
+    client.force_login(user)
+    content = client.get(url).content.decode()
+    assert "ログインして口コミを投稿" not in content
+    assert "口コミを投稿する" in content
+
+
+@pytest.mark.django_db
+def test_施設と口コミに変更がなければ_ETagの一致で304を返しレンダリングしないこと(
+    client, playground, django_capture_on_commit_callbacks
+):
+    user = CustomUser.objects.create_user(
+        email="testuser@example.com", password="password"
+    )
+    client.force_login(user)
+    url = reverse("myapp:facility_detail", args=[playground.id])
+    first = client.get(url)
+    assert first.has_header("Last-Modified")
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == 304
+    assert response.templates == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Review.objects.create(
+            playground=playground, user=user, content="楽しい", rating=4
+        )
+    response = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == 200
+    assert "楽しい" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_ETagはログイン状態によって異なること(client, playground):
+    url = reverse("myapp:facility_detail", args=[playground.id])
+    anonymous_etag = client.get(url)["ETag"]
+
+    user = CustomUser.objects.create_user(
+        email="testuser@example.com", password="password"
+    )
+    client.force_login(user)
+    response = client.get(url, HTTP_IF_NONE_MATCH=anonymous_etag)
+    assert response.status_code == 200
+    assert response["ETag"] != anonymous_etag
+
+
+@pytest.mark.django_db
+def test_口コミのキャッシュには投稿者のアカウント名だけを入れ_名前の変更で作り直すこと(
+    client, playground, django_capture_on_commit_callbacks
+):
+    user = CustomUser.objects.create_user(
+        email="author@example.com", password="password", account_name="変更前の名前"
+    )
+    Review.objects.create(playground=playground, user=user, content="楽しい", rating=4)
+    url = reverse("myapp:facility_detail", args=[playground.id])
+    client.get(url)
+
+    reviews, _ = caching.get_value(caching.REVIEW, ("recent", playground.pk))
+    assert reviews[0]["account_name"] == "変更前の名前"
+    assert "author@example.com" not in repr(reviews)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.account_name = "変更後の名前"
+        user.save()
+    content = client.get(url).content.decode()
+    assert "変更後の名前" in content and "変更前の名前" not in content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name", ["myapp:facility_detail", "myapp:view_reviews"])
+@pytest.mark.parametrize("update_fields", [None, ["account_name"]])
+def test_口コミの投稿者名が変わるとETagが変わること(
+    client, playground, url_name, update_fields, django_capture_on_commit_callbacks
+):
+    author = CustomUser.objects.create_user(
+        email="author@example.com", password="password", account_name="変更前の名前"
+    )
+    Review.objects.create(
+        playground=playground, user=author, content="楽しい", rating=4
+    )
+    viewer = CustomUser.objects.create_user(
+        email="viewer@example.com", password="password"
+    )
+    client.force_login(viewer)
+    url = reverse(url_name, args=[playground.id])
+    etag = client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author.account_name = "変更後の名前"
+        author.save(update_fields=update_fields)
+
+    author.refresh_from_db()
+    assert author.account_name_changed_at is not None
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "変更後の名前" in response.content.decode()
@@ -1,6 +1,8 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from myapp.models import Playground, Favorite
 
 User = get_user_model()
@@ -52,6 +54,30 @@ class FavoriteViewsTest(TestCase):
             ).exists()
         )
 
+    # ASGI（非同期のミドルウェアとビュー）でのお気に入り追加・削除のテスト
+    async def test_add_and_remove_favorite_via_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        data = {"playground_id": self.playground1.id}
+
+        response = await self.async_client.post(self.add_favorite_url, data)
+        self.assertEqual(response.status_code, 200)
+        favorites = Favorite.objects.filter(user=self.user, playground=self.playground1)
+        self.assertTrue(await favorites.aexists())
+
+        response = await self.async_client.post(self.remove_favorite_url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await favorites.aexists())
+
+    # 未ログインのAJAXリクエストには、ASGIでもログインURLを含む401を返すことのテスト
+    async def test_add_favorite_via_asgi_requires_login(self):
+        response = await self.async_client.post(
+            self.add_favorite_url,
+            {"playground_id": self.playground1.id},
+            headers={"x-requested-with": "XMLHttpRequest"},
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("redirect_url", response.json())
+
     # お気に入り一覧ページのテスト
     def test_favorite_list_view(self):
         self.client.login(email="testuser@example.com", password="testpassword")
@@ -118,3 +144,41 @@ class FavoriteViewsTest(TestCase):
         self.client.login(email="testuser@example.com", password="testpassword")
         response = self.client.post(self.add_favorite_url, {"playground_id": "999"})
         self.assertEqual(response.status_code, 404)
+
+
+class FavoriteQueryCountTest(TestCase):
+    """一覧ページのお気に入り判定が施設数に比例したクエリを発行しないことのテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@example.com",
+            password="testpassword",
+            account_name="testuser",
+        )
+        self.playgrounds = [
+            Playground.objects.create(name=f"Park {i}", address="Kagoshima City")
+            for i in range(10)
+        ]
+        for playground in self.playgrounds[:5]:
+            Favorite.objects.create(user=self.user, playground=playground)
+        self.client.login(email="testuser@example.com", password="testpassword")
+
+    def _count_favorite_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sum(1 for q in queries if 'FROM "myapp_favorite"' in q["sql"])
+
+    def test_施設一覧のお気に入り判定は1回のクエリで行うこと(self):
+        self.assertEqual(self._count_favorite_queries(reverse("myapp:index")), 1)
+
+    def test_施設一覧のお気に入りボタンに判定結果が反映されること(self):
+        response = self.client.get(reverse("myapp:index"))
+        self.assertContains(response, "お気に入り解除", count=5)
+
+    def test_お気に入り一覧のクエリ数はお気に入り件数に比例しないこと(self):
+        url = reverse("myapp:favorites")
+        before = self._count_favorite_queries(url)
+        for playground in self.playgrounds[5:]:
+            Favorite.objects.create(user=self.user, playground=playground)
+        self.assertEqual(self._count_favorite_queries(url), before)
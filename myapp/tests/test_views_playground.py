@@ -1,6 +1,9 @@
 from django.test import TestCase, Client
 from django.urls import reverse
-from myapp.models import Playground
+from unittest.mock import patch
+from myapp.models import Favorite, Playground
+from users.models import CustomUser
+from myapp.views import PlaygroundMapDataView
 
 
 class PlaygroundListViewTest(TestCase):
@@ -253,3 +256,197 @@ class PlaygroundListViewTest(TestCase):
                 self.url, {"target_age_max": '<!--#EXEC cmd="ls /"-->'}
             )
             self.assertEqual(response.status_code, 200)
+
+
+class PlaygroundListPaginationTest(TestCase):
+    """施設一覧のカーソル方式ページネーションのテスト"""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("myapp:index")
+        self.playgrounds = [
+            Playground.objects.create(name=f"Park {i:02d}", address="CityA")
+            for i in range(30)
+        ]
+
+    def test_1ページ目は先頭から表示件数分の施設を返すこと(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            list(response.context["playgrounds"]),
+            self.playgrounds[:24],
+        )
+
+    def test_次ページのカーソルで残りの施設を返すこと(self):
+        first = self.client.get(self.url)
+        next_cursor = first.context["page_obj"].next_cursor
+        response = self.client.get(self.url, {"cursor": next_cursor})
+        self.assertEqual(list(response.context["playgrounds"]), self.playgrounds[24:])
+
+    def test_最終ページでは次ページのカーソルがないこと(self):
+        first = self.client.get(self.url)
+        response = self.client.get(
+            self.url, {"cursor": first.context["page_obj"].next_cursor}
+        )
+        self.assertFalse(response.context["page_obj"].has_next())
+
+    def test_前ページのカーソルで1つ前のページに戻ること(self):
+        first = self.client.get(self.url)
+        second = self.client.get(
+            self.url, {"cursor": first.context["page_obj"].next_cursor}
+        )
+        response = self.client.get(
+            self.url, {"cursor": second.context["page_obj"].previous_cursor}
+        )
+        self.assertEqual(
+            list(response.context["playgrounds"]),
+            self.playgrounds[:24],
+        )
+
+    def test_不正なカーソルの場合は1ページ目を返すこと(self):
+        response = self.client.get(self.url, {"cursor": "invalid-cursor"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["playgrounds"][0], self.playgrounds[0])
+
+    def test_件数表示はページではなく検索結果全体の件数であること(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["filtered_count"], 30)
+
+    def test_一覧ページに地図用の施設データを埋め込まないこと(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("playgrounds-data", response.content.decode("utf-8"))
+
+    def test_キーワード検索の結果も関連度順にページ分割できること(self):
+        Playground.objects.create(name="Search Park", address="CityA")
+        first = self.client.get(self.url, {"q": "park"})
+        self.assertEqual(first.context["playgrounds"][0].name, "Park 00")
+        second = self.client.get(
+            self.url, {"q": "park", "cursor": first.context["page_obj"].next_cursor}
+        )
+        names = [p.name for p in second.context["playgrounds"]]
+        self.assertEqual(
+            names, [f"Park {i:02d}" for i in range(24, 30)] + ["Search Park"]
+        )
+
+
+class PlaygroundMapDataViewTest(TestCase):
+    """地図タブ用の施設データAPIのテスト"""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("myapp:playground_map_data")
+        Playground.objects.create(
+            name="Map Park A",
+            address="CityA",
+            phone="0991234567",
+            latitude=31.5,
+            longitude=130.5,
+        )
+        Playground.objects.create(
+            name="Map Park B", address="CityB", latitude=31.6, longitude=130.6
+        )
+        Playground.objects.create(name="No Location Park", address="CityA")
+
+    def test_位置情報を持つ施設のみを返すこと(self):
+        response = self.client.get(self.url)
+        names = [p["name"] for p in response.json()["playgrounds"]]
+        self.assertEqual(names, ["Map Park A", "Map Park B"])
+
+    def test_一覧ページと同じ検索条件で絞り込めること(self):
+        response = self.client.get(self.url, {"city": "CityA"})
+        names = [p["name"] for p in response.json()["playgrounds"]]
+        self.assertEqual(names, ["Map Park A"])
+
+    def test_ポップアップ用のフォーマット済み電話番号を含むこと(self):
+        response = self.client.get(self.url, {"city": "CityA"})
+        self.assertEqual(
+            response.json()["playgrounds"][0]["formatted_phone"], "099-123-4567"
+        )
+
+    def test_共有キャッシュを許可するCacheControlヘッダーを返すこと(self):
+        response = self.client.get(self.url)
+        self.assertIn("public", response["Cache-Control"])
+
+    def test_bboxを指定すると範囲内の施設を中心から近い順に返すこと(self):
+        Playground.objects.create(
+            name="Map Park C", address="CityA", latitude=31.52, longitude=130.52
+        )
+        response = self.client.get(self.url, {"bbox": "130.45,31.45,130.58,31.58"})
+        data = response.json()
+        self.assertEqual(
+            [p["name"] for p in data["playgrounds"]], ["Map Park C", "Map Park A"]
+        )
+        self.assertFalse(data["truncated"])
+
+    def test_nearを指定すると半径内の施設を近い順に距離付きで返すこと(self):
+        response = self.client.get(self.url, {"near": "31.6,130.6", "radius_km": "20"})
+        playgrounds = response.json()["playgrounds"]
+        self.assertEqual([p["name"] for p in playgrounds], ["Map Park B", "Map Park A"])
+        self.assertEqual(playgrounds[0]["distance_km"], 0)
+        self.assertAlmostEqual(playgrounds[1]["distance_km"], 14.6, delta=0.5)
+
+    def test_半径外の施設は返さないこと(self):
+        response = self.client.get(self.url, {"near": "31.6,130.6", "radius_km": "5"})
+        names = [p["name"] for p in response.json()["playgrounds"]]
+        self.assertEqual(names, ["Map Park B"])
+
+    def test_範囲指定と検索条件を組み合わせられること(self):
+        response = self.client.get(
+            self.url, {"near": "31.6,130.6", "radius_km": "20", "city": "CityA"}
+        )
+        names = [p["name"] for p in response.json()["playgrounds"]]
+        self.assertEqual(names, ["Map Park A"])
+
+    def test_件数が上限を超える場合は近い順に切り詰めること(self):
+        with patch.object(PlaygroundMapDataView, "max_results", 1):
+            response = self.client.get(self.url, {"bbox": "130,31,131,32"})
+        data = response.json()
+        self.assertEqual([p["name"] for p in data["playgrounds"]], ["Map Park A"])
+        self.assertTrue(data["truncated"])
+
+    def test_不正な範囲指定の場合は400を返すこと(self):
+        for params in (
+            {"bbox": "130,31"},
+            {"near": "abc"},
+            {"near": "31.6,130.6", "radius_km": "0"},
+            {"near": "31.6,130.6", "radius_km": "x"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json()["status"], "error")
+
+
+class PlaygroundCardCacheTest(TestCase):
+    """施設カードのフラグメントキャッシュのテスト"""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("myapp:index")
+        self.playground = Playground.objects.create(
+            name="Cached Park", address="CityA", phone="0991234567"
+        )
+
+    def test_施設カードは更新日時が変わるまでキャッシュした内容を表示すること(self):
+        self.client.get(self.url)
+        Playground.objects.filter(pk=self.playground.pk).update(name="Renamed Park")
+        self.assertContains(self.client.get(self.url), "Cached Park")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.playground.name = "Renamed Park"
+            self.playground.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Renamed Park")
+        self.assertNotContains(response, "Cached Park")
+
+    def test_キャッシュした施設カードでもお気に入りボタンはユーザーごとに表示すること(
+        self,
+    ):
+        self.assertContains(self.client.get(self.url), "?next=/")
+
+        user = CustomUser.objects.create_user(
+            email="user@example.com", password="password"
+        )
+        Favorite.objects.create(user=user, playground=self.playground)
+        self.client.force_login(user)
+        response = self.client.get(self.url)
+        self.assertContains(response, "お気に入り解除")
+        self.assertContains(response, "099-123-4567")
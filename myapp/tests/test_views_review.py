@@ -53,6 +53,18 @@ class ReviewViewsTest(TestCase):
             ).exists()
         )
 
+    async def test_add_review_via_asgi(self):
+        """ASGI（非同期のミドルウェアとビュー）でもレビューを追加でき、評価集計が更新されることをテスト"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            self.add_review_url, {"content": "Nice!", "rating": 4}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["review"]["user_account_name"], "testuser")
+        playground = await Playground.objects.aget(pk=self.playground.pk)
+        self.assertEqual(playground.review_count, 1)
+
     def test_add_review_view_invalid_rating(self):
         """不正なratingでレビュー追加を試みると400エラーが返ることをテスト"""
         self.client.login(email="testuser@example.com", password="testpassword")
@@ -155,6 +167,27 @@ class ReviewListPageTest(TestCase):
         response = self.client.get(self.review_list_url, {"page": 99})
         self.assertEqual(response.status_code, 404)
 
+    def test_review_list_page_returns_304_when_not_modified(self):
+        """施設と口コミに変更がなければ、条件付きGETに304を返すことをテストする。"""
+        first = self.client.get(self.review_list_url, {"page": 2})
+        response = self.client.get(
+            self.review_list_url,
+            {"page": 2},
+            HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.review_list_url, {"page": 2}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+        # 口コミが削除されると ETag が変わる
+        Review.objects.filter(playground=self.playground).first().delete()
+        response = self.client.get(
+            self.review_list_url, {"page": 2}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+
 
 class ReviewCreateViewTest(TestCase):
     def setUp(self):
@@ -1,5 +1,9 @@
 from django.urls import path
-from myapp.views.playground_views import PlaygroundListView
+from myapp.views.playground_views import (
+    PlaygroundClusterTileView,
+    PlaygroundListView,
+    PlaygroundMapDataView,
+)
 from myapp.views.favorite_views import (
     AddFavoriteView,
     RemoveFavoriteView,
@@ -15,6 +19,16 @@ app_name = "myapp"
 
 urlpatterns = [
     path("", PlaygroundListView.as_view(), name="index"),
+    path(
+        "api/playgrounds/map/",
+        PlaygroundMapDataView.as_view(),
+        name="playground_map_data",
+    ),
+    path(
+        "api/playgrounds/clusters/<int:z>/<int:x>/<int:y>/",
+        PlaygroundClusterTileView.as_view(),
+        name="playground_clusters",
+    ),
     path("facilities/<int:pk>/", FacilityDetailView.as_view(), name="facility_detail"),
     path("ranking/", RankingListView.as_view(), name="ranking"),
     path("favorites/", FavoriteListView.as_view(), name="favorites"),
@@ -1,4 +1,8 @@
-from .playground_views import PlaygroundListView
+from .playground_views import (
+    PlaygroundClusterTileView,
+    PlaygroundListView,
+    PlaygroundMapDataView,
+)
 from .favorite_views import AddFavoriteView, RemoveFavoriteView, FavoriteListView
 from .review_views import AddReviewView, ReviewCreateView
 from .ranking_views import RankingListView
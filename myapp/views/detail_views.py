@@ -1,14 +1,26 @@
+from django.db.models import F
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import DetailView
+from myapp import caching
+from myapp.conditional import playground_etag, playground_last_modified
 from myapp.models import Playground, Review
 from typing import Any, Dict
-from django.core.paginator import Paginator
 
+RECENT_REVIEW_LIMIT = 10
+RECENT_REVIEWS_TIMEOUT = 60 * 10
 
+
+@method_decorator(
+    condition(etag_func=playground_etag, last_modified_func=playground_last_modified),
+    name="dispatch",
+)
 class FacilityDetailView(DetailView):
     """
     施設詳細ビュー
 
     指定されたPlaygroundオブジェクトの詳細を表示します。
+    施設と口コミに変更がなければ、条件付きGETに 304 を返します（myapp.conditional 参照）。
     """
 
     model = Playground
@@ -21,14 +33,33 @@ class FacilityDetailView(DetailView):
         レビューをページ分割して追加します。
         """
         context = super().get_context_data(**kwargs)
-        playground = self.get_object()
+        playground = self.object
+
+        # 直近10件のレビューを review 名前空間にキャッシュする（口コミの追加・更新・削除で無効になる）
+        reviews, has_more = caching.get_or_set(
+            caching.REVIEW,
+            ("recent", playground.pk),
+            lambda: self.get_recent_reviews(playground),
+            RECENT_REVIEWS_TIMEOUT,
+        )
+        context["reviews"] = reviews
+        context["has_more_reviews"] = has_more
+        return context
 
-        # 直近10件のレビューを取得
-        all_reviews = (
+    @staticmethod
+    def get_recent_reviews(
+        playground: Playground,
+    ) -> tuple[list[Dict[str, Any]], bool]:
+        """
+        直近のレビュー（表示する項目だけの辞書）と、それより古いレビューがあるかどうかを返す。
+        1件多く取得して続きの有無を判定し、件数を数えるクエリを省く。
+        共有のキャッシュに入るため、投稿者はメールアドレスなどを含むユーザーではなくアカウント名だけにする。
+        """
+        reviews = list(
             Review.objects.filter(playground=playground)
-            .select_related("user")
             .order_by("-created_at")
+            .values(
+                "content", "rating", "created_at", account_name=F("user__account_name")
+            )[: RECENT_REVIEW_LIMIT + 1]
         )
-        context["reviews"] = all_reviews[:10]
-        context["has_more_reviews"] = all_reviews.count() > 10
-        return context
+        return reviews[:RECENT_REVIEW_LIMIT], len(reviews) > RECENT_REVIEW_LIMIT
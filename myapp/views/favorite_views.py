@@ -1,4 +1,4 @@
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.http import JsonResponse, HttpRequest
 from typing import Any, Dict, cast
 from django.db.models.query import QuerySet
@@ -13,8 +13,11 @@ from django.views.generic import ListView, View, CreateView
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
-from .mixins import LoginRequiredJsonMixin
+from .mixins import LoginRequiredJsonMixin, FavoriteStatusMixin
+from .. import metrics
 from ..filters import PlaygroundFilterMixin
+from ..favorites import get_favorite_ids
+from ..serializers import serialize_playground_for_map
 from users.models import CustomUser
 
 
@@ -24,9 +27,10 @@ class AddFavoriteView(LoginRequiredJsonMixin):
     ログインしているユーザーのみがアクセス可能。
     """
 
-    def post(self, request: HttpRequest, *args, **kwargs) -> JsonResponse:
+    async def post(self, request: HttpRequest, *args, **kwargs) -> JsonResponse:
         """
         POSTリクエストを処理し、指定された公園をお気に入りに追加する。
+        ASGI では非同期の ORM で処理し、データベースの待ち時間にワーカーを占有しない。
         """
         playground_id_str = request.POST.get("playground_id")
         if playground_id_str is None:
@@ -39,10 +43,16 @@ class AddFavoriteView(LoginRequiredJsonMixin):
             return JsonResponse(
                 {"status": "error", "message": "Invalid playground_id"}, status=400
             )
-        playground = get_object_or_404(Playground, id=playground_id)
+        playground = await aget_object_or_404(
+            Playground.objects.only("id"), id=playground_id
+        )
         # お気に入りを作成または取得
-        user = cast(CustomUser, request.user)
-        Favorite.objects.get_or_create(user=user, playground=playground)
+        user = cast(CustomUser, await request.auser())
+        _, created = await Favorite.objects.aget_or_create(
+            user=user, playground=playground
+        )
+        if created:
+            metrics.FAVORITES_TOGGLED.labels("added").inc()
         return JsonResponse({"status": "ok"})
 
 
@@ -52,7 +62,7 @@ class RemoveFavoriteView(LoginRequiredJsonMixin):
     ログインしているユーザーのみがアクセス可能。
     """
 
-    def post(self, request: HttpRequest, *args, **kwargs) -> JsonResponse:
+    async def post(self, request: HttpRequest, *args, **kwargs) -> JsonResponse:
         """
         POSTリクエストを処理し、指定された公園をお気に入りから削除する。
         """
@@ -67,14 +77,22 @@ class RemoveFavoriteView(LoginRequiredJsonMixin):
             return JsonResponse(
                 {"status": "error", "message": "Invalid playground_id"}, status=400
             )
-        playground = get_object_or_404(Playground, id=playground_id)
+        playground = await aget_object_or_404(
+            Playground.objects.only("id"), id=playground_id
+        )
         # お気に入りを削除
-        user = cast(CustomUser, request.user)
-        Favorite.objects.filter(user=user, playground=playground).delete()
+        user = cast(CustomUser, await request.auser())
+        deleted, _ = await Favorite.objects.filter(
+            user=user, playground=playground
+        ).adelete()
+        if deleted:
+            metrics.FAVORITES_TOGGLED.labels("removed").inc()
         return JsonResponse({"status": "ok"})
 
 
-class FavoriteListView(LoginRequiredMixin, PlaygroundFilterMixin, ListView):
+class FavoriteListView(
+    LoginRequiredMixin, FavoriteStatusMixin, PlaygroundFilterMixin, ListView
+):
     """
     お気に入り一覧ページビュー。
     ログインしているユーザーのみがアクセス可能。
@@ -90,42 +108,19 @@ class FavoriteListView(LoginRequiredMixin, PlaygroundFilterMixin, ListView):
         # PlaygroundFilterMixinのget_querysetを呼び出してフィルタリングを適用
         queryset = super().get_queryset()
         # さらにお気に入り登録されたもので絞り込み
-        queryset = queryset.filter(favorite__user=user)
-
-        # フィルタリング後の件数を取得
-        self.filtered_count = queryset.count()
-        return queryset
+        return queryset.filter(favorite__user=user)
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
         favorites = context["favorites"]
-        favorite_ids = [str(p.id) for p in favorites]
         # 公園データをJSON形式に変換
-        playgrounds_data = []
-        for playground in favorites:
-            playgrounds_data.append(
-                {
-                    "id": playground.id,
-                    "name": playground.name,
-                    "address": playground.address,
-                    "phone": playground.phone,
-                    "formatted_phone": playground.formatted_phone,
-                    "latitude": playground.latitude,
-                    "longitude": playground.longitude,
-                    "opening_hours": playground.formatted_opening_hours,
-                    "target_age": playground.formatted_target_age,
-                    "fee": playground.formatted_fee,
-                    "parking": playground.formatted_parking,
-                }
-            )
+        playgrounds_data = [serialize_playground_for_map(p) for p in favorites]
+        # 件数は取得済みの一覧とお気に入りIDの集合から求め、COUNTクエリを発行しない
         context.update(
             {
-                "favorite_ids": favorite_ids,
                 "playgrounds_data": playgrounds_data,
-                "filtered_count": self.filtered_count,
-                "total_count": Favorite.objects.filter(
-                    user=cast(CustomUser, self.request.user)
-                ).count(),
+                "filtered_count": len(playgrounds_data),
+                "total_count": len(get_favorite_ids(self.request)),
             }
         )
         return context
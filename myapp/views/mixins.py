@@ -2,24 +2,75 @@ from django.contrib.auth.mixins import AccessMixin
 from django.http import JsonResponse, HttpResponseRedirect
 from django.views import View
 
+from myapp.favorites import get_favorite_ids
+from myapp.pagination import CursorPaginator
+
 
 class LoginRequiredJsonMixin(AccessMixin, View):
     """
     ログインが必須なビューのためのMixin。
     未認証のユーザーがアクセスした場合、AJAXリクエストであればJSONレスポンスを返し、
     そうでなければ通常のログインページへのリダイレクトを行います。
+    同期・非同期のどちらのビューにも使えます。
     """
 
     def dispatch(self, request, *args, **kwargs):
+        # ハンドラが非同期（async def）のビューでは、ユーザーを request.auser() で読み込む
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
         if not request.user.is_authenticated:
-            # AJAXリクエスト(X-Requested-Withヘッダーを持つ)の場合はJSONレスポンスを返す
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                # `get_login_url()` は AccessMixin から提供される
-                login_url = self.get_login_url()
-                # ログイン後のリダイレクト先として現在のURLを指定
-                next_url = request.get_full_path()
-                redirect_url = f"{login_url}?next={next_url}"
-                return JsonResponse({"redirect_url": redirect_url}, status=401)
-            # それ以外の場合は通常のログインページへリダイレクト
-            return self.handle_no_permission()
+            return self.handle_unauthenticated(request)
         return super().dispatch(request, *args, **kwargs)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self.handle_unauthenticated(request)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def handle_unauthenticated(self, request):
+        # AJAXリクエスト(X-Requested-Withヘッダーを持つ)の場合はJSONレスポンスを返す
+        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+            # `get_login_url()` は AccessMixin から提供される
+            login_url = self.get_login_url()
+            # ログイン後のリダイレクト先として現在のURLを指定
+            next_url = request.get_full_path()
+            redirect_url = f"{login_url}?next={next_url}"
+            return JsonResponse({"redirect_url": redirect_url}, status=401)
+        # それ以外の場合は通常のログインページへリダイレクト
+        return self.handle_no_permission()
+
+
+class CursorPaginationMixin:
+    """
+    ListViewのページネーションをキーセット（カーソル）方式に置き換えるMixin。
+    paginate_by と組み合わせて使用し、?cursor= パラメータでページを移動する。
+    """
+
+    cursor_query_param = "cursor"
+    cursor_ordering: tuple[str, ...] = ("id",)
+
+    def get_cursor_ordering(self) -> tuple[str, ...]:
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.get_cursor_ordering())
+        page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class FavoriteStatusMixin:
+    """
+    一覧ビューで各施設のお気に入り状態を一括で判定するMixin。
+    リクエスト単位で読み込んだお気に入りIDの集合から各施設に is_favorited を設定し、
+    テンプレートタグ is_favorite が施設ごとにクエリを発行しないようにする。
+    JavaScript用の favorite_ids も同じ集合から作成する。
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        favorite_ids = get_favorite_ids(self.request)
+        for playground in context["object_list"]:
+            playground.is_favorited = playground.id in favorite_ids
+        context["favorite_ids"] = [str(pk) for pk in sorted(favorite_ids)]
+        return context
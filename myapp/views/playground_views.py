@@ -1,6 +1,8 @@
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse, HttpRequest
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
 from typing import Any, Dict, cast
 from django.db.models.query import QuerySet
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
@@ -9,20 +11,44 @@ import urllib.request
 import urllib.parse
 import json
 from django.views.generic import ListView, View, CreateView, TemplateView
+from django.views.generic.list import MultipleObjectMixin
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from ..clustering import get_tile_clusters, is_valid_tile
+from ..counting import get_total_playground_count
 from ..filters import PlaygroundFilterMixin
+from ..geo import (
+    BoundingBox,
+    bbox_around,
+    covering_cells,
+    geohash_prefix_q,
+    haversine_km,
+    parse_bbox,
+    parse_point,
+)
+from ..serializers import serialize_playground_for_map
+from .mixins import CursorPaginationMixin, FavoriteStatusMixin
 
 
-class PlaygroundListView(PlaygroundFilterMixin, ListView):
+class PlaygroundListView(
+    FavoriteStatusMixin, PlaygroundFilterMixin, CursorPaginationMixin, ListView
+):
     """
     公園一覧を表示するビュー。
     様々な条件でのフィルタリング機能と、ユーザーのお気に入り公園情報を表示する。
+    施設カードはカーソル方式でページ分割し、地図用データは PlaygroundMapDataView から遅延取得する。
     """
 
     model = Playground
     template_name = "playgrounds/list.html"
     context_object_name = "playgrounds"
+    paginate_by = 24
+
+    def get_cursor_ordering(self) -> tuple[str, ...]:
+        # キーワード検索時は関連度の高い順にページ分割する
+        if "q" in self.get_filter_criteria():
+            return ("-search_rank", "id")
+        return super().get_cursor_ordering()
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """
@@ -31,49 +57,123 @@ class PlaygroundListView(PlaygroundFilterMixin, ListView):
         現在のフィルタリングパラメータもコンテキストに追加する。
         """
         context = super().get_context_data(**kwargs)
-        playgrounds = context["playgrounds"]
-
-        # 公園の総数とフィルタリングされた公園の数を取得
-        total_count = Playground.objects.count()
-        filtered_count = playgrounds.count()
-
-        # 公園データをJSON形式に変換
-        # formatted_phone プロパティを含めるために手動でデータを構築
-        playgrounds_data = []
-        for playground in playgrounds:
-            playgrounds_data.append(
-                {
-                    "id": playground.id,
-                    "name": playground.name,
-                    "address": playground.address,
-                    "phone": playground.phone,  # 元の電話番号も保持
-                    "formatted_phone": playground.formatted_phone,  # フォーマット済み電話番号
-                    "latitude": playground.latitude,
-                    "longitude": playground.longitude,
-                    "opening_hours": playground.formatted_opening_hours,
-                    "target_age": playground.formatted_target_age,
-                    "fee": playground.formatted_fee,
-                    "parking": playground.formatted_parking,
-                }
-            )
-        favorite_ids: list[str] = []
-        # ユーザーが認証済みの場合、お気に入り公園の情報を取得
-        if self.request.user.is_authenticated:
-            # お気に入り公園のIDリストを取得
-            favorite_ids_int = list(
-                Favorite.objects.filter(user=self.request.user).values_list(
-                    "playground_id", flat=True
-                )
-            )
-            favorite_ids = [str(id) for id in favorite_ids_int]
+
+        # 公園の総数はキャッシュから、フィルタリングされた公園の数はページ取得と同じクエリで取得
+        total_count = get_total_playground_count()
+        filtered_count = context["paginator"].count
 
         # コンテキストを更新
         context.update(
             {
                 "total_count": total_count,
                 "filtered_count": filtered_count,
-                "playgrounds_data": playgrounds_data,
-                "favorite_ids": favorite_ids,
             }
         )
         return context
+
+
+@method_decorator(cache_control(public=True, max_age=300), name="dispatch")
+class PlaygroundMapDataView(PlaygroundFilterMixin, MultipleObjectMixin, View):
+    """
+    地図タブ用の施設データをJSONで返すビュー。
+    一覧ページと同じ検索条件を受け取り、位置情報を持つ施設のみを返す。
+    ユーザーに依存しない内容のため、ブラウザや中間キャッシュでの再利用を許可する。
+
+    ?bbox=west,south,east,north を指定すると表示範囲内の施設を範囲の中心から近い順に、
+    ?near=lat,lng&radius_km= を指定すると中心から半径内の施設を近い順に、最大 max_results 件返す。
+    """
+
+    model = Playground
+    max_results = 500
+    default_radius_km = 5.0
+    max_radius_km = 100.0
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+        queryset = self.get_queryset().filter(
+            latitude__isnull=False, longitude__isnull=False
+        )
+        try:
+            area = self.get_search_area()
+        except ValueError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+        if area is None:
+            playgrounds_data = [
+                serialize_playground_for_map(p) for p in queryset.order_by("id")
+            ]
+            return JsonResponse({"playgrounds": playgrounds_data})
+
+        bbox, origin, radius_km = area
+        # geohash の前方一致でインデックスを使って候補を絞り、緯度・経度で正確に絞り込む
+        queryset = queryset.filter(
+            geohash_prefix_q(covering_cells(bbox)),
+            latitude__range=(bbox.south, bbox.north),
+            longitude__range=(bbox.west, bbox.east),
+        )
+        nearby = []
+        for playground in queryset:
+            distance = haversine_km(*origin, playground.latitude, playground.longitude)
+            if radius_km is None or distance <= radius_km:
+                nearby.append((distance, playground))
+        nearby.sort(key=lambda item: (item[0], item[1].id))
+
+        playgrounds_data = [
+            {**serialize_playground_for_map(p), "distance_km": round(distance, 3)}
+            for distance, p in nearby[: self.max_results]
+        ]
+        return JsonResponse(
+            {
+                "playgrounds": playgrounds_data,
+                "truncated": len(nearby) > self.max_results,
+            }
+        )
+
+    def get_search_area(
+        self,
+    ) -> tuple[BoundingBox, tuple[float, float], float | None] | None:
+        """
+        GETパラメータから (検索範囲, 距離の基準点, 半径km) を返す。
+        範囲の指定がなければ None を返し、不正な値の場合は ValueError を送出する。
+        """
+        bbox_param = self.request.GET.get("bbox")
+        near_param = self.request.GET.get("near")
+        if bbox_param:
+            bbox = parse_bbox(bbox_param)
+            return bbox, bbox.center, None
+        if near_param:
+            origin = parse_point(near_param)
+            try:
+                radius_km = float(
+                    self.request.GET.get("radius_km") or self.default_radius_km
+                )
+            except ValueError:
+                raise ValueError("radius_km は数値で指定してください")
+            if not 0 < radius_km <= self.max_radius_km:
+                raise ValueError(
+                    f"radius_km は0より大きく{self.max_radius_km:g}以下で指定してください"
+                )
+            return bbox_around(*origin, radius_km), origin, radius_km
+        return None
+
+
+@method_decorator(cache_control(public=True, max_age=300), name="dispatch")
+class PlaygroundClusterTileView(PlaygroundFilterMixin, MultipleObjectMixin, View):
+    """
+    地図のタイル（ズームレベル z、列 x、行 y）内の施設をクラスタにまとめてJSONで返すビュー。
+    一覧ページと同じ検索条件を受け取り、結果はタイルと検索条件ごとにキャッシュする（myapp.clustering 参照）。
+    """
+
+    model = Playground
+
+    def get(
+        self, request: HttpRequest, z: int, x: int, y: int, *args: Any, **kwargs: Any
+    ) -> JsonResponse:
+        if not is_valid_tile(z, x, y):
+            return JsonResponse(
+                {"status": "error", "message": "Invalid tile"}, status=400
+            )
+        queryset = self.get_queryset().filter(
+            latitude__isnull=False, longitude__isnull=False
+        )
+        data = get_tile_clusters(queryset, z, x, y, self.get_filter_cache_key())
+        return JsonResponse({"zoom": z, **data})
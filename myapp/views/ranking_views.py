@@ -1,6 +1,13 @@
+from typing import Any, Dict
 from django.views.generic import ListView
 from myapp.models import Playground
-from django.db.models.query import QuerySet
+from myapp.ranking import (
+    SORT_CHOICES,
+    SORT_RATING,
+    RankingSnapshot,
+    get_ranking,
+    load_ranked_playgrounds,
+)
 
 
 class RankingListView(ListView):
@@ -8,22 +15,35 @@ class RankingListView(ListView):
     施設ランキング一覧ビュー
 
     Playgroundオブジェクトを評価順または口コミ数順で表示します。
+    ランキングはキャッシュしたスナップショット（myapp.ranking 参照）からページ単位で取り出します。
     """
 
     model = Playground  # このビューで使用するモデルをPlaygroundに設定
     template_name = "ranking/list.html"  # 使用するテンプレートを指定
     context_object_name = "playgrounds"  # テンプレート内でリストにアクセスするための変数名を'playgrounds'に設定
+    paginate_by = 20
 
-    def get_queryset(self) -> QuerySet[Playground]:
+    def get_sort(self) -> str:
+        """GETリクエストの'sort'パラメータから並び順を決定します（不正な値は評価順）。"""
+        sort_by = self.request.GET.get("sort")
+        return sort_by if sort_by in SORT_CHOICES else SORT_RATING
+
+    def get_queryset(self) -> RankingSnapshot:
         """
-        表示するクエリセットを決定します。
+        表示するランキングを決定します。
 
-        GETリクエストの'sort'パラメータに基づいて、評価順または口コミ数順で施設を並べ替えます。
+        評価順または口コミ数順の (施設ID, スコア) のスナップショットを返します。
         """
-        sort_by = self.request.GET.get("sort")  # GETパラメータからソート順を取得
-        if sort_by == "review_count":
-            # 口コミ数が多い順に施設を取得
-            return Playground.objects.get_by_review_count_rank()
-        else:
-            # 評価が高い順に施設を取得（デフォルト）
-            return Playground.objects.get_by_rating_rank()
+        return get_ranking(self.get_sort())
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        """表示中のページの施設だけをデータベースから取得し、順位を付けてコンテキストに渡します。"""
+        context = super().get_context_data(**kwargs)
+        page = context["page_obj"]
+        playgrounds = load_ranked_playgrounds(
+            list(context["object_list"]), start_rank=page.start_index() if page else 1
+        )
+        context["object_list"] = playgrounds
+        context[self.context_object_name] = playgrounds
+        context["sort"] = self.get_sort()
+        return context
@@ -1,4 +1,4 @@
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from django.http import (
     JsonResponse,
     HttpRequest,
@@ -14,6 +14,9 @@ from .mixins import LoginRequiredJsonMixin
 from users.models import CustomUser
 from myapp.forms import ReviewForm  # ReviewFormをインポート
 from django.urls import reverse_lazy  # reverse_lazyをインポート
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from myapp.conditional import playground_etag, playground_last_modified
 
 
 class AddReviewView(LoginRequiredJsonMixin):
@@ -22,11 +25,12 @@ class AddReviewView(LoginRequiredJsonMixin):
     ログインしているユーザーのみがアクセス可能。
     """
 
-    def post(
+    async def post(
         self, request: HttpRequest, playground_id: int, *args: Any, **kwargs: Any
     ) -> JsonResponse:
         """
         POSTリクエストを処理し、指定された公園にレビューを追加する。
+        ASGI では非同期の ORM で処理する（評価集計の更新などのシグナルはスレッドで実行される）。
         """
         content = request.POST.get("content")
         rating = request.POST.get("rating")
@@ -38,7 +42,9 @@ class AddReviewView(LoginRequiredJsonMixin):
             )
 
         # 公園オブジェクトを取得
-        playground = get_object_or_404(Playground, id=playground_id)
+        playground = await aget_object_or_404(
+            Playground.objects.only("id"), id=playground_id
+        )
 
         try:
             rating_int = int(rating)
@@ -48,21 +54,23 @@ class AddReviewView(LoginRequiredJsonMixin):
             )
 
         # レビューを作成
-        user = cast(CustomUser, request.user)
-        review = Review.objects.create(
+        user = cast(CustomUser, await request.auser())
+        review = await Review.objects.acreate(
             playground=playground, user=user, content=content, rating=rating_int
         )
 
         review_data = {
             "content": review.content,
             "rating": review.rating,
-            "user_account_name": review.user.account_name,
+            "user_account_name": user.account_name,
             "created_at": review.created_at.strftime("%Y年%m月%d日 %H:%M"),
         }
 
         return JsonResponse({"status": "success", "review": review_data})
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    async def get(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> JsonResponse:
         """
         GETリクエストは無効。
         """
@@ -71,10 +79,15 @@ class AddReviewView(LoginRequiredJsonMixin):
         )
 
 
+@method_decorator(
+    condition(etag_func=playground_etag, last_modified_func=playground_last_modified),
+    name="dispatch",
+)
 class ReviewListView(ListView):
     """
     レビュー一覧ビュー。
     指定された公園のレビュー一覧を表示する。
+    施設と口コミに変更がなければ、条件付きGETに 304 を返す（myapp.conditional 参照）。
     """
 
     model = Review
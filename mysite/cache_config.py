@@ -0,0 +1,73 @@
+"""
+環境変数 CACHE_URL からDjangoの CACHES 設定を組み立てる。
+
+dj-database-url と同様に、URLのスキームでキャッシュバックエンドを選ぶ。
+
+    redis://host:6379/0            Redis（gunicornのワーカー・複数サーバー間で共有）
+    rediss://host:6379/0           Redis（TLS接続）
+    memcached://host:11211         memcached（pymemcache）
+    file:///var/tmp/django_cache   ファイル（同じサーバーのワーカー間で共有。ローカル用の代替）
+    db://django_cache              データベースのテーブル（要 `manage.py createcachetable`）
+    locmem://                      プロセスごとのメモリ（未指定時の既定値。ワーカー間で共有されない）
+    dummy://                       キャッシュしない
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_KEY_PREFIX = "kidsplayground"
+DEFAULT_TIMEOUT = 300
+
+BACKENDS = {
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "rediss": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "db": "django.core.cache.backends.db.DatabaseCache",
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def parse_cache_url(
+    url: str | None, key_prefix: str = DEFAULT_KEY_PREFIX
+) -> Dict[str, Any]:
+    """
+    CACHE_URL を CACHES["default"] の辞書に変換する。
+    クエリ文字列の timeout（秒、"none" で無期限）で既定の有効期限を上書きできる。
+    """
+    if not url:
+        url = "locmem://"
+    parts = urlsplit(url)
+    scheme = parts.scheme
+    if scheme not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"CACHE_URL のスキーム '{scheme}' には対応していません"
+            f"（{', '.join(sorted(BACKENDS))} のいずれかを指定してください）"
+        )
+
+    config: Dict[str, Any] = {
+        "BACKEND": BACKENDS[scheme],
+        "KEY_PREFIX": key_prefix,
+        "TIMEOUT": DEFAULT_TIMEOUT,
+    }
+    if scheme in ("redis", "rediss"):
+        config["LOCATION"] = parts._replace(query="").geturl()
+    elif scheme == "memcached":
+        config["LOCATION"] = parts.netloc
+    elif scheme == "file":
+        config["LOCATION"] = parts.path
+    elif scheme == "db":
+        config["LOCATION"] = parts.netloc or parts.path.lstrip("/") or "django_cache"
+    elif scheme == "locmem":
+        config["LOCATION"] = parts.netloc
+
+    timeout = parse_qs(parts.query).get("timeout")
+    if timeout:
+        value = timeout[-1]
+        config["TIMEOUT"] = None if value.lower() == "none" else int(value)
+    return config
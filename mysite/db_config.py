@@ -0,0 +1,98 @@
+"""
+データベース接続の再利用方法を DATABASES の設定に反映する。
+
+環境変数 DB_CONN_MODE で、リクエストごとに接続し直さない方法を選ぶ。
+
+    pool        psycopg 3 のコネクションプール（Django 5.1 の OPTIONS["pool"]）。gunicorn のワーカーごとに
+                DB_POOL_MIN_SIZE〜DB_POOL_MAX_SIZE 本の接続を保ち、空きがなければ DB_POOL_TIMEOUT 秒まで待つ。
+                SERVER_MODE=asgi の場合の既定値（ASGI ではリクエストごとにスレッドが変わり、persistent の接続は再利用されない）
+    persistent  スレッドごとの接続を DB_CONN_MAX_AGE 秒まで使い回す（WSGI の場合の既定値）
+    none        リクエストごとに接続し、終わったら閉じる
+
+pool・persistent では、再利用する前に接続が切れていないかを確認する (CONN_HEALTH_CHECKS)。
+コネクションプールは PostgreSQL でのみ使え、それ以外のデータベース（SQLite など）では persistent として扱う。
+プールの使用状況は mysite.monitoring で確認できる。
+
+DATABASE_REPLICA_URLS を指定すると、読み取り専用のレプリカを replica1, replica2, ... として追加する
+（どのリクエストをレプリカから読むかは mysite.db_router 参照）。
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Mapping
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+CONN_MODES = ("pool", "persistent", "none")
+DEFAULT_CONN_MAX_AGE = 60
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 4
+DEFAULT_POOL_TIMEOUT = 10.0
+# 使われていない接続を閉じるまでの秒数と、接続を作り直すまでの秒数（マネージドDB側の切断より前に作り直す）
+POOL_MAX_IDLE = 300.0
+POOL_MAX_LIFETIME = 1800.0
+
+
+def configure_connections(
+    config: Dict[str, Any], env: Mapping[str, str] = os.environ
+) -> Dict[str, Any]:
+    """dj_database_url で作った DATABASES["default"] に、DB_CONN_MODE などの環境変数の設定を加える"""
+    default_mode = "pool" if env.get("SERVER_MODE") == "asgi" else "persistent"
+    mode = env.get("DB_CONN_MODE") or default_mode
+    if mode not in CONN_MODES:
+        raise ImproperlyConfigured(
+            f"DB_CONN_MODE '{mode}' には対応していません"
+            f"（{', '.join(CONN_MODES)} のいずれかを指定してください）"
+        )
+    if mode == "pool" and not config.get("ENGINE", "").endswith("postgresql"):
+        mode = "persistent"
+
+    config = {**config, "OPTIONS": dict(config.get("OPTIONS", {}))}
+    config["CONN_HEALTH_CHECKS"] = mode != "none"
+    if mode == "persistent":
+        config["CONN_MAX_AGE"] = int(env.get("DB_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE))
+    else:
+        # プールを使う場合は接続の持ち越し (CONN_MAX_AGE) を使えない
+        config["CONN_MAX_AGE"] = 0
+    if mode == "pool":
+        min_size = int(env.get("DB_POOL_MIN_SIZE", DEFAULT_POOL_MIN_SIZE))
+        max_size = int(env.get("DB_POOL_MAX_SIZE", DEFAULT_POOL_MAX_SIZE))
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ImproperlyConfigured(
+                "DB_POOL_MIN_SIZE は0以上 DB_POOL_MAX_SIZE 以下、DB_POOL_MAX_SIZE は1以上で指定してください"
+            )
+        config["OPTIONS"]["pool"] = {
+            "min_size": min_size,
+            "max_size": max_size,
+            "timeout": float(env.get("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+            "max_idle": POOL_MAX_IDLE,
+            "max_lifetime": POOL_MAX_LIFETIME,
+        }
+    return config
+
+
+def connection_mode(config: Mapping[str, Any]) -> str:
+    """DATABASES の設定から接続の再利用方法 (CONN_MODES) を返す"""
+    if config.get("OPTIONS", {}).get("pool"):
+        return "pool"
+    return "persistent" if config.get("CONN_MAX_AGE", 0) != 0 else "none"
+
+
+def replica_databases(
+    urls: str | None, env: Mapping[str, str] = os.environ
+) -> Dict[str, Dict[str, Any]]:
+    """
+    DATABASE_REPLICA_URLS（カンマ区切りのURL）から、読み取り専用のレプリカの DATABASES の設定
+    （エイリアス replica1, replica2, ...）を作る。接続の再利用方法は default と同じ。
+    テストではレプリカのデータベースを作らず default を使う (TEST["MIRROR"])。
+    """
+    replicas = {}
+    for number, url in enumerate(
+        (url.strip() for url in (urls or "").split(",") if url.strip()), start=1
+    ):
+        config = configure_connections(dj_database_url.parse(url), env)
+        config["TEST"] = {"MIRROR": "default"}
+        replicas[f"replica{number}"] = config
+    return replicas
@@ -0,0 +1,77 @@
+"""
+読み取りをレプリカに振り分けるデータベースルーター。
+
+書き込みはすべて default（プライマリ）に送る。読み取りをレプリカ (settings.DATABASE_REPLICAS) に送るのは、
+ReplicaReadsMiddleware が安全なメソッド (GET / HEAD / OPTIONS) のリクエストを処理している間だけで、
+POST などのリクエスト・管理コマンド・cron では読み取りもプライマリから行う（読んだ値をもとに書き込むため）。
+
+レプリカへの反映には遅れがあるため、お気に入り・口コミなどを書き込んだブラウザには
+REPLICA_STICKY_SECONDS 秒間 Cookie を付け、その間の読み取りもプライマリから行う（自分の変更がすぐに見える）。
+同じ理由で、キャッシュに書き込む値（myapp.caching.get_or_set・匿名ユーザー向けのページキャッシュ・
+設備のビットマップインデックス）もプライマリから読む。書き込みでバージョンを上げた直後のキャッシュに
+レプリカの古い値を入れると、有効期限まで古い値が返り続けるため。
+"""
+
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_STICKY_COOKIE = "use_primary"
+REPLICA_STICKY_SECONDS = 10
+
+# 現在のリクエストの読み取りをレプリカに送ってよいか（非同期ビューの sync_to_async にも引き継がれる）
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads(enabled: bool = True) -> Iterator[None]:
+    """ブロック内の読み取りをレプリカに送る（enabled が偽ならプライマリに送る）"""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_from_primary() -> None:
+    """
+    現在のリクエストのこの後の読み取りをプライマリに送る。
+    リクエストの処理の途中で呼ぶためのもので、ReplicaReadsMiddleware の replica_reads() を抜けると元に戻る
+    """
+    _replica_reads.set(False)
+
+
+def replica_aliases() -> list[str]:
+    """レプリカのデータベースのエイリアス"""
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class PrimaryReplicaRouter:
+    """書き込みはプライマリに、replica_reads() の中の読み取りはレプリカのいずれかに送るルーター"""
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        # プライマリのトランザクション内では、まだコミットしていない書き込みを読めるようプライマリから読む
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # レプリカはプライマリの複製のため、どのデータベースから読んだオブジェクトどうしも関連付けられる
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> Optional[bool]:
+        # レプリカにはプライマリから複製されるため、マイグレーションはプライマリだけに行う
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,86 @@
+"""
+リクエストとデータベースの Prometheus のメトリクス。
+
+RequestTimingMiddleware (mysite.request_timing) がリクエストごとに record_request を呼び、
+URL名ごとのリクエスト数・処理時間のヒストグラム・SQL の件数と時間を記録する。
+アプリケーションのメトリクス（キャッシュ・お気に入り・口コミ）は myapp.metrics にある。
+
+gunicorn の複数のワーカーで動かす場合は、環境変数 PROMETHEUS_MULTIPROC_DIR を空のディレクトリに設定して起動する
+（scripts/start.sh）。各ワーカーは値をそのディレクトリのファイルに書き込み、/metrics は全ワーカーの値を合計して返す。
+終了したワーカーのファイルは gunicorn.conf.py の child_exit で片付ける。
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# URLに一致しなかったリクエスト（404 など）の route ラベル。パスをそのまま使うとラベルの種類が際限なく増えるため
+UNMATCHED_ROUTE = "unmatched"
+METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+HTTP_REQUESTS = Counter(
+    "kidsplayground_http_requests_total",
+    "URL名・メソッド・ステータスごとのリクエスト数",
+    ["route", "method", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "kidsplayground_http_request_duration_seconds",
+    "URL名・メソッドごとのリクエストの処理時間",
+    ["route", "method"],
+)
+DB_QUERIES = Counter(
+    "kidsplayground_db_queries_total",
+    "URL名ごとの SQL の件数",
+    ["route"],
+)
+DB_QUERY_DURATION = Counter(
+    "kidsplayground_db_query_duration_seconds_total",
+    "URL名ごとの SQL の合計時間",
+    ["route"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "kidsplayground_db_queries_per_request",
+    "URL名ごとの1リクエストあたりの SQL の件数",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+
+def record_request(
+    route: Optional[str],
+    method: str,
+    status: int,
+    seconds: float,
+    queries: int,
+    sql_seconds: float,
+) -> None:
+    """1リクエストの処理時間と SQL の件数・時間を記録する"""
+    route = route or UNMATCHED_ROUTE
+    method = method if method in METHODS else "other"
+    HTTP_REQUESTS.labels(route, method, str(status)).inc()
+    HTTP_REQUEST_DURATION.labels(route, method).observe(seconds)
+    DB_QUERIES.labels(route).inc(queries)
+    DB_QUERY_DURATION.labels(route).inc(sql_seconds)
+    DB_QUERIES_PER_REQUEST.labels(route).observe(queries)
+
+
+def render_latest() -> bytes:
+    """
+    メトリクスを Prometheus のテキスト形式で返す。
+    PROMETHEUS_MULTIPROC_DIR が設定されていれば、全ワーカーの値を合計したもの
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
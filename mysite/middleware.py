@@ -0,0 +1,92 @@
+"""
+プロジェクト全体で使うミドルウェア。
+
+WhiteNoiseMiddleware は同期専用のため、ASGI で起動すると（scripts/start.sh の SERVER_MODE=asgi）
+以降のミドルウェアと非同期ビューがリクエストのたびにスレッドを経由して呼ばれる。
+StaticFilesMiddleware は静的ファイル以外のリクエストをそのまま非同期で次に渡す。
+
+ReplicaReadsMiddleware は GET などのリクエストの読み取りをレプリカに送る（mysite.db_router 参照）。
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from mysite import db_router
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WSGI・ASGI の両方で使える WhiteNoiseMiddleware"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaReadsMiddleware:
+    """
+    安全なメソッドのリクエストの読み取りをレプリカに送るミドルウェア（mysite.db_router 参照）。
+    書き込みに成功したリクエストのレスポンスには REPLICA_STICKY_SECONDS 秒間有効な Cookie を付け、
+    その Cookie があるリクエストは読み取りもプライマリから行う。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with db_router.replica_reads(self.reads_from_replica(request)):
+            response = self.get_response(request)
+        return self.stick_to_primary(request, response)
+
+    async def __acall__(self, request):
+        with db_router.replica_reads(self.reads_from_replica(request)):
+            response = await self.get_response(request)
+        return self.stick_to_primary(request, response)
+
+    @staticmethod
+    def reads_from_replica(request) -> bool:
+        return (
+            request.method in SAFE_METHODS
+            and db_router.REPLICA_STICKY_COOKIE not in request.COOKIES
+        )
+
+    @staticmethod
+    def stick_to_primary(request, response):
+        """書き込みに成功したリクエストなら、しばらくプライマリから読むための Cookie を付ける"""
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                db_router.REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=db_router.REPLICA_STICKY_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
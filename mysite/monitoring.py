@@ -0,0 +1,87 @@
+"""
+監視用のエンドポイント。
+
+/internal/db-pool/ は、リクエストを処理したワーカーのデータベース接続の状態（接続の再利用方法、
+SELECT 1 の応答時間、コネクションプールの使用状況と待ち時間）を JSON で返す。
+値はワーカー（プロセス）ごとのため、監視側で pid ごとに集計する。
+/metrics は、全ワーカーのリクエスト・SQL・キャッシュ・お気に入り・口コミのメトリクス (mysite.metrics) を
+Prometheus のテキスト形式で返す。
+どちらも settings.MONITORING_TOKEN を Authorization: Bearer で渡すか、スタッフユーザーでログインしてアクセスする。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from prometheus_client import CONTENT_TYPE_LATEST
+from mysite.db_config import connection_mode
+from mysite.metrics import render_latest
+
+
+def has_monitoring_access(request: HttpRequest) -> bool:
+    """監視用のトークンを持つリクエスト、またはスタッフユーザーか"""
+    token = settings.MONITORING_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if token and constant_time_compare(authorization, f"Bearer {token}"):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def pool_stats(alias: str = "default") -> Dict[str, Any] | None:
+    """
+    コネクションプールの統計 (psycopg_pool の get_stats) に、使用率と平均待ち時間を加えたもの。
+    プールを使っていなければ None
+    """
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    queued = stats.get("requests_queued", 0)
+    return {
+        **stats,
+        "in_use": in_use,
+        "utilization": in_use / stats["pool_max"] if stats.get("pool_max") else 0.0,
+        "requests_wait_ms_avg": (
+            stats.get("requests_wait_ms", 0) / queued if queued else 0.0
+        ),
+    }
+
+
+def database_status(alias: str = "default") -> Dict[str, Any]:
+    """データベース接続の状態（SELECT 1 の応答時間とコネクションプールの統計）"""
+    connection = connections[alias]
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return {
+        "alias": alias,
+        "vendor": connection.vendor,
+        "mode": connection_mode(connection.settings_dict),
+        "ping_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": pool_stats(alias),
+    }
+
+
+@never_cache
+def db_pool_status(request: HttpRequest) -> JsonResponse:
+    """このワーカーのデータベース接続とコネクションプールの状態を返す"""
+    if not has_monitoring_access(request):
+        raise Http404
+    return JsonResponse({"pid": os.getpid(), **database_status()})
+
+
+@never_cache
+def metrics(request: HttpRequest) -> HttpResponse:
+    """全ワーカーのメトリクスを Prometheus のテキスト形式で返す"""
+    if not has_monitoring_access(request):
+        raise Http404
+    return HttpResponse(render_latest(), content_type=CONTENT_TYPE_LATEST)
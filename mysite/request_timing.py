@@ -0,0 +1,190 @@
+"""
+リクエストごとの SQL とレンダリングの計測。
+
+RequestTimingMiddleware は、リクエストごとに次の値を計測する。
+
+- SQL の件数と合計時間（全データベースの接続に connection.execute_wrapper で計測用の関数を挟む）
+- テンプレートのレンダリング時間（ビューが返した TemplateResponse の render の時間。
+  ビューの中で render() を呼ぶ関数ビューでは、レンダリング時間はビューの時間に含まれる）
+- リクエスト全体の処理時間
+
+計測値は Server-Timing ヘッダー（ブラウザの開発者ツールの「タイミング」に表示される）と、
+ロガー mysite.request_timing への JSON 形式の1行のログとして出力する。
+URL名ごとの上限 (settings.REQUEST_TIMING_THRESHOLDS) を超えたリクエストは WARNING で記録する。
+同じ値を Prometheus のメトリクス (mysite.metrics) にも記録する。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from mysite import metrics
+
+logger = logging.getLogger("mysite.request_timing")
+
+DEFAULT_THRESHOLD = {"queries": 20, "ms": 1000}
+
+
+@dataclass
+class RequestTiming:
+    """1リクエストの計測値"""
+
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    sql_seconds: float = 0.0
+    template_seconds: float = 0.0
+    total_seconds: float = 0.0
+    _template_started: Optional[float] = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper に渡す、SQL の件数と時間を数える関数"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.queries += 1
+
+    def start_template(self) -> None:
+        self._template_started = time.perf_counter()
+
+    def end_template(self, response):
+        """TemplateResponse の post-render callback"""
+        if self._template_started is not None:
+            self.template_seconds += time.perf_counter() - self._template_started
+            self._template_started = None
+        return None
+
+    def finish(self) -> None:
+        self.total_seconds = time.perf_counter() - self.started
+
+    @property
+    def sql_ms(self) -> float:
+        return self.sql_seconds * 1000
+
+    @property
+    def template_ms(self) -> float:
+        return self.template_seconds * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing ヘッダーの値"""
+        return ", ".join(
+            (
+                f'sql;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+                f"tpl;dur={self.template_ms:.1f}",
+                f"total;dur={self.total_ms:.1f}",
+            )
+        )
+
+
+def get_threshold(route: Optional[str]) -> Dict[str, float]:
+    """URL名の上限（クエリ数 queries と処理時間 ms）。設定がなければ "default" の値"""
+    thresholds = getattr(settings, "REQUEST_TIMING_THRESHOLDS", {})
+    return {
+        **DEFAULT_THRESHOLD,
+        **thresholds.get("default", {}),
+        **thresholds.get(route or "", {}),
+    }
+
+
+class RequestTimingMiddleware:
+    """
+    リクエストの SQL の件数・時間、テンプレートのレンダリング時間、全体の処理時間を計測するミドルウェア。
+    全体の処理時間に他のミドルウェアを含めるため、MIDDLEWARE の先頭に置く。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timing = RequestTiming()
+        request.timing = timing  # type: ignore[attr-defined]
+        with ExitStack() as stack:
+            self.wrap_connections(stack, timing)
+            response = self.get_response(request)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        request.timing = timing  # type: ignore[attr-defined]
+        # 非同期ビューの ORM はリクエストごとのスレッドで実行されるため、そのスレッドの接続に計測用の関数を挟む
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, timing)
+
+    @staticmethod
+    def wrap_connections(stack: ExitStack, timing: RequestTiming) -> None:
+        for connection in connections.all(initialized_only=False):
+            stack.enter_context(connection.execute_wrapper(timing))
+
+    def process_template_response(self, request, response):
+        # MIDDLEWARE の先頭に置くため最後に呼ばれ、この直後に render が行われる
+        timing = getattr(request, "timing", None)
+        if timing is not None:
+            timing.start_template()
+            response.add_post_render_callback(timing.end_template)
+        return response
+
+    def finish(self, request, response, timing: RequestTiming):
+        timing.finish()
+        response.headers["Server-Timing"] = timing.server_timing()
+        match = request.resolver_match
+        route = match.view_name if match is not None else None
+        self.log(request, response, timing, route)
+        metrics.record_request(
+            route,
+            request.method,
+            response.status_code,
+            timing.total_seconds,
+            timing.queries,
+            timing.sql_seconds,
+        )
+        return response
+
+    @staticmethod
+    def log(request, response, timing: RequestTiming, route: Optional[str]) -> None:
+        threshold = get_threshold(route)
+        slow = (
+            timing.queries > threshold["queries"] or timing.total_ms > threshold["ms"]
+        )
+        record: Dict[str, Any] = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "queries": timing.queries,
+            "sql_ms": round(timing.sql_ms, 1),
+            "template_ms": round(timing.template_ms, 1),
+            "total_ms": round(timing.total_ms, 1),
+            "over_threshold": slow,
+        }
+        if slow:
+            record["threshold"] = threshold
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            json.dumps(record, ensure_ascii=False),
+        )
@@ -2,6 +2,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 import dj_database_url
+from mysite.cache_config import parse_cache_url
+from mysite.db_config import configure_connections, replica_databases
 
 # BASE_DIRの定義
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -32,8 +34,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # SQL・テンプレート・全体の処理時間を計測する（全体の時間に他のミドルウェアを含めるため先頭に置く）
+    "mysite.request_timing.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise を ASGI でも非同期のまま通すためのサブクラス（mysite/middleware.py 参照）
+    "mysite.middleware.StaticFilesMiddleware",
+    # 読み取りをレプリカに送るリクエストを決める（セッションの読み込みより前に置く）
+    "mysite.middleware.ReplicaReadsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -43,6 +50,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # allauth middleware
     "allauth.account.middleware.AccountMiddleware",
+    # 匿名ユーザー向けのページキャッシュ（認証・メッセージのミドルウェアより後に置く）
+    "myapp.middleware.AnonymousPageCacheMiddleware",
 ]
 
 ROOT_URLCONF = "mysite.urls"
@@ -77,9 +86,27 @@ DEFAULT_DATABASE_URL = (
     f"postgres://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{POSTGRES_DB}"
 )
 
+# 接続の再利用方法（コネクションプールなど）は DB_CONN_MODE で選ぶ（mysite/db_config.py 参照）
+# DATABASE_REPLICA_URLS を指定すると、GET などのリクエストの読み取りをレプリカに送る（mysite/db_router.py 参照）
 DATABASES = {
-    "default": dj_database_url.config(
-        default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+    "default": configure_connections(
+        dj_database_url.config(default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    ),
+    **replica_databases(os.getenv("DATABASE_REPLICA_URLS")),
+}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["mysite.db_router.PrimaryReplicaRouter"]
+
+# 監視用のエンドポイント（/internal/db-pool/）に Authorization: Bearer で渡すトークン
+# 未設定の場合はスタッフユーザーだけがアクセスできる
+MONITORING_TOKEN = os.getenv("MONITORING_TOKEN", "")
+
+# キャッシュ設定
+# CACHE_URL でバックエンドを選ぶ（書式は mysite/cache_config.py 参照）。未指定時はプロセスごとのメモリ
+CACHES = {
+    "default": parse_cache_url(
+        os.getenv("CACHE_URL"),
+        key_prefix=os.getenv("CACHE_KEY_PREFIX", "kidsplayground"),
     )
 }
 
@@ -174,11 +201,36 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        # リクエストごとの計測値（mysite/request_timing.py）
+        "mysite": {
+            "handlers": ["console", "file"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
+# リクエストの計測値 (mysite/request_timing.py) の上限。URL名ごとに、超えたリクエストを WARNING で記録する
+# queries は SQL の件数、ms はリクエスト全体の処理時間（ミリ秒）。URL名の設定がなければ default を使う
+REQUEST_TIMING_THRESHOLDS = {
+    "default": {"queries": 10, "ms": 500},
+    "myapp:playground_map_data": {"queries": 3, "ms": 1000},
+    "myapp:playground_clusters": {"queries": 3, "ms": 500},
+    "myapp:add_review": {"queries": 12, "ms": 500},
+}
+
 # cron設定
-CRONJOBS = [("0 0 1 * *", "myapp.management.commands.fetch_playgrounds")]
+# 毎月1日に施設データを取り込む（django-crontab は関数を呼び出すため call_command 経由でコマンドを実行する）
+CRONJOBS = [
+    ("0 0 1 * *", "django.core.management.call_command", ["fetch_playgrounds"]),
+]
+
+# fetch_playgrounds で取り込む施設データのファイル（カンマ区切り。.csv / .json / .jsonl）
+PLAYGROUND_IMPORT_SOURCES = [
+    path.strip()
+    for path in os.getenv("PLAYGROUND_IMPORT_SOURCES", "").split(",")
+    if path.strip()
+]
 
 
 # Content Security Policy (CSP) settings
@@ -33,6 +33,11 @@ LOGGING = {
             "level": "DEBUG",  # Set myapp to DEBUG level
             "propagate": False,
         },
+        "mysite": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
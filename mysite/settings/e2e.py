@@ -21,6 +21,7 @@ DATABASES = {
         "PORT": os.getenv("DB_PORT", "5432"),
     }
 }
+DATABASE_REPLICAS: list[str] = []
 
 # Static files for E2E tests
 # Ensure static files are collected and served during tests
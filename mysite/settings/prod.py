@@ -1,6 +1,7 @@
 from .base import *
 import os
 import dj_database_url
+from mysite.db_config import configure_connections, replica_databases
 
 DEBUG = False
 ALLOWED_HOSTS = ["kidsplayground.onrender.com"]
@@ -16,7 +17,12 @@ SECURE_HSTS_SECONDS = 3600
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
-DATABASES = {"default": dj_database_url.config(default=os.getenv("DATABASE_URL"))}
+DATABASES = {
+    "default": configure_connections(
+        dj_database_url.config(default=os.getenv("DATABASE_URL"))
+    ),
+    **replica_databases(os.getenv("DATABASE_REPLICA_URLS")),
+}
 
 # Email settings for production
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -17,9 +17,12 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
+from mysite import monitoring
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", monitoring.metrics, name="metrics"),
+    path("internal/db-pool/", monitoring.db_pool_status, name="db_pool_status"),
     path("accounts/", include("allauth.urls")),
     path("accounts/", include("accounts.urls")),
     path("", include("myapp.urls")),
@@ -3,5 +3,19 @@
 # データベースのマイグレーションを実行
 /usr/local/bin/python3 manage.py migrate
 
-# Gunicornを起動
-/usr/local/bin/python3 -m gunicorn --bind 0.0.0.0:$PORT mysite.wsgi:application
+# Prometheus のメトリクスを全ワーカーで合計するためのディレクトリ（mysite/metrics.py 参照）
+# 前回の起動時のワーカーの値が残らないよう、起動のたびに空にする
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Gunicornを起動（設定は gunicorn.conf.py）
+# SERVER_MODE=asgi の場合は uvicorn のワーカーで ASGI アプリケーションを起動する
+# （お気に入り・口コミの追加などの非同期ビューが、データベースの待ち時間にワーカーを占有しない）
+# ワーカー数は環境変数 WEB_CONCURRENCY で指定する
+if [ "$SERVER_MODE" = "asgi" ]; then
+    /usr/local/bin/python3 -m gunicorn --bind 0.0.0.0:$PORT \
+        --worker-class uvicorn_worker.UvicornWorker mysite.asgi:application
+else
+    /usr/local/bin/python3 -m gunicorn --bind 0.0.0.0:$PORT mysite.wsgi:application
+fi
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_alter_customuser_account_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="account_name_changed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="アカウント名の変更日時"
+            ),
+        ),
+    ]
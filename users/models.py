@@ -52,6 +52,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_staff: bool = models.BooleanField("staff status", default=False)  # type: ignore
     is_active: bool = models.BooleanField("active", default=True)  # type: ignore
     date_joined: datetime.datetime = models.DateTimeField("date joined", default=timezone.now)  # type: ignore
+    # 口コミに表示する投稿者名が変わったことを施設ページの ETag / Last-Modified に反映するための日時
+    account_name_changed_at: datetime.datetime | None = models.DateTimeField(  # type: ignore
+        "アカウント名の変更日時", null=True, blank=True
+    )
 
     objects: CustomUserManager = CustomUserManager()
 
@@ -60,3 +64,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self) -> str:
         return self.email
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """
+        update_fields にアカウント名が含まれる場合は、変更日時も保存する
+        （変更日時は pre_save のシグナル (myapp.signals) で設定するが、シグナルでは update_fields を変更できない）
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "account_name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "account_name_changed_at"}
+        super().save(*args, **kwargs)